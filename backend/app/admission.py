@@ -0,0 +1,345 @@
+# app/admission.py
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+
+from backend.app.auth.user_cache import CachedUser
+from backend.app.config import get_settings
+from backend.app.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTIONS, ADMISSION_WAIT
+from backend.app.routers.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+
+# Waiters blocked on a per-user cap held by another worker are rechecked this often
+SHARED_SLOT_POLL_SECONDS = 0.25
+# Per-user slot leases expire so a crashed worker can't pin a user's cap forever
+SLOT_LEASE_SECONDS = 3600
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    """Limits for one endpoint; rate and concurrency apply per user."""
+    rate_per_second: float
+    burst: int
+    user_concurrency: int
+    concurrency: int
+    queue_per_user: int
+    queue_size: int
+    max_wait_seconds: float
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class MemoryAdmissionState:
+    """Token buckets and per-user slot counts for a single process."""
+
+    shared = False
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._slots: Dict[str, int] = {}
+
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        """Take a token; returns 0 if granted, else seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / rate
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        if self._slots.get(key, 0) >= limit:
+            return False
+        self._slots[key] = self._slots.get(key, 0) + 1
+        return True
+
+    async def release_slot(self, key: str) -> None:
+        remaining = self._slots.get(key, 0) - 1
+        if remaining > 0:
+            self._slots[key] = remaining
+        else:
+            self._slots.pop(key, None)
+
+
+_TAKE_TOKEN = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+_ACQUIRE_SLOT = """
+local n = redis.call('INCR', KEYS[1])
+if n > tonumber(ARGV[1]) then
+  redis.call('DECR', KEYS[1])
+  return 0
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_RELEASE_SLOT = """
+if redis.call('DECR', KEYS[1]) <= 0 then redis.call('DEL', KEYS[1]) end
+return 1
+"""
+
+
+class RedisAdmissionState:
+    """Token buckets and per-user slot counts shared by every worker through Redis.
+
+    Queueing stays per process; only the limits are shared.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "techrag:admission:"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self._take_token = self.client.register_script(_TAKE_TOKEN)
+        self._acquire_slot = self.client.register_script(_ACQUIRE_SLOT)
+        self._release_slot = self.client.register_script(_RELEASE_SLOT)
+
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        wait = await self._take_token(keys=[f"{self.prefix}bucket:{key}"], args=[rate, burst, time.time()])
+        return float(wait)
+
+    async def acquire_slot(self, key: str, limit: int) -> bool:
+        granted = await self._acquire_slot(keys=[f"{self.prefix}slots:{key}"], args=[limit, SLOT_LEASE_SECONDS])
+        return bool(granted)
+
+    async def release_slot(self, key: str) -> None:
+        await self._release_slot(keys=[f"{self.prefix}slots:{key}"])
+
+
+class EndpointQueue:
+    """Admission for one endpoint: rate limit, concurrency caps and a fair queue.
+
+    Requests that can't start immediately wait in a per-user FIFO; freed
+    slots go round-robin across users, so one user's backlog can't delay
+    everyone else's requests by more than one turn.
+    """
+
+    def __init__(self, name: str, policy: AdmissionPolicy, state):
+        self.name = name
+        self.policy = policy
+        self.state = state
+        self.active = 0
+        self.queued = 0
+        self.rejections: Dict[str, int] = {}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {}
+        self._rotation: Deque[str] = deque()
+        self._lock = asyncio.Lock()
+        self._poll: Optional[asyncio.TimerHandle] = None
+        # Smoothed request duration, to estimate Retry-After for full queues
+        self._service_seconds = 1.0
+
+    def _reject(self, reason: str, retry_after: float) -> Rejected:
+        self.rejections[reason] = self.rejections.get(reason, 0) + 1
+        ADMISSION_REJECTIONS.labels(self.name, reason).inc()
+        return Rejected(reason, retry_after)
+
+    def _queue_retry_after(self) -> float:
+        return self._service_seconds * (self.queued + 1) / self.policy.concurrency
+
+    def _gauges(self) -> None:
+        ADMISSION_QUEUE_DEPTH.labels(self.name).set(self.queued)
+        ADMISSION_IN_FLIGHT.labels(self.name).set(self.active)
+
+    async def acquire(self, user_id: str) -> None:
+        """Wait for a slot, or raise Rejected."""
+        user_queue = self._waiters.get(user_id)
+        if self.queued >= self.policy.queue_size or (user_queue and len(user_queue) >= self.policy.queue_per_user):
+            raise self._reject("queue_full", self._queue_retry_after())
+
+        wait = await self.state.take_token(f"{self.name}:{user_id}", self.policy.rate_per_second, self.policy.burst)
+        if wait > 0:
+            raise self._reject("rate_limited", wait)
+
+        # Everyone goes through the queue; an idle endpoint grants at once
+        future = asyncio.get_running_loop().create_future()
+        async with self._lock:
+            if user_id not in self._waiters:
+                self._waiters[user_id] = deque()
+                self._rotation.append(user_id)
+            self._waiters[user_id].append(future)
+            self.queued += 1
+            await self._dispatch()
+            self._gauges()
+        if future.done():
+            ADMISSION_WAIT.labels(self.name).observe(0.0)
+            return
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.policy.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            async with self._lock:
+                if future.done():
+                    # Granted just as we gave up: hand the slot on
+                    granted = True
+                else:
+                    granted = False
+                    future.cancel()
+                    self._discard(user_id, future)
+            if granted:
+                await self.release(user_id)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject("timeout", self._queue_retry_after())
+        ADMISSION_WAIT.labels(self.name).observe(time.perf_counter() - start)
+
+    def _discard(self, user_id: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(user_id)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        self.queued -= 1
+        if not queue:
+            del self._waiters[user_id]
+            self._rotation.remove(user_id)
+        self._gauges()
+
+    async def release(self, user_id: str, elapsed: Optional[float] = None) -> None:
+        if elapsed is not None:
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * elapsed
+        await self.state.release_slot(f"{self.name}:{user_id}")
+        async with self._lock:
+            self.active -= 1
+            await self._dispatch()
+            self._gauges()
+
+    async def _dispatch(self) -> None:
+        """Grant free slots round-robin to users under their concurrency cap."""
+        blocked = 0
+        while self._rotation and self.active < self.policy.concurrency and blocked < len(self._rotation):
+            user_id = self._rotation[0]
+            self._rotation.rotate(-1)
+            if not await self.state.acquire_slot(f"{self.name}:{user_id}", self.policy.user_concurrency):
+                blocked += 1
+                continue
+            blocked = 0
+            queue = self._waiters[user_id]
+            queue.popleft().set_result(None)
+            self.queued -= 1
+            self.active += 1
+            if not queue:
+                del self._waiters[user_id]
+                self._rotation.remove(user_id)
+
+        if self.state.shared and self._rotation and self.active < self.policy.concurrency and self._poll is None:
+            # Everyone waiting is at their cap, which another worker may
+            # free without telling us, so look again shortly
+            self._poll = asyncio.get_running_loop().call_later(SHARED_SLOT_POLL_SECONDS, self._repoll)
+
+    def _repoll(self) -> None:
+        self._poll = None
+        asyncio.ensure_future(self._locked_dispatch())
+
+    async def _locked_dispatch(self) -> None:
+        async with self._lock:
+            await self._dispatch()
+            self._gauges()
+
+    def snapshot(self) -> Dict:
+        return {
+            "in_flight": self.active,
+            "queued": self.queued,
+            "queued_users": len(self._rotation),
+            "rejections": dict(self.rejections),
+            "policy": self.policy.__dict__,
+        }
+
+
+class AdmissionController:
+    def __init__(self, policies: Dict[str, AdmissionPolicy], state):
+        self.queues = {name: EndpointQueue(name, policy, state) for name, policy in policies.items()}
+
+    def snapshot(self) -> Dict:
+        return {name: queue.snapshot() for name, queue in self.queues.items()}
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    if settings.admission_backend == "redis":
+        state = RedisAdmissionState(settings.admission_redis_url)
+    elif settings.admission_backend == "memory":
+        state = MemoryAdmissionState()
+    else:
+        raise ValueError(f"Unknown ADMISSION_BACKEND: {settings.admission_backend}")
+
+    policies = {
+        name: AdmissionPolicy(
+            rate_per_second=getattr(settings, f"{name}_rate_per_minute") / 60,
+            burst=getattr(settings, f"{name}_burst"),
+            user_concurrency=getattr(settings, f"{name}_user_concurrency"),
+            concurrency=getattr(settings, f"{name}_concurrency"),
+            queue_per_user=getattr(settings, f"{name}_queue_per_user"),
+            queue_size=settings.admission_queue_size,
+            max_wait_seconds=getattr(settings, f"{name}_max_wait_seconds"),
+        )
+        for name in ("upload", "chat")
+    }
+    return AdmissionController(policies, state)
+
+
+def admission(endpoint: str):
+    """
+    Dependency factory: queue the request for a slot on `endpoint` and
+    hold it until the response is done. Answers 429 with Retry-After when
+    the user is over their rate, the queue is full or the wait times out.
+
+    Nothing here may hold a database connection while queued: the user is
+    resolved from the user cache (or a session closed before returning),
+    and route sessions connect lazily, after admission. Otherwise a queue
+    backlog would drain the pool for requests that skip admission.
+    Put `admission(...)` first in a route's `dependencies`.
+    """
+    async def dependency(current_user: CachedUser = Depends(get_current_user)) -> AsyncIterator[None]:
+        if not get_settings().admission_enabled:
+            yield
+            return
+
+        queue = get_admission_controller().queues[endpoint]
+        try:
+            await queue.acquire(current_user.id)
+        except Rejected as e:
+            logger.info(f"Rejected {endpoint} request from {current_user.username}: {e.reason}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many {endpoint} requests ({e.reason.replace('_', ' ')}), retry later",
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            await queue.release(current_user.id, time.perf_counter() - start)
+
+    return dependency
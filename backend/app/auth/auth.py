@@ -1,8 +1,12 @@
 # app/auth/auth.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from backend.app.database.models import User
@@ -11,6 +15,10 @@ from backend.app.config import get_settings
 settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow (~250 ms); run it off the event loop on a
+# small dedicated pool so logins can't starve the default threadpool
+_bcrypt_executor = ThreadPoolExecutor(max_workers=settings.bcrypt_workers, thread_name_prefix="bcrypt")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
     try:
@@ -23,6 +31,16 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bcrypt pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bcrypt pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_executor, get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a new JWT access token"""
     to_encode = data.copy()
@@ -40,6 +58,14 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
+async def authenticate_user_async(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """authenticate_user for async sessions, with the bcrypt check moved off the event loop"""
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalar_one_or_none()
+    if not user or not await verify_password_async(password, user.password):
+        return None
+    return user
+
 def verify_token(token: str, credentials_exception: HTTPException) -> dict:
     """Verify JWT token and return payload"""
     try:
@@ -50,3 +76,17 @@ def verify_token(token: str, credentials_exception: HTTPException) -> dict:
         return payload
     except JWTError:
         raise credentials_exception
+
+def create_stream_token(username: str, document_id: str, expires_in: int) -> str:
+    """Create a short-lived token that only grants streaming of one document"""
+    return create_access_token(
+        data={"sub": username, "doc": document_id, "scope": "stream"},
+        expires_delta=timedelta(seconds=expires_in)
+    )
+
+def verify_stream_token(token: str, document_id: str, credentials_exception: HTTPException) -> dict:
+    """Verify a stream token and check that it was issued for this document"""
+    payload = verify_token(token, credentials_exception)
+    if payload.get("scope") != "stream" or payload.get("doc") != document_id:
+        raise credentials_exception
+    return payload
@@ -0,0 +1,83 @@
+# app/auth/user_cache.py
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+from backend.app.config import get_settings
+from backend.app.database.models import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Detached snapshot of the fields request handlers read from a User."""
+    id: str
+    username: str
+    is_admin: bool
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(id=user.id, username=user.username, is_admin=bool(user.is_admin), created_at=user.created_at)
+
+
+class UserCache:
+    """Short-TTL map from token subject (username) to CachedUser.
+
+    Saves the per-request user lookup in get_current_user. Entries are
+    dropped as soon as the user row changes (see the mapper events below),
+    so the TTL only bounds staleness for changes made by other processes.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[CachedUser, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, username: str) -> Optional[CachedUser]:
+        if self.ttl_seconds <= 0:
+            return None
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        if entry[1] < time.monotonic():
+            self.invalidate(username)
+            return None
+        return entry[0]
+
+    def put(self, user: CachedUser) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user.username] = (user, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, username: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        with self._lock:
+            if username is not None:
+                self._entries.pop(username, None)
+            if user_id is not None:
+                for key in [k for k, (u, _) in self._entries.items() if u.id == user_id]:
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache()
+def get_user_cache() -> UserCache:
+    return UserCache(ttl_seconds=get_settings().auth_cache_ttl_seconds)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    # By id as well, in case the username itself was changed
+    get_user_cache().invalidate(username=target.username, user_id=target.id)
@@ -1,18 +1,46 @@
 # app/chat/chat_manager.py
+from functools import lru_cache
 from typing import List, Dict, Optional
-from langchain_community.chat_models import ChatOpenAI  # Updated import
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
 import logging
 
-from backend.app.document.docling_processor import DoclingProcessor
+from backend.app.config import get_settings
+from backend.app.document.docling_processor import DoclingProcessor, get_docling_processor
+from backend.app.chat.citation_aligner import CitationAligner
+from backend.app.metrics import timed
 
 logger = logging.getLogger("app")
 
+def build_chat_model():
+    """ChatOpenAI client; langchain is imported on first use, not at startup."""
+    from langchain_community.chat_models import ChatOpenAI
+    return ChatOpenAI(temperature=0.7)
+
+@lru_cache()
+def _encoding():
+    from tiktoken import get_encoding
+    return get_encoding("cl100k_base")
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text))
+
 class ChatManager:
-    def __init__(self):
+    def __init__(
+        self,
+        document_processor: Optional[DoclingProcessor] = None,
+        llm=None,
+        top_k: int = 3,
+        context_window: Optional[int] = None,
+        context_mode: Optional[str] = None,
+        context_token_budget: Optional[int] = None
+    ):
         """Initialize chat manager with document processor and language model."""
-        self.document_processor = DoclingProcessor()
-        self.llm = ChatOpenAI(temperature=0.7)
+        settings = get_settings()
+        self.document_processor = document_processor or get_docling_processor()
+        self.llm = llm or build_chat_model()
+        self.top_k = top_k
+        self.context_window = settings.chat_context_window if context_window is None else context_window
+        self.context_mode = context_mode or settings.chat_context_mode
+        self.context_token_budget = settings.chat_context_token_budget if context_token_budget is None else context_token_budget
         self.system_prompt = """You are a helpful technical assistant with access to various technical documents.
         When answering questions:
         1. Always cite your sources with page numbers, section titles, and relevant quotes
@@ -21,6 +49,68 @@ class ChatManager:
         4. If the context contains technical information, explain it clearly and accurately
         5. When discussing code or technical concepts, provide practical examples if relevant"""
 
+    def retrieve(self, query: str, document_ids: List[str]) -> List[Dict]:
+        """Top chunks from each document, merged best-first."""
+        all_results = []
+        for doc_id in document_ids:
+            results = self.document_processor.search_document(query, doc_id, top_k=self.top_k)
+            all_results.extend(results)
+
+        # Sort results by score
+        all_results.sort(key=lambda x: x["score"], reverse=True)
+        logger.debug(f"Found {len(all_results)} relevant chunks")
+        return all_results
+
+    def fit_context(self, results: List[Dict]) -> List[Dict]:
+        """Expand hits with their surrounding chunks and keep passages best-first within the token budget.
+
+        A passage that would overflow the budget is replaced by its bare hits
+        when those still fit.
+        """
+        if self.context_window <= 0 and self.context_mode != "section":
+            passages = results
+        else:
+            passages = self.document_processor.expand_context(results, self.context_window, self.context_mode)
+        hits = {r["id"]: r for r in results}
+
+        kept, used = [], 0
+        for passage in passages:
+            tokens = count_tokens(passage["metadata"].get("chunk_text", ""))
+            if used + tokens <= self.context_token_budget:
+                kept.append(passage)
+                used += tokens
+                continue
+            for hit_id in passage["metadata"].get("hit_ids", ()):
+                hit = hits[hit_id]
+                tokens = count_tokens(hit["metadata"].get("chunk_text", ""))
+                if used + tokens <= self.context_token_budget:
+                    kept.append(hit)
+                    used += tokens
+
+        logger.debug(f"Kept {len(kept)} of {len(passages)} passages ({used} context tokens)")
+        return kept
+
+    def build_prompt(self, query: str, results: List[Dict]) -> str:
+        """The user turn sent to the LLM: retrieved context plus the question."""
+        # Build context with structured information
+        contexts = []
+        for result in results:
+            metadata = result["metadata"]
+            context_entry = f"\nSection: {metadata.get('title', 'Untitled')}"
+            if metadata.get('page_numbers'):
+                context_entry += f"\nPage(s): {', '.join(map(str, metadata['page_numbers']))}"
+            context_entry += f"\nContent: {metadata.get('chunk_text', '')}"
+            contexts.append(context_entry)
+
+        context = "\n\n".join(contexts)
+
+        return f"""Context from documents:
+            {context}
+
+            User question: {query}
+
+            Please provide a response based on the context above. Include specific citations with section titles and page numbers where available."""
+
     def generate_response(
         self,
         query: str,
@@ -28,30 +118,13 @@ class ChatManager:
         chat_history: Optional[List[Dict]] = None
     ) -> Dict:
         """Generate a response using RAG with Docling's advanced document understanding."""
+        from langchain.schema import SystemMessage, HumanMessage, AIMessage
+
         try:
             logger.debug(f"Generating response for query: {query}")
 
-            # Search across all documents
-            all_results = []
-            for doc_id in document_ids:
-                results = self.document_processor.search_document(query, doc_id)
-                all_results.extend(results)
-
-            # Sort results by score
-            all_results.sort(key=lambda x: x["metadata"]["score"], reverse=True)
-            logger.debug(f"Found {len(all_results)} relevant chunks")
-
-            # Build context with structured information
-            contexts = []
-            for result in all_results:
-                metadata = result["metadata"]
-                context_entry = f"\nSection: {metadata.get('title', 'Untitled')}"
-                if metadata.get('page_numbers'):
-                    context_entry += f"\nPage(s): {', '.join(map(str, metadata['page_numbers']))}"
-                context_entry += f"\nContent: {result['text']}"
-                contexts.append(context_entry)
-
-            context = "\n\n".join(contexts)
+            # Search across all documents, then widen hits to their surrounding context
+            all_results = self.fit_context(self.retrieve(query, document_ids))
 
             # Build conversation history
             messages = [SystemMessage(content=self.system_prompt)]
@@ -64,34 +137,24 @@ class ChatManager:
                         messages.append(AIMessage(content=msg["content"]))
 
             # Add current query with context
-            current_prompt = f"""Context from documents:
-            {context}
-
-            User question: {query}
-
-            Please provide a response based on the context above. Include specific citations with section titles and page numbers where available."""
-
-            messages.append(HumanMessage(content=current_prompt))
+            messages.append(HumanMessage(content=self.build_prompt(query, all_results)))
 
             # Generate response
             logger.debug("Generating LLM response")
-            response = self.llm.generate([messages])
+            with timed("llm_generate"):
+                response = self.llm.generate([messages])
             ai_message = response.generations[0][0].text
 
-            # Extract citations and structure them
-            citations = []
-            for result in all_results:
-                if result["text"].lower() in ai_message.lower():
-                    citations.append({
-                        "section": result["metadata"].get("title", "Untitled"),
-                        "page_numbers": result["metadata"].get("page_numbers", []),
-                        "text": result["text"][:200] + "..."  # Truncate long citations
-                    })
+            # Attribute answer sentences to the retrieved chunks
+            aligner = CitationAligner(all_results)
+            attributions = aligner.align(ai_message)
+            citations = aligner.citations(attributions)
 
             logger.info(f"Generated response with {len(citations)} citations")
             return {
                 "response": ai_message,
-                "citations": citations
+                "citations": citations,
+                "attributions": attributions
             }
 
         except Exception as e:
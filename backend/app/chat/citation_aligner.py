@@ -0,0 +1,111 @@
+# app/chat/citation_aligner.py
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[._/-][a-z0-9]+)*")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; keeps part numbers like `N2-BUS` or `v4.11` intact."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def shingles(tokens: List[str], size: int = 3) -> Set[int]:
+    """Hashed word n-gram shingles of a token sequence.
+
+    Sequences shorter than `size` produce a single shingle so short
+    sentences can still be matched.
+    """
+    if not tokens:
+        return set()
+    if len(tokens) < size:
+        return {hash(tuple(tokens))}
+    return {hash(tuple(tokens[i:i + size])) for i in range(len(tokens) - size + 1)}
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split an answer into sentences / lines, dropping empty fragments."""
+    return [s.strip() for s in _SENTENCE_RE.split(text or "") if s and s.strip()]
+
+
+class CitationAligner:
+    """Attribute answer sentences to the retrieved chunks they were drawn from.
+
+    The shingle sets of all chunks are built once into an inverted index
+    (shingle -> chunk positions). Scoring a sentence is then one dictionary
+    lookup per sentence shingle, so aligning an answer is linear in the
+    answer length plus the size of the matching posting lists, instead of a
+    substring scan of every chunk against the whole answer.
+    """
+
+    def __init__(self, results: List[Dict], shingle_size: int = 3, min_score: float = 0.35):
+        self.results = results
+        self.shingle_size = shingle_size
+        self.min_score = min_score
+        self._postings: Dict[int, List[int]] = defaultdict(list)
+        self._chunk_text: Dict[str, str] = {}
+
+        for pos, result in enumerate(results):
+            text = result.get("metadata", {}).get("chunk_text", "")
+            self._chunk_text[result.get("id")] = text
+            for shingle in shingles(tokenize(text), shingle_size):
+                self._postings[shingle].append(pos)
+
+    def _best_chunk(self, sentence_shingles: Iterable[int], total: int):
+        hits: Dict[int, int] = defaultdict(int)
+        for shingle in sentence_shingles:
+            for pos in self._postings.get(shingle, ()):
+                hits[pos] += 1
+        if not hits:
+            return None, 0.0
+        # Ties go to the higher-ranked retrieval result
+        pos = max(hits, key=lambda p: (hits[p], -p))
+        return pos, hits[pos] / total
+
+    def align(self, answer: str) -> List[Dict]:
+        """Return one attribution per answer sentence that matches a chunk."""
+        attributions = []
+        for index, sentence in enumerate(split_sentences(answer)):
+            sentence_shingles = shingles(tokenize(sentence), self.shingle_size)
+            if not sentence_shingles:
+                continue
+
+            pos, score = self._best_chunk(sentence_shingles, len(sentence_shingles))
+            if pos is None or score < self.min_score:
+                continue
+
+            result = self.results[pos]
+            metadata = result.get("metadata", {})
+            attributions.append({
+                "sentence_index": index,
+                "sentence": sentence,
+                "chunk_id": result.get("id"),
+                "document_id": metadata.get("document_id"),
+                "section": metadata.get("title") or "Untitled",
+                "page_numbers": metadata.get("page_numbers") or [],
+                "score": round(score, 3),
+            })
+        return attributions
+
+    def citations(self, attributions: List[Dict]) -> List[Dict]:
+        """Collapse sentence attributions into one citation per cited chunk."""
+        by_chunk: Dict[str, Dict] = {}
+        for attribution in attributions:
+            key = attribution["chunk_id"] or id(attribution)
+            citation = by_chunk.get(key)
+            if citation is None:
+                chunk_text = self._chunk_text.get(attribution["chunk_id"], "")
+                citation = by_chunk[key] = {
+                    "chunk_id": attribution["chunk_id"],
+                    "document_id": attribution["document_id"],
+                    "section": attribution["section"],
+                    "page_numbers": attribution["page_numbers"],
+                    "text": chunk_text[:200] + ("..." if len(chunk_text) > 200 else ""),
+                    "score": attribution["score"],
+                    "sentences": [],
+                }
+            citation["score"] = max(citation["score"], attribution["score"])
+            citation["sentences"].append(attribution["sentence_index"])
+        return list(by_chunk.values())
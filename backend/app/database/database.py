@@ -1,6 +1,14 @@
+import threading
+import time
+from typing import AsyncIterator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from backend.app.config import get_settings
+from backend.app.metrics import DB_POOL_WAIT, instrument_engine
 
 settings = get_settings()
 
@@ -8,10 +16,37 @@ DATABASE_URL = settings.database_url
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
+# Async drivers for the sync URLs we accept in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap a sync driver (psycopg2, pysqlite) for its async counterpart."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def pool_options(url: str) -> Dict:
+    """Pool settings from config; SQLite uses its own pool classes."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+
 # Create engine
 engine = create_engine(
     DATABASE_URL,
     echo=settings.debug,
+    **pool_options(DATABASE_URL)
 )
 
 # Create session factory
@@ -21,8 +56,81 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+def timed_pool(pool_class):
+    """`pool_class` recording how long each checkout waits for a connection.
+
+    Only time spent getting a connection counts, so sessions can connect
+    lazily (on their first query) and still be measured.
+    """
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                waited = time.perf_counter() - start
+                pool_wait_stats.observe(waited)
+                DB_POOL_WAIT.observe(waited)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+ASYNC_DATABASE_URL = settings.async_database_url or to_async_url(DATABASE_URL)
+
+async_pool_options = pool_options(ASYNC_DATABASE_URL)
+if async_pool_options:
+    async_pool_options["poolclass"] = timed_pool(AsyncAdaptedQueuePool)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=settings.debug,
+    **async_pool_options
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
 Base = declarative_base()
 
+class PoolWaitStats:
+    """Running stats for how long requests wait to check out a connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "checkouts": self.count,
+                "total_wait_seconds": round(self.total_seconds, 6),
+                "mean_wait_seconds": round(self.total_seconds / self.count, 6) if self.count else 0.0,
+                "max_wait_seconds": round(self.max_seconds, 6),
+            }
+
+pool_wait_stats = PoolWaitStats()
+
+def pool_status() -> Dict:
+    """Connection pool state of the async engine plus checkout wait stats."""
+    return {
+        "pool": async_engine.pool.status(),
+        "checkout_wait": pool_wait_stats.snapshot(),
+    }
+
 def get_db():
     """Dependency function that yields db sessions."""
     db = SessionLocal()
@@ -31,8 +139,17 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency that yields an AsyncSession.
+
+    The session connects on its first query, so requests that never reach
+    the database (or only later) don't hold a pooled connection meanwhile.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def init_db():
     """Initialize database tables."""
     # Import all models here
-    from .models import User, Document, Chat, Message
+    from .models import User, Document, DocumentContent, ChunkSignature, ChunkLSHBucket, Chat, Message
     Base.metadata.create_all(bind=engine)
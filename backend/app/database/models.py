@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, LargeBinary, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum
@@ -42,6 +42,7 @@ class Document(Base):
     file_type = Column(String(100), nullable=False)
     file_size = Column(Integer, nullable=False)  # in bytes
     mime_type = Column(String(100), nullable=True)  # For more precise content type handling
+    content_sha256 = Column(String(64), nullable=True)  # SHA-256 of the uploaded bytes; keys the thumbnails
 
     # Document categorization and description
     category = Column(SQLEnum(DocumentCategory), nullable=True, default=DocumentCategory.GENERAL)
@@ -73,6 +74,55 @@ class Document(Base):
     creator = relationship("User", back_populates="documents")
     chats = relationship("Chat", back_populates="document")
 
+    __table_args__ = (
+        # Keyset pagination orders by (sort key, id): one index per sort key
+        # for a user's library and one for the admin listing. Deleted rows
+        # are rare, so the status filter is applied while scanning.
+        Index("ix_documents_created_by_created_at_id", "created_by", "created_at", "id"),
+        Index("ix_documents_created_by_filename_id", "created_by", "filename", "id"),
+        Index("ix_documents_created_by_category_id", "created_by", "category", "id"),
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        Index("ix_documents_filename_id", "filename", "id"),
+        Index("ix_documents_category_id", "category", "id"),
+        # Category-filtered search
+        Index("ix_documents_category_status", "category", "status"),
+    )
+
+class DocumentContent(Base):
+    """Extracted text of a document, kept out of `documents` so listing stays narrow.
+
+    On PostgreSQL the table also carries a `search_vector` tsvector column
+    (added by migration, not mapped here); on SQLite the full-text index is
+    the `document_fts` FTS5 table. See document/search_index.py.
+    """
+    __tablename__ = "document_contents"
+
+    document_id = Column(String, ForeignKey("documents.id", ondelete="CASCADE"), primary_key=True)
+    content = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ChunkSignature(Base):
+    """MinHash signature of an indexed chunk, for near-duplicate detection.
+
+    `canonical_id` is null for chunks that own a vector; a near-duplicate
+    points at the canonical chunk whose vector it shares. See document/dedup.py.
+    """
+    __tablename__ = "chunk_signatures"
+
+    chunk_id = Column(String(100), primary_key=True)
+    document_id = Column(String, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    category = Column(String(50), nullable=True)
+    canonical_id = Column(String(100), nullable=True, index=True)
+    signature = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class ChunkLSHBucket(Base):
+    """LSH band bucket -> canonical chunk; candidates share at least one bucket."""
+    __tablename__ = "chunk_lsh_buckets"
+
+    bucket = Column(String(64), primary_key=True)
+    chunk_id = Column(String(100), ForeignKey("chunk_signatures.chunk_id", ondelete="CASCADE"), primary_key=True)
+
 class Chat(Base):
     __tablename__ = "chats"
 
@@ -0,0 +1,293 @@
+# app/document/dedup.py
+import hashlib
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select
+
+from backend.app.chat.citation_aligner import tokenize
+from backend.app.database.database import SessionLocal
+from backend.app.database.models import ChunkLSHBucket, ChunkSignature
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard share a bucket with high
+# probability; candidates are then checked against the full signature
+BANDS = 16
+SHINGLE_SIZE = 5
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Bucket keys per IN (...) lookup
+_LOOKUP_BATCH = 500
+# Longer scopes (tenant namespaces) are hashed so keys fit ChunkLSHBucket.bucket;
+# category names stay readable and keep their existing buckets
+_MAX_SCOPE_CHARS = 24
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> List[int]:
+    """32-bit hashes of word n-gram shingles.
+
+    Stable across processes (unlike citation_aligner.shingles, which uses
+    hash()), since signatures are stored.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return []
+    if len(tokens) < size:
+        grams = {" ".join(tokens)}
+    else:
+        grams = {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+    return [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") for g in grams]
+
+
+@lru_cache()
+def _permutations(num_perm: int):
+    import numpy as np
+
+    # Fixed seed: signatures must be comparable across processes and releases
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def minhash(text: str, num_perm: int = NUM_PERM) -> Optional[bytes]:
+    """MinHash signature as `num_perm` little-endian uint32s, or None for empty text."""
+    import numpy as np
+
+    hashes = shingle_hashes(text)
+    if not hashes:
+        return None
+    a, b = _permutations(num_perm)
+    values = np.asarray(hashes, dtype=np.uint64)[:, None]
+    # a, b and the shingle hashes are < 2**32, so a * h + b fits in uint64
+    permuted = ((values * a + b) % _PRIME) & _MAX_HASH
+    return permuted.min(axis=0).astype("<u4").tobytes()
+
+
+def similarity(left: bytes, right: bytes) -> float:
+    """Estimated Jaccard similarity: the fraction of equal MinHash values."""
+    import numpy as np
+
+    return float(np.mean(np.frombuffer(left, dtype="<u4") == np.frombuffer(right, dtype="<u4")))
+
+
+def _scope_key(scope: Optional[str]) -> str:
+    scope = scope or ""
+    if len(scope) <= _MAX_SCOPE_CHARS:
+        return scope
+    return hashlib.blake2b(scope.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def band_keys(signature: bytes, category: Optional[str], bands: int = BANDS) -> List[str]:
+    """LSH bucket keys; chunks only match within their category (or narrower scope)."""
+    width = len(signature) // bands
+    prefix = _scope_key(category)
+    return [
+        f"{prefix}:{band}:{hashlib.blake2b(signature[band * width:(band + 1) * width], digest_size=12).hexdigest()}"
+        for band in range(bands)
+    ]
+
+
+@dataclass
+class DedupPlan:
+    document_id: str
+    category: Optional[str]
+    chunk_ids: List[str]
+    signatures: List[Optional[bytes]]
+    # Position -> canonical chunk id, for chunks that reuse an existing vector
+    canonical: Dict[int, str]
+    # Bucket scope when narrower than the category (a tenant's vector namespace)
+    scope: Optional[str] = None
+
+    @property
+    def bucket_scope(self) -> Optional[str]:
+        return self.scope if self.scope is not None else self.category
+
+
+class ChunkDeduplicator:
+    """Near-duplicate chunk detection with MinHash and LSH buckets in the database.
+
+    `plan` runs before embedding and picks, for each chunk, a canonical
+    chunk of the same category, or of the same `scope` when given (in
+    another document, or earlier in this one) with estimated Jaccard
+    similarity >= `threshold`. Once the
+    canonical vectors are upserted, `links` gives the document ids to
+    write onto each shared vector; once those are written, `commit` stores
+    signatures and buckets. Which chunks duplicate a canonical chunk is
+    only kept here (see `duplicate_chunk_ids`), since vector metadata is
+    size-limited.
+    """
+
+    def __init__(self, session_factory=SessionLocal, threshold: float = 0.85, max_duplicates: int = 500,
+                 max_documents: int = 200):
+        self.session_factory = session_factory
+        self.threshold = threshold
+        self.max_duplicates = max_duplicates
+        # A shared vector lists every document using it, in size-limited metadata
+        self.max_documents = max_documents
+
+    def plan(self, document_id: str, category: Optional[str], chunk_ids: List[str], texts: Sequence[str],
+             scope: Optional[str] = None) -> DedupPlan:
+        signatures = [minhash(text) for text in texts]
+        keys = [band_keys(sig, scope if scope is not None else category) if sig else [] for sig in signatures]
+        candidates, link_counts, document_counts = self._load_candidates(document_id, {k for ks in keys for k in ks})
+
+        canonical: Dict[int, str] = {}
+        local: Dict[str, List[int]] = {}
+        linked = set()
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            best_score, best_id = self.threshold, None
+            for key in keys[i]:
+                for chunk_id, other in candidates.get(key, ()):
+                    if link_counts.get(chunk_id, 0) >= self.max_duplicates:
+                        continue
+                    # The owner, the documents already linked and this one
+                    if chunk_id not in linked and document_counts.get(chunk_id, 0) + 2 > self.max_documents:
+                        continue
+                    score = similarity(signature, other)
+                    if score >= best_score:
+                        best_score, best_id = score, chunk_id
+                for j in local.get(key, ()):
+                    score = similarity(signature, signatures[j])
+                    if score >= best_score:
+                        best_score, best_id = score, chunk_ids[j]
+
+            if best_id is not None:
+                canonical[i] = best_id
+                link_counts[best_id] = link_counts.get(best_id, 0) + 1
+                linked.add(best_id)
+            else:
+                for key in keys[i]:
+                    local.setdefault(key, []).append(i)
+
+        return DedupPlan(document_id, category, chunk_ids, signatures, canonical, scope)
+
+    def _load_candidates(self, document_id: str, keys) -> Tuple[Dict[str, List[Tuple[str, bytes]]], Dict[str, int], Dict[str, int]]:
+        """Candidates per bucket, and the duplicate chunks and documents already linked to each."""
+        candidates: Dict[str, List[Tuple[str, bytes]]] = {}
+        keys = list(keys)
+        if not keys:
+            return candidates, {}, {}
+        with self.session_factory() as db:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                rows = db.execute(
+                    select(ChunkLSHBucket.bucket, ChunkSignature.chunk_id, ChunkSignature.signature)
+                    .join(ChunkSignature, ChunkSignature.chunk_id == ChunkLSHBucket.chunk_id)
+                    .where(ChunkLSHBucket.bucket.in_(keys[start:start + _LOOKUP_BATCH]))
+                    .where(ChunkSignature.document_id != document_id)
+                ).all()
+                for bucket, chunk_id, signature in rows:
+                    candidates.setdefault(bucket, []).append((chunk_id, signature))
+
+            ids = list({chunk_id for entries in candidates.values() for chunk_id, _ in entries})
+            link_counts, document_counts = {}, {}
+            for start in range(0, len(ids), _LOOKUP_BATCH):
+                rows = db.execute(
+                    select(ChunkSignature.canonical_id, func.count(), func.count(ChunkSignature.document_id.distinct()))
+                    .where(ChunkSignature.canonical_id.in_(ids[start:start + _LOOKUP_BATCH]))
+                    # Re-indexing replaces this document's links
+                    .where(ChunkSignature.document_id != document_id)
+                    .group_by(ChunkSignature.canonical_id)
+                ).all()
+                for canonical_id, chunks, documents in rows:
+                    link_counts[canonical_id] = chunks
+                    document_counts[canonical_id] = documents
+        return candidates, link_counts, document_counts
+
+    def links(self, plan: DedupPlan) -> Dict[str, Dict[str, List[str]]]:
+        """{canonical_id: {"document_ids"}} for the other documents' vectors the plan shares.
+
+        The owner comes first, then this document and the others already
+        linked, at most `max_documents` in all. Read before `commit`, so
+        nothing is recorded until the vectors carry their links.
+        """
+        own = set(plan.chunk_ids)
+        canonical_ids = sorted({c for c in plan.canonical.values() if c not in own})
+        document_ids: Dict[str, List[str]] = {}
+        with self.session_factory() as db:
+            for start in range(0, len(canonical_ids), _LOOKUP_BATCH):
+                batch = canonical_ids[start:start + _LOOKUP_BATCH]
+                owners = db.execute(
+                    select(ChunkSignature.chunk_id, ChunkSignature.document_id).where(ChunkSignature.chunk_id.in_(batch))
+                ).all()
+                linked = db.execute(
+                    select(ChunkSignature.canonical_id, ChunkSignature.document_id)
+                    .where(ChunkSignature.canonical_id.in_(batch))
+                    .where(ChunkSignature.document_id != plan.document_id)
+                    .distinct()
+                    .order_by(ChunkSignature.canonical_id, ChunkSignature.document_id)
+                ).all()
+                for canonical_id, owner in owners:
+                    document_ids[canonical_id] = list(dict.fromkeys([owner, plan.document_id]))
+                for canonical_id, document_id in linked:
+                    ids = document_ids.get(canonical_id)
+                    if ids is not None and document_id not in ids and len(ids) < self.max_documents:
+                        ids.append(document_id)
+        return {canonical_id: {"document_ids": ids} for canonical_id, ids in document_ids.items()}
+
+    def commit(self, plan: DedupPlan) -> None:
+        """Store the plan's signatures, duplicate links and LSH buckets."""
+        with self.session_factory() as db:
+            # Re-indexing a document replaces its earlier signatures
+            own = select(ChunkSignature.chunk_id).where(ChunkSignature.document_id == plan.document_id)
+            db.execute(delete(ChunkLSHBucket).where(ChunkLSHBucket.chunk_id.in_(own)))
+            db.execute(delete(ChunkSignature).where(ChunkSignature.document_id == plan.document_id))
+
+            for i, (chunk_id, signature) in enumerate(zip(plan.chunk_ids, plan.signatures)):
+                if signature is None:
+                    continue
+                db.add(ChunkSignature(
+                    chunk_id=chunk_id,
+                    document_id=plan.document_id,
+                    category=plan.category,
+                    canonical_id=plan.canonical.get(i),
+                    signature=signature
+                ))
+            db.flush()
+            for i, signature in enumerate(plan.signatures):
+                if signature is not None and i not in plan.canonical:
+                    db.add_all(ChunkLSHBucket(bucket=key, chunk_id=plan.chunk_ids[i]) for key in band_keys(signature, plan.bucket_scope))
+            db.commit()
+
+
+def duplicate_chunk_ids(canonical_ids: List[str], document_ids: Optional[List[str]] = None,
+                        session_factory=SessionLocal) -> Dict[str, List[str]]:
+    """{canonical_id: duplicate chunk ids}, only those in `document_ids` when given."""
+    duplicates: Dict[str, List[str]] = {}
+    with session_factory() as db:
+        for start in range(0, len(canonical_ids), _LOOKUP_BATCH):
+            statement = (
+                select(ChunkSignature.canonical_id, ChunkSignature.chunk_id)
+                .where(ChunkSignature.canonical_id.in_(canonical_ids[start:start + _LOOKUP_BATCH]))
+                .order_by(ChunkSignature.chunk_id)
+            )
+            if document_ids is not None:
+                statement = statement.where(ChunkSignature.document_id.in_(list(document_ids)))
+            for canonical_id, chunk_id in db.execute(statement).all():
+                duplicates.setdefault(canonical_id, []).append(chunk_id)
+    return duplicates
+
+
+def dedup_stats_statement():
+    """Chunks and duplicates per category, as (category, chunks, duplicates) rows."""
+    return (
+        select(ChunkSignature.category, func.count(), func.count(ChunkSignature.canonical_id))
+        .group_by(ChunkSignature.category)
+    )
+
+
+def summarize_dedup_stats(rows) -> Dict[str, Dict]:
+    return {
+        category or "none": {
+            "chunks": chunks,
+            "duplicates": duplicates,
+            "dedup_ratio": round(duplicates / chunks, 4) if chunks else 0.0
+        }
+        for category, chunks, duplicates in rows
+    }
@@ -1,36 +1,188 @@
 # app/document/docling_processor.py
 import os
+import re
 import json
 import logging
 import tempfile
-from typing import List, Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Iterable, List, Dict, Optional, Tuple
 
-from pinecone import Pinecone
 from dotenv import load_dotenv
-from docling.document_converter import DocumentConverter
-from docling.chunking import HybridChunker
-from langchain_community.embeddings import OpenAIEmbeddings
 
-from backend.app.document.s3_manager import S3Manager
-from backend.app.document.tokenizer import OpenAITokenizerWrapper
+from backend.app.config import get_settings
+from backend.app.metrics import count, timed
+from backend.app.document.embedding_batcher import CoalescingEmbeddings
+from backend.app.document.namespaces import category_namespaces, section_namespace, tenant_namespaces, vector_namespace
+from backend.app.document.sections import (
+    build_section_tree,
+    chunk_positions,
+    heading_path,
+    section_id,
+    section_summary,
+    section_tree_key
+)
+from backend.app.document.storage import StorageBackend, get_storage
+from backend.app.document.structure_cache import get_structure_cache, build_shards, read_shards
+
+# Docling, transformers, langchain and pinecone are imported where they are
+# first needed: they take seconds to import, and search/chat never convert.
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+_CHUNK_ID_RE = re.compile(r"^(.+)_chunk_(\d+)$")
+# Context expansion reads far-apart windows separately rather than the whole span
+EXPANSION_MAX_GAP_BYTES = 256 * 1024
+
+def mapping_key(document_id: str) -> str:
+    return f"docling_mappings/{document_id}_mapping.json"
+
+def chunk_index_key(document_id: str) -> str:
+    return f"docling_mappings/{document_id}/chunk_index.json"
+
+def chunk_blob_key(document_id: str) -> str:
+    return f"docling_mappings/{document_id}/chunks.jsonl"
+
+def document_filter(document_ids: List[str]) -> Dict:
+    """Vector filter for chunks of these documents, including canonical
+    chunks from other documents that they share (see document/dedup.py)."""
+    document_ids = list(document_ids)
+    return {"$or": [{"document_id": {"$in": document_ids}}, {"document_ids": {"$in": document_ids}}]}
+
+def document_scopes(document_ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+    """(category, owner id) of each document, from the database."""
+    from sqlalchemy import select
+    from backend.app.database.database import SessionLocal
+    from backend.app.database.models import Document
+
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(Document.id, Document.category, Document.created_by).where(Document.id.in_(list(document_ids)))
+        ).all()
+    return {document_id: (getattr(category, "value", category), owner) for document_id, category, owner in rows}
+
+def duplicate_chunk_ids(canonical_ids: List[str], document_ids: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+    """{canonical_id: ids of its near-duplicate chunks}, from the database (see document/dedup.py)."""
+    from backend.app.document.dedup import duplicate_chunk_ids as lookup
+
+    return lookup(canonical_ids, list(document_ids) if document_ids is not None else None)
+
+def merge_windows(windows: List[Tuple[int, int]]) -> List[List[int]]:
+    """Merge overlapping or adjacent inclusive (start, end) position windows."""
+    merged: List[List[int]] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def aggregate_scores(scores: List[float], aggregate: str = "max", top_n: int = 3) -> float:
+    """Collapse a document's chunk scores (sorted descending) into one score."""
+    if not scores:
+        return 0.0
+    if aggregate == "mean":
+        best = scores[:top_n]
+        return sum(best) / len(best)
+    return scores[0]
+
 class DoclingProcessor:
-    def __init__(self):
-        """Initialize processors and services."""
-        self.s3_manager = S3Manager()
-        self.initialize_pinecone()
-
-        self.converter = DocumentConverter()
-        self.tokenizer = OpenAITokenizerWrapper(model_name="cl100k_base", max_length=8191)
-        self.chunker = HybridChunker(
-            tokenizer=self.tokenizer,
-            max_tokens=8191,
-            merge_peers=True
-        )
-        self.embeddings = OpenAIEmbeddings()
+    def __init__(self, storage: Optional[StorageBackend] = None, embeddings=None, index=None,
+                 chunk_max_tokens: int = 8191, merge_peers: bool = True, dedup=None, scopes=None,
+                 duplicates=None):
+        """Initialize processors and services.
+
+        Storage, embeddings, the vector index, the chunk deduplicator, the
+        document (category, owner) lookup used to route queries to
+        namespaces and the lookup of shared chunks' duplicates default to
+        the configured services; pass stand-ins to
+        run the pipeline offline (benchmarks). The Docling converter and
+        chunker are built on first use.
+        """
+        self.storage = storage or get_storage()
+        self.structure_cache = get_structure_cache()
+        if index is None:
+            self.initialize_pinecone()
+        else:
+            self.index = index
+
+        self.chunk_max_tokens = chunk_max_tokens
+        self.merge_peers = merge_peers
+        self._converter = None
+        self._chunker = None
+        self._lock = threading.Lock()
+
+        if embeddings is None:
+            from langchain_community.embeddings import OpenAIEmbeddings
+            embeddings = OpenAIEmbeddings()
+        self.embeddings = embeddings
+
+        # Concurrent searches share one embedding request (QUERY_EMBEDDING_BATCH_WAIT_MS=0 disables)
+        settings = get_settings()
+        if settings.query_embedding_batch_wait_ms > 0:
+            self.query_embeddings = CoalescingEmbeddings(
+                embeddings,
+                max_wait_ms=settings.query_embedding_batch_wait_ms,
+                max_batch_size=settings.query_embedding_batch_size
+            )
+        else:
+            self.query_embeddings = embeddings
+
+        if dedup is None and settings.dedup_enabled:
+            from backend.app.document.dedup import ChunkDeduplicator
+            dedup = ChunkDeduplicator(
+                threshold=settings.dedup_threshold,
+                max_duplicates=settings.dedup_max_duplicates,
+                max_documents=settings.dedup_max_documents
+            )
+        self.dedup = dedup
+        self.duplicate_chunk_ids = duplicates or duplicate_chunk_ids
+
+        # Sections searched before chunks (0 = flat chunk search)
+        self.section_candidates = settings.section_candidates if settings.hierarchical_retrieval else 0
+
+        # Vectors live in one namespace per category or per owner ("none" = one shared namespace)
+        self.namespace_mode = settings.vector_namespace_mode
+        self.document_scopes = scopes or document_scopes
+
+    @property
+    def converter(self):
+        """Docling converter, imported and built on first use."""
+        if self._converter is None:
+            with self._lock:
+                if self._converter is None:
+                    from docling.document_converter import DocumentConverter
+                    self._converter = DocumentConverter()
+        return self._converter
+
+    @property
+    def chunker(self):
+        """HybridChunker with the OpenAI tokenizer, imported and built on first use."""
+        if self._chunker is None:
+            with self._lock:
+                if self._chunker is None:
+                    from docling.chunking import HybridChunker
+                    from backend.app.document.tokenizer import OpenAITokenizerWrapper
+
+                    self._chunker = HybridChunker(
+                        tokenizer=OpenAITokenizerWrapper(model_name="cl100k_base", max_length=8191),
+                        max_tokens=self.chunk_max_tokens,
+                        merge_peers=self.merge_peers
+                    )
+        return self._chunker
+
+    def warm_up(self) -> None:
+        """Import Docling and load its PDF pipeline models ahead of the first upload."""
+        converter = self.converter
+        self.chunker
+        try:
+            from docling.datamodel.base_models import InputFormat
+            converter.initialize_pipeline(InputFormat.PDF)
+        except (ImportError, AttributeError) as e:
+            # Older Docling releases build the pipeline on first convert
+            logger.debug(f"Docling pipeline preload unavailable: {str(e)}")
 
     def initialize_pinecone(self):
         """Initialize Pinecone client and index."""
@@ -41,6 +193,8 @@ class DoclingProcessor:
             if not api_key or not index_name:
                 raise ValueError("Missing required Pinecone configuration: PINECONE_API_KEY or PINECONE_INDEX_NAME")
 
+            from pinecone import Pinecone
+
             pc = Pinecone(api_key=api_key)
             self.index = pc.Index(index_name)
             logger.info(f"Successfully initialized Pinecone index: {index_name}")
@@ -51,51 +205,86 @@ class DoclingProcessor:
 
     def process_and_index_document(self, document_id: str, s3_key: str, metadata: Dict) -> Dict:
         """Process and index a document."""
+        category = metadata.get("category")
         try:
+            namespace = self.namespace_for(metadata)
             with tempfile.TemporaryDirectory() as tmpdir:
-                local_pdf = os.path.join(tmpdir, "temp.pdf")
-                if not self.s3_manager.download_file(s3_key, local_pdf):
-                    raise FileNotFoundError(f"Could not download from S3: {s3_key}")
+                # Local storage is converted in place; remote objects are downloaded first
+                local_pdf = self.storage.local_path(s3_key)
+                if local_pdf is None:
+                    local_pdf = os.path.join(tmpdir, "temp.pdf")
+                    if not self.storage.download_file(s3_key, local_pdf):
+                        raise FileNotFoundError(f"Could not download from storage: {s3_key}")
 
-                result = self.converter.convert(local_pdf)
+                with timed("docling_convert", category):
+                    result = self.converter.convert(local_pdf)
                 if not result.document:
                     raise ValueError("Docling conversion returned empty document")
 
-                chunks = list(self.chunker.chunk(dl_doc=result.document))
+                with timed("chunking", category):
+                    chunks = list(self.chunker.chunk(dl_doc=result.document))
+                count("chunking", len(chunks), category)
                 if not chunks:
                     raise ValueError("No chunks generated from document")
 
+                chunk_ids = [f"{document_id}_chunk_{i}" for i in range(len(chunks))]
+                chunk_pages = [
+                    sorted({
+                        prov.page_no
+                        for item in chunk.meta.doc_items
+                        for prov in item.prov
+                    }) if chunk.meta.doc_items else None
+                    for chunk in chunks
+                ]
+                sections, chunk_sections = build_section_tree([c.meta.headings for c in chunks], chunk_pages)
+
+                plan = None
+                if self.dedup is not None:
+                    try:
+                        with timed("dedup", category):
+                            # Canonical vectors must sit in the namespace of every document using them
+                            scope = namespace if self.namespace_mode == "tenant" else None
+                            plan = self.dedup.plan(document_id, category, chunk_ids, [c.text for c in chunks], scope)
+                        count("dedup_duplicates", len(plan.canonical), category)
+                    except Exception as e:
+                        logger.error(f"Duplicate detection failed for {document_id}, embedding every chunk: {str(e)}")
+
                 vectors = []
                 for i, chunk in enumerate(chunks):
                     chunk_meta = {
                         "document_id": document_id,
                         "s3_key": s3_key,
                         "title": chunk.meta.headings[0] if chunk.meta.headings else None,
-                        "page_numbers": sorted({
-                            prov.page_no
-                            for item in chunk.meta.doc_items
-                            for prov in item.prov
-                        }) if chunk.meta.doc_items else None,
+                        "page_numbers": chunk_pages[i],
+                        "section_id": section_id(document_id, chunk_sections[i]),
                         "chunk_text": chunk.text,
                         **metadata
                     }
 
-                    emb = self.embeddings.embed_query(chunk.text)
+                    canonical_id = plan.canonical.get(i) if plan else None
+                    if canonical_id:
+                        # Shares the canonical chunk's vector; kept in the structure only
+                        chunk_meta["canonical_id"] = canonical_id
+                        vectors.append({'id': chunk_ids[i], 'metadata': chunk_meta})
+                        continue
+
+                    with timed("embedding", category):
+                        emb = self.embeddings.embed_query(chunk.text)
                     vectors.append({
-                        'id': f"{document_id}_chunk_{i}",
+                        'id': chunk_ids[i],
                         'values': emb,
                         'metadata': chunk_meta
                     })
 
-                # Batch upsert to Pinecone
-                batch_size = 100
-                for i in range(0, len(vectors), batch_size):
-                    batch = vectors[i:i + batch_size]
-                    self.index.upsert(vectors=batch)
+                self.upsert_vectors([v for v in vectors if "values" in v], category, namespace=namespace)
+                if plan is not None:
+                    self.link_duplicates(plan, vectors, category, namespace)
+                self.index_sections(document_id, sections, chunks, metadata)
 
                 # Save document structure
                 structure = {
                     "num_chunks": len(chunks),
+                    "num_sections": len(sections),
                     "metadata": metadata,
                     "chunks": [
                         {
@@ -107,56 +296,498 @@ class DoclingProcessor:
                         for i, v in enumerate(vectors)
                     ]
                 }
-
-                map_key = f"docling_mappings/{document_id}_mapping.json"
-                self.s3_manager.s3_client.put_object(
-                    Bucket=self.s3_manager.bucket_name,
-                    Key=map_key,
-                    Body=json.dumps(structure)
-                )
+                self.save_document_structure(document_id, structure, vectors, sections)
 
                 logger.info(f"Successfully processed and indexed document {document_id} with {len(chunks)} chunks")
-                return {"status": "success", "indexed_chunks": len(chunks)}
+                return {
+                    "status": "success",
+                    "indexed_chunks": len(chunks),
+                    "duplicate_chunks": sum(1 for v in vectors if "values" not in v),
+                    # Extracted text for the full-text index
+                    "text": "\n\n".join(chunk.text for chunk in chunks)
+                }
 
         except Exception as e:
             logger.exception(f"Error processing document {document_id}: {str(e)}")
             return {"status": "error", "error": str(e)}
 
+    def namespace_for(self, metadata: Dict) -> str:
+        """Chunk namespace of a document, from its indexing metadata."""
+        return vector_namespace(self.namespace_mode, metadata.get("category"), metadata.get("owner_id"))
+
+    def query_namespaces(self, document_ids: Optional[Iterable[str]] = None, category: Optional[str] = None) -> List[str]:
+        """Chunk namespaces a search over these documents (None = all) and category has to query."""
+        if self.namespace_mode == "none":
+            return [""]
+        if self.namespace_mode == "category" and category:
+            return [vector_namespace("category", category)]
+        if document_ids is not None:
+            scopes = self.document_scopes(document_ids)
+            return sorted({vector_namespace(self.namespace_mode, c, owner) for c, owner in scopes.values()})
+        if self.namespace_mode == "category":
+            return category_namespaces()
+        return tenant_namespaces(self.index.describe_index_stats()["namespaces"])
+
+    def upsert_vectors(self, vectors: List[Dict], category: Optional[str] = None, batch_size: int = 100,
+                       namespace: str = "") -> None:
+        for i in range(0, len(vectors), batch_size):
+            with timed("pinecone_upsert", category):
+                self.index.upsert(vectors=vectors[i:i + batch_size], namespace=namespace)
+        count("pinecone_upsert", len(vectors), category)
+
+    def index_sections(self, document_id: str, sections: List[Dict], chunks: List, metadata: Dict) -> None:
+        """Embed a summary of each section that has chunks into the section namespace."""
+        category = metadata.get("category")
+        namespace = section_namespace(self.namespace_for(metadata))
+        entries = [(node, entry) for node, entry in enumerate(sections) if entry["chunks"]]
+        if not entries:
+            return
+        summaries = [
+            section_summary(heading_path(sections, node), [chunks[p].text for p in chunk_positions(entry)])
+            for node, entry in entries
+        ]
+        with timed("embedding", category):
+            embeddings = self.embeddings.embed_documents(summaries)
+        count("embedding", len(summaries), category)
+
+        vectors = [
+            {
+                "id": section_id(document_id, node),
+                "values": values,
+                "metadata": {
+                    "document_id": document_id,
+                    "title": " > ".join(heading_path(sections, node)) or None,
+                    "page_numbers": entry["pages"] or [],
+                    "chunk_count": len(chunk_positions(entry)),
+                    **metadata
+                }
+            }
+            for (node, entry), values in zip(entries, embeddings)
+        ]
+        for i in range(0, len(vectors), 100):
+            with timed("pinecone_upsert", category):
+                self.index.upsert(vectors=vectors[i:i + 100], namespace=namespace)
+        count("pinecone_upsert", len(vectors), category)
+
+    def link_duplicates(self, plan, vectors: List[Dict], category: Optional[str] = None, namespace: str = "") -> None:
+        """Write document links onto the canonical vectors, then record the dedup plan.
+
+        If either fails, the duplicates are embedded after all so none of the
+        document's chunks is left without a vector, and the plan is recorded
+        without them so they are not counted as duplicates.
+        """
+        try:
+            for canonical_id, link in self.dedup.links(plan).items():
+                with timed("pinecone_update", category):
+                    self.index.update(id=canonical_id, set_metadata=link, namespace=namespace)
+            self.dedup.commit(plan)
+            return
+        except Exception as e:
+            logger.error(f"Could not link duplicates of {plan.document_id}, embedding them instead: {str(e)}")
+
+        missing = [v for v in vectors if "values" not in v]
+        for v in missing:
+            v["metadata"].pop("canonical_id", None)
+            with timed("embedding", category):
+                v["values"] = self.embeddings.embed_query(v["metadata"]["chunk_text"])
+        self.upsert_vectors(missing, category, namespace=namespace)
+        try:
+            self.dedup.commit(replace(plan, canonical={}))
+        except Exception as e:
+            logger.error(f"Could not record chunk signatures of {plan.document_id}: {str(e)}")
+
+    def _expand_duplicates(self, results: List[Dict], document_ids: Optional[Iterable[str]]) -> List[Dict]:
+        """Attribute shared (canonical) chunks to every document in scope that contains them.
+
+        A canonical match is kept if its owner is in scope (None = every
+        document) and is repeated, with the same score, for each in-scope
+        document that holds a near-duplicate of it. The duplicates are
+        looked up in the dedup tables and their own text and pages read
+        from their documents' chunk shards.
+        """
+        scope = set(document_ids) if document_ids is not None else None
+        expanded = []
+        shared = []
+        for result in results:
+            metadata = result.get("metadata") or {}
+            owner = metadata.get("document_id")
+            if scope is None or owner in scope:
+                expanded.append(result)
+            others = set(metadata.get("document_ids") or []) - {owner}
+            if others and (scope is None or others & scope):
+                shared.append(result)
+        if not shared:
+            return expanded
+
+        duplicates = self.duplicate_chunk_ids([r["id"] for r in shared], scope)
+        wanted: Dict[str, Dict[int, Dict]] = {}
+        for result in shared:
+            owner = result["metadata"].get("document_id")
+            for chunk_id in duplicates.get(result["id"], []):
+                duplicate_document, _, position = chunk_id.rpartition("_chunk_")
+                if duplicate_document == owner or not position.isdigit():
+                    continue
+                if scope is None or duplicate_document in scope:
+                    wanted.setdefault(duplicate_document, {}).setdefault(int(position), result)
+        if not wanted:
+            return expanded
+
+        with ThreadPoolExecutor(max_workers=min(len(wanted), 8)) as pool:
+            records = dict(zip(wanted, pool.map(lambda d: self.get_chunks(d, list(wanted[d])), wanted)))
+        for duplicate_document, positions in wanted.items():
+            for position, result in positions.items():
+                record = records[duplicate_document].get(position)
+                if record is None:
+                    continue
+                expanded.append({
+                    "id": record["chunk_id"],
+                    "score": result["score"],
+                    "metadata": {
+                        "document_id": duplicate_document,
+                        "category": result["metadata"].get("category"),
+                        "title": record.get("title"),
+                        "page_numbers": record.get("pages"),
+                        "chunk_text": record.get("text"),
+                        "canonical_id": result["id"]
+                    }
+                })
+        expanded.sort(key=lambda r: r["score"], reverse=True)
+        return expanded
+
     def search_document(self, query: str, document_id: Optional[str] = None, top_k: int = 3) -> List[Dict]:
-        """Search for relevant document chunks."""
+        """Search for relevant document chunks.
+
+        Within a document, with hierarchical retrieval on, the best
+        `section_candidates` sections are found first and chunks are searched
+        only within them. Documents indexed without sections, and searches
+        across the whole library, use a flat chunk search.
+        """
         try:
-            embedding = self.embeddings.embed_query(query)
-            filter_dict = {"document_id": document_id} if document_id else {}
+            namespaces = self.query_namespaces([document_id] if document_id else None)
+            if not namespaces:
+                return []
+            with timed("embedding"):
+                embedding = self.query_embeddings.embed_query(query)
+            if not document_id:
+                return self._search_namespaces(embedding, {}, top_k, namespaces)
 
+            filter_dict = document_filter([document_id])
+            if self.section_candidates:
+                sections = self._search_namespaces(
+                    embedding, {"document_id": document_id}, self.section_candidates,
+                    [section_namespace(n) for n in namespaces]
+                )
+                if sections:
+                    # Shared (deduplicated) chunks carry their owner's section, so keep them too
+                    filter_dict = {"$or": [
+                        {"section_id": {"$in": [s["id"] for s in sections]}},
+                        {"document_ids": {"$in": [document_id]}}
+                    ]}
+
+            results = self._search_namespaces(embedding, filter_dict, top_k, namespaces)
+            return self._expand_duplicates(results, [document_id])[:top_k]
+
+        except Exception as e:
+            logger.error(f"Error searching documents: {str(e)}")
+            return []
+
+    def search_batch(
+        self,
+        queries: List[str],
+        document_ids: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        top_k: int = 5
+    ) -> List[List[Dict]]:
+        """Search several queries at once, scoped to documents and/or a category.
+
+        All queries are embedded in one request; the index queries then run
+        concurrently. Returns one result list per query, in order.
+        """
+        if not queries or (document_ids is not None and not document_ids):
+            return [[] for _ in queries]
+        namespaces = self.query_namespaces(document_ids, category)
+        if not namespaces:
+            return [[] for _ in queries]
+
+        filter_dict = document_filter(document_ids) if document_ids is not None else {}
+        if category:
+            filter_dict["category"] = category
+
+        def search(embedding: List[float]) -> List[Dict]:
+            results = self._search_namespaces(embedding, filter_dict, top_k, namespaces)
+            if document_ids is None:
+                return results
+            return self._expand_duplicates(results, document_ids)[:top_k]
+
+        with timed("embedding", category):
+            embeddings = self.embeddings.embed_documents(queries)
+        count("embedding", len(queries), category)
+        if len(embeddings) == 1:
+            return [search(embeddings[0])]
+        with ThreadPoolExecutor(max_workers=min(len(embeddings), 8)) as pool:
+            return list(pool.map(search, embeddings))
+
+    def _search_namespaces(self, embedding: List[float], filter_dict: Dict, top_k: int, namespaces: List[str]) -> List[Dict]:
+        """Query each namespace concurrently and merge the matches best-first."""
+        if len(namespaces) == 1:
+            return self._query_index(embedding, filter_dict, top_k, namespaces[0])
+        with ThreadPoolExecutor(max_workers=min(len(namespaces), 8)) as pool:
+            per_namespace = list(pool.map(lambda n: self._query_index(embedding, filter_dict, top_k, n), namespaces))
+        results = [r for matches in per_namespace for r in matches]
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results[:top_k]
+
+    def _query_index(self, embedding: List[float], filter_dict: Dict, top_k: int, namespace: str = "") -> List[Dict]:
+        with timed("pinecone_query", filter_dict.get("category")):
             results = self.index.query(
                 vector=embedding,
                 filter=filter_dict,
                 top_k=top_k,
-                include_metadata=True
+                include_metadata=True,
+                namespace=namespace
             )
 
-            return [
-                {
-                    "score": match.score,
-                    "metadata": match.metadata
-                }
-                for match in results.matches
-            ] if hasattr(results, 'matches') else []
+        return [
+            {
+                "id": match.id,
+                "score": match.score,
+                "metadata": match.metadata
+            }
+            for match in results.matches
+        ] if hasattr(results, 'matches') else []
 
+    def rank_documents(
+        self,
+        query: str,
+        document_ids: Optional[List[str]] = None,
+        category: Optional[str] = None,
+        top_k: int = 100,
+        aggregate: str = "max",
+        top_n: int = 3
+    ) -> List[Dict]:
+        """Rank documents by the relevance of their chunks to `query`.
+
+        Runs a single vector query over every chunk the caller may see
+        (`document_ids`, or all documents when None) and groups the matches
+        by document. A document's score is its best chunk score, or with
+        aggregate="mean" the mean of its `top_n` best chunk scores. Shared
+        (deduplicated) chunks count for every document that contains them.
+        """
+        if document_ids is not None and not document_ids:
+            return []
+        try:
+            namespaces = self.query_namespaces(document_ids, category)
+            if not namespaces:
+                return []
+            with timed("embedding", category):
+                embedding = self.query_embeddings.embed_query(query)
+            filter_dict = document_filter(document_ids) if document_ids is not None else {}
+            if category:
+                filter_dict["category"] = category
+
+            results = self._expand_duplicates(
+                self._search_namespaces(embedding, filter_dict, top_k, namespaces), document_ids
+            )
         except Exception as e:
-            logger.error(f"Error searching documents: {str(e)}")
+            logger.error(f"Error ranking documents: {str(e)}")
             return []
 
+        grouped: Dict[str, List[Dict]] = {}
+        for result in results:
+            metadata = result["metadata"] or {}
+            if metadata.get("document_id"):
+                grouped.setdefault(metadata["document_id"], []).append(result)
+
+        ranked = []
+        for document_id, matches in grouped.items():
+            # Results are sorted best-first, so each group is too
+            best = matches[:top_n]
+            pages = sorted({p for m in best for p in (m["metadata"].get("page_numbers") or [])})
+            ranked.append({
+                "document_id": document_id,
+                "score": aggregate_scores([m["score"] for m in matches], aggregate, top_n),
+                "page_numbers": pages,
+                "matches": [
+                    {
+                        "chunk_id": m["id"],
+                        "score": m["score"],
+                        "section": m["metadata"].get("title"),
+                        "page_numbers": m["metadata"].get("page_numbers") or [],
+                        "snippet": (m["metadata"].get("chunk_text") or "")[:300]
+                    }
+                    for m in best
+                ]
+            })
+
+        ranked.sort(key=lambda r: r["score"], reverse=True)
+        return ranked
+
+    def save_document_structure(self, document_id: str, structure: Dict, vectors: List[Dict],
+                                sections: Optional[List[Dict]] = None) -> None:
+        """Write the full mapping plus a per-chunk sharded layout.
+
+        `chunks.jsonl` holds one full chunk record per line and
+        `chunk_index.json` its byte offsets, so a single chunk (or a run of
+        neighbouring chunks) can be read with one ranged GET. `sections.json`
+        is the heading tree, with chunk position ranges per section.
+        """
+        blob, offsets = build_shards([
+            {
+                "chunk_id": v["id"],
+                "title": v["metadata"].get("title"),
+                "pages": v["metadata"].get("page_numbers"),
+                "text": v["metadata"]["chunk_text"],
+                **({"canonical_id": v["metadata"]["canonical_id"]} if v["metadata"].get("canonical_id") else {})
+            }
+            for v in vectors
+        ])
+        chunk_index = {
+            "chunk_ids": [v["id"] for v in vectors],
+            "offsets": offsets
+        }
+
+        # Shards go first so the mapping never points at a missing layout
+        writes = [
+            (chunk_blob_key(document_id), blob, "application/x-ndjson"),
+            (chunk_index_key(document_id), json.dumps(chunk_index).encode("utf-8"), "application/json"),
+            *([(
+                section_tree_key(document_id),
+                json.dumps({"sections": sections}, separators=(",", ":")).encode("utf-8"),
+                "application/json"
+            )] if sections is not None else []),
+            (mapping_key(document_id), json.dumps(structure).encode("utf-8"), "application/json"),
+        ]
+        for key, body, content_type in writes:
+            if not self.storage.put_object(key, body, content_type):
+                raise IOError(f"Could not write document structure to storage: {key}")
+
+        for key in (chunk_index_key(document_id), section_tree_key(document_id), mapping_key(document_id)):
+            self.structure_cache.invalidate(key)
+
     def get_document_structure(self, document_id: str) -> Optional[Dict]:
-        """Get document structure from S3."""
+        """Get document structure from storage, served from the structure cache."""
         try:
-            map_key = f"docling_mappings/{document_id}_mapping.json"
-            obj = self.s3_manager.s3_client.get_object(
-                Bucket=self.s3_manager.bucket_name,
-                Key=map_key
-            )
-            return json.loads(obj["Body"].read())
+            return self.structure_cache.get_json(self.storage, mapping_key(document_id))
 
         except Exception as e:
             logger.error(f"Could not retrieve structure for document {document_id}: {str(e)}")
             return None
+
+    def get_section_tree(self, document_id: str) -> Optional[List[Dict]]:
+        """Heading tree of a document (see sections.build_section_tree), or None if not indexed with sections."""
+        try:
+            tree = self.structure_cache.get_json(self.storage, section_tree_key(document_id))
+            return tree["sections"] if tree else None
+
+        except Exception as e:
+            logger.error(f"Could not retrieve section tree for document {document_id}: {str(e)}")
+            return None
+
+    def get_chunks(self, document_id: str, positions: List[int], max_gap_bytes: Optional[int] = None) -> Dict[int, Dict]:
+        """Read full chunk records by position with a single ranged GET (see read_shards for max_gap_bytes)."""
+        try:
+            chunk_index = self.structure_cache.get_json(self.storage, chunk_index_key(document_id))
+            if not chunk_index:
+                return {}
+            return read_shards(
+                self.storage, chunk_blob_key(document_id), chunk_index["offsets"], positions, max_gap_bytes
+            )
+
+        except Exception as e:
+            logger.error(f"Could not read chunks {positions} of document {document_id}: {str(e)}")
+            return {}
+
+    def get_chunk(self, document_id: str, position: int) -> Optional[Dict]:
+        """Read one full chunk record without downloading the whole mapping."""
+        return self.get_chunks(document_id, [position]).get(position)
+
+    def _hit_window(self, document_id: str, position: int, metadata: Dict, window: int, mode: str,
+                    max_section_chunks: int, trees: Dict[str, Optional[List[Dict]]]) -> Tuple[int, int]:
+        if mode == "section" and metadata.get("section_id", "").startswith(f"{document_id}_section_"):
+            if document_id not in trees:
+                trees[document_id] = self.get_section_tree(document_id)
+            tree = trees[document_id]
+            node = int(metadata["section_id"].rsplit("_", 1)[1])
+            if tree and node < len(tree):
+                for first, last in tree[node]["chunks"]:
+                    if first <= position <= last:
+                        # Long sections are clipped around the hit
+                        return max(first, position - max_section_chunks), min(last, position + max_section_chunks)
+        return max(0, position - window), position + window
+
+    def expand_context(self, results: List[Dict], window: int = 1, mode: str = "neighbours",
+                       max_section_chunks: int = 8) -> List[Dict]:
+        """Expand retrieved chunks into passages with their surrounding context.
+
+        mode="neighbours" adds the `window` chunks either side of each hit;
+        mode="section" adds the rest of the hit's section, up to
+        `max_section_chunks` either side (falling back to `window` for
+        documents without a section tree). Overlapping or adjacent windows in a document
+        merge into one passage, and each document's windows are read in one
+        bulk read of its chunk shards, with no extra vector queries.
+
+        A passage keeps its best hit's id, score and title, the union of its
+        pages, and lists its `chunk_ids` and `hit_ids`. Results that are not
+        document chunks pass through unchanged.
+        """
+        hits: Dict[str, List[Tuple[int, Dict]]] = {}
+        passages = []
+        for result in results:
+            metadata = result.get("metadata") or {}
+            match = _CHUNK_ID_RE.match(result["id"])
+            if not match or match.group(1) != metadata.get("document_id"):
+                passages.append(result)
+                continue
+            hits.setdefault(match.group(1), []).append((int(match.group(2)), result))
+
+        trees: Dict[str, Optional[List[Dict]]] = {}
+        for document_id, document_hits in hits.items():
+            windows = [
+                self._hit_window(document_id, position, hit["metadata"], window, mode, max_section_chunks, trees)
+                for position, hit in document_hits
+            ]
+            merged = merge_windows(windows)
+            records = self.get_chunks(
+                document_id,
+                [p for first, last in merged for p in range(first, last + 1)],
+                max_gap_bytes=EXPANSION_MAX_GAP_BYTES
+            )
+
+            for first, last in merged:
+                inside = [hit for position, hit in document_hits if first <= position <= last]
+                best = max(inside, key=lambda hit: hit["score"])
+                chunk_records = [records[p] for p in range(first, last + 1) if p in records]
+                if not chunk_records:
+                    # Structure unavailable: keep the hits as retrieved
+                    passages.extend(inside)
+                    continue
+                passages.append({
+                    "id": best["id"],
+                    "score": best["score"],
+                    "metadata": {
+                        **best["metadata"],
+                        "page_numbers": sorted({p for r in chunk_records for p in (r.get("pages") or [])}),
+                        "chunk_text": "\n\n".join(r["text"] for r in chunk_records),
+                        "chunk_ids": [r["chunk_id"] for r in chunk_records],
+                        "hit_ids": [hit["id"] for hit in inside]
+                    }
+                })
+
+        passages.sort(key=lambda r: r["score"], reverse=True)
+        return passages
+
+
+_processor: Optional[DoclingProcessor] = None
+_processor_lock = threading.Lock()
+
+def get_docling_processor() -> DoclingProcessor:
+    """Process-wide processor, so the Pinecone client and models load once.
+
+    Locked so a request racing the startup warm-up doesn't build a second one.
+    """
+    global _processor
+    if _processor is None:
+        with _processor_lock:
+            if _processor is None:
+                _processor = DoclingProcessor()
+    return _processor
@@ -1,31 +1,40 @@
 import uuid
 import os
+import hashlib
+import logging
 from datetime import datetime
 from typing import List, Optional
-import boto3
 from fastapi import UploadFile, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from backend.app.database.models import Document as DBDocument, User, DocumentStatus, DocumentCategory
 from backend.app.schemas import Document, DocumentCreate
 from backend.app.config import get_settings
-from backend.app.document.s3_manager import S3Manager
-from backend.app.document.docling_processor import DoclingProcessor
+from backend.app.document.storage import StorageBackend, get_storage
+from backend.app.document.docling_processor import DoclingProcessor, get_docling_processor
+from backend.app.document.url_cache import get_url_cache
+from backend.app.document.thumbnails import ThumbnailGenerator, get_thumbnail_generator
+from backend.app.document import search_index
+from backend.app.profiling import profiled
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 class DocumentManager:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, storage: Optional[StorageBackend] = None,
+                 processor: Optional[DoclingProcessor] = None,
+                 thumbnails: Optional[ThumbnailGenerator] = None):
         self.db = db
-        self.s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region
-        )
-        self.bucket_name = settings.aws_bucket_name
-        self.docling_processor = DoclingProcessor()
+        self.storage = storage or get_storage()
+        self._docling_processor = processor
+        self._thumbnails = thumbnails
+
+    @property
+    def docling_processor(self) -> DoclingProcessor:
+        # Only uploads need Docling; don't build it for list/delete requests
+        return self._docling_processor or get_docling_processor()
 
     def _to_schema(self, db_document: DBDocument) -> Document:
         return Document(
@@ -38,29 +47,33 @@ class DocumentManager:
             created_by=db_document.created_by,
             file_type=db_document.file_type,
             file_size=db_document.file_size,
-            category=db_document.category
+            category=db_document.category,
+            thumbnail_s3_key=db_document.thumbnail_s3_key,
+            thumbnail_generated=bool(db_document.thumbnail_generated),
+            preview_s3_key=db_document.preview_s3_key,
+            page_count=db_document.page_count
         )
 
-    def upload_document(self, file: UploadFile, user: User, category: str = "General") -> Document:
+    async def upload_document(self, file: UploadFile, user: User, category: str = "General") -> Document:
         """
         1) Generate doc_id
         2) Upload file to S3
         3) Create Document in DB (status=UPLOADING)
         4) Trigger docling processing + embedding (async or sync)
+        Blocking storage and processing work runs in the threadpool.
         """
         document_id = str(uuid.uuid4())
         s3_key = f"documents/{user.id}/{document_id}/{file.filename}"
 
         try:
-            file_bytes = file.file.read()
+            file_bytes = await file.read()
             file_size = len(file_bytes)
+            # Keys the thumbnails, so identical uploads share them
+            content_sha256 = await run_in_threadpool(lambda: hashlib.sha256(file_bytes).hexdigest())
 
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_bytes
-            )
+            # Upload to storage
+            if not await run_in_threadpool(self.storage.put_object, s3_key, file_bytes, file.content_type):
+                raise IOError(f"Could not write {s3_key} to storage")
 
             # Create DB record
             db_document = DBDocument(
@@ -71,55 +84,76 @@ class DocumentManager:
                 created_by=user.id,
                 file_type=file.content_type or "application/octet-stream",
                 file_size=file_size,
+                content_sha256=content_sha256,
                 category=category
             )
             self.db.add(db_document)
-            self.db.commit()
-            self.db.refresh(db_document)
+            await self.db.commit()
+            await self.db.refresh(db_document)
 
             # [Optional] Immediately run docling + pinecone indexing
             # You could also run this in a background task (Celery, RQ, etc.)
             db_document.status = DocumentStatus.PROCESSING
-            self.db.commit()
+            await self.db.commit()
             meta_dict = {
                 "uploaded_by": user.username,
+                "owner_id": user.id,
                 "category": category,
             }
-            process_result = self.docling_processor.process_and_index_document(
+            process_result = await run_in_threadpool(
+                profiled(self.docling_processor.process_and_index_document, "process_and_index_document"),
                 document_id=document_id,
                 s3_key=s3_key,
                 metadata=meta_dict
             )
             if process_result["status"] == "success":
                 db_document.status = DocumentStatus.COMPLETED
+                await run_in_threadpool(self._generate_thumbnail, db_document)
+                await search_index.index_document(self.db, db_document, process_result.get("text"))
             else:
                 db_document.status = DocumentStatus.FAILED
                 db_document.error_message = process_result.get("error", "")
             db_document.updated_at = datetime.utcnow()
-            self.db.commit()
+            await self.db.commit()
 
             return self._to_schema(db_document)
 
         except Exception as e:
             # Cleanup if something fails
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            await run_in_threadpool(self.storage.delete_file, s3_key)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=str(e)
             )
 
-    def list_documents(self, user: User, include_deleted=False) -> List[Document]:
-        query = self.db.query(DBDocument)
+    def _generate_thumbnail(self, db_document: DBDocument) -> None:
+        """Render the first-page thumbnail/preview; failures never fail the upload."""
+        try:
+            images = (self._thumbnails or get_thumbnail_generator()).generate_batch(
+                [{"id": db_document.id, "s3_key": db_document.s3_key, "content_sha256": db_document.content_sha256}]
+            ).get(db_document.id)
+        except Exception as e:
+            logger.error(f"Thumbnail generation failed for {db_document.id}: {str(e)}")
+            images = None
+        if images:
+            db_document.thumbnail_s3_key = images["thumbnail_s3_key"]
+            db_document.preview_s3_key = images["preview_s3_key"]
+            db_document.thumbnail_generated = True
+            if images["page_count"]:
+                db_document.page_count = images["page_count"]
+
+    async def list_documents(self, user: User, include_deleted=False) -> List[Document]:
+        query = select(DBDocument)
         if not include_deleted:
-            query = query.filter(DBDocument.status != DocumentStatus.DELETED)
+            query = query.where(DBDocument.status != DocumentStatus.DELETED)
         # Non-admin sees only their docs
         if not user.is_admin:
-            query = query.filter(DBDocument.created_by == user.id)
-        docs = query.all()
+            query = query.where(DBDocument.created_by == user.id)
+        docs = (await self.db.execute(query)).scalars().all()
         return [self._to_schema(d) for d in docs]
 
-    def delete_document(self, document_id: str, user: User) -> Optional[Document]:
-        db_document = self.db.query(DBDocument).filter(DBDocument.id == document_id).first()
+    async def delete_document(self, document_id: str, user: User) -> Optional[Document]:
+        db_document = await self.db.get(DBDocument, document_id)
         if not db_document:
             return None
         # check ownership or admin
@@ -128,12 +162,13 @@ class DocumentManager:
 
         db_document.status = DocumentStatus.DELETED
         db_document.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(db_document)
+        await self.db.commit()
+        await self.db.refresh(db_document)
+        get_url_cache().invalidate_document(document_id)
         return self._to_schema(db_document)
 
-    def get_document_status(self, document_id: str, user: User) -> Optional[Document]:
-        db_document = self.db.query(DBDocument).filter(DBDocument.id == document_id).first()
+    async def get_document_status(self, document_id: str, user: User) -> Optional[Document]:
+        db_document = await self.db.get(DBDocument, document_id)
         if not db_document:
             return None
         # ownership check
@@ -0,0 +1,87 @@
+# app/document/embedding_batcher.py
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from backend.app.metrics import count
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    def __init__(self):
+        self.futures: Dict[str, Future] = {}
+        self.full = threading.Event()
+
+
+class CoalescingEmbeddings:
+    """Coalesces concurrent embed_query calls into one embed_documents request.
+
+    The first caller in a window becomes the batch leader: it waits up to
+    `max_wait_ms` (less if `max_batch_size` distinct queries arrive), sends
+    the batch and fans the vectors back out. Callers that arrive while a
+    batch is open join it; a query already open or in flight is not
+    embedded twice. Added latency is at most `max_wait_ms` per request.
+
+    embed_documents and other attributes pass straight through.
+    """
+
+    def __init__(self, embeddings, max_wait_ms: float = 5.0, max_batch_size: int = 64):
+        self.embeddings = embeddings
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        self._batch: Optional[_Batch] = None
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            future = self._in_flight.get(text)
+            if future is not None:
+                count("embedding_deduplicated", 1)
+                leader = None
+            else:
+                leader = self._batch is None
+                if leader:
+                    self._batch = _Batch()
+                batch = self._batch
+                future = Future()
+                batch.futures[text] = future
+                self._in_flight[text] = future
+                if len(batch.futures) >= self.max_batch_size:
+                    batch.full.set()
+                    self._batch = None
+
+        if leader:
+            batch.full.wait(self.max_wait_ms / 1000)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            self._flush(batch)
+        return future.result()
+
+    def _flush(self, batch: _Batch) -> None:
+        texts = list(batch.futures)
+        try:
+            vectors = self.embeddings.embed_documents(texts)
+            count("embedding_batch", 1)
+            count("embedding", len(texts))
+            for text, vector in zip(texts, vectors):
+                batch.futures[text].set_result(vector)
+        except Exception as e:
+            logger.error(f"Batched query embedding failed for {len(texts)} queries: {str(e)}")
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                for text in texts:
+                    if self._in_flight.get(text) is batch.futures[text]:
+                        del self._in_flight[text]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def __getattr__(self, name):
+        return getattr(self.embeddings, name)
@@ -0,0 +1,51 @@
+# app/document/namespaces.py
+import re
+from typing import Iterable, List, Optional
+
+from backend.app.document.sections import SECTION_NAMESPACE
+
+# "none": one shared namespace; "category": one per DocumentCategory;
+# "tenant": one per document owner
+NAMESPACE_MODES = ("none", "category", "tenant")
+CATEGORY_PREFIX = "category-"
+TENANT_PREFIX = "tenant-"
+SECTION_SUFFIX = "-sections"
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+
+
+def vector_namespace(mode: str, category=None, owner_id: Optional[str] = None) -> str:
+    """Namespace holding a document's chunk vectors under `mode`."""
+    if mode == "none":
+        return ""
+    if mode == "category":
+        # Documents are filed as General when no category is given
+        category = getattr(category, "value", category) or "General"
+        return CATEGORY_PREFIX + _slug(category)
+    if mode == "tenant":
+        if not owner_id:
+            raise ValueError("Tenant namespaces need the document owner")
+        return TENANT_PREFIX + owner_id
+    raise ValueError(f"Unknown VECTOR_NAMESPACE_MODE: {mode}")
+
+
+def section_namespace(namespace: str) -> str:
+    """Namespace of the section summary vectors that go with a chunk namespace."""
+    return namespace + SECTION_SUFFIX if namespace else SECTION_NAMESPACE
+
+
+def category_namespaces() -> List[str]:
+    # Imported here: the models module sets up the database engine
+    from backend.app.database.models import DocumentCategory
+
+    return [vector_namespace("category", category) for category in DocumentCategory]
+
+
+def tenant_namespaces(existing: Iterable[str]) -> List[str]:
+    """Chunk namespaces of every tenant among the index's namespaces."""
+    return sorted(
+        name for name in existing
+        if name.startswith(TENANT_PREFIX) and not name.endswith(SECTION_SUFFIX)
+    )
@@ -0,0 +1,74 @@
+# app/document/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, and_, or_
+
+from backend.app.database.models import Document as DBDocument, DocumentCategory
+
+SORT_COLUMNS = {
+    "created_at": DBDocument.created_at,
+    "filename": DBDocument.filename,
+    "category": DBDocument.category,
+}
+
+
+def encode_cursor(sort_by: str, row: DBDocument) -> str:
+    """Opaque cursor holding the sort key and id of the last row on a page."""
+    value = getattr(row, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, DocumentCategory):
+        value = value.value
+    raw = json.dumps([sort_by, value, row.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, str]:
+    try:
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_sort != sort_by:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match sort order")
+    if sort_by == "created_at" and value is not None:
+        value = datetime.fromisoformat(value)
+    elif sort_by == "category" and value is not None:
+        value = DocumentCategory(value)
+    return value, last_id
+
+
+def apply_keyset(query: Select, sort_by: str, order: str, cursor: Optional[str], limit: int) -> Select:
+    """Order by (sort column, id) and continue after `cursor`.
+
+    Seeking on the sort key instead of using OFFSET keeps every page a
+    single index range read, however deep the client pages. One extra row
+    is fetched so the caller can tell whether another page exists.
+    """
+    column = SORT_COLUMNS[sort_by]
+    descending = order == "desc"
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by)
+        if descending:
+            query = query.where(or_(column < value, and_(column == value, DBDocument.id < last_id)))
+        else:
+            query = query.where(or_(column > value, and_(column == value, DBDocument.id > last_id)))
+
+    if descending:
+        query = query.order_by(column.desc(), DBDocument.id.desc())
+    else:
+        query = query.order_by(column.asc(), DBDocument.id.asc())
+    return query.limit(limit + 1)
+
+
+def split_page(rows: Sequence[DBDocument], sort_by: str, limit: int) -> Tuple[List[DBDocument], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page."""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort_by, rows[-1])
@@ -7,7 +7,8 @@ import os
 from typing import List, Dict, Optional
 import json
 import logging
-from backend.app.document.s3_manager import S3Manager
+from backend.app.document.storage import get_storage
+from backend.app.document.structure_cache import get_structure_cache, build_shards, read_shards
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +25,8 @@ class DocumentProcessor:
 
         self.index = pinecone.Index(self.index_name)
         self.embeddings = OpenAIEmbeddings()
-        self.s3_manager = S3Manager()
+        self.storage = get_storage()
+        self.structure_cache = get_structure_cache()
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
@@ -80,11 +82,18 @@ class DocumentProcessor:
         }
 
         mapping_key = f"{document_id}_mapping.json"
-        self.s3_manager.s3_client.put_object(
-            Bucket=self.s3_manager.bucket_name,
-            Key=mapping_key,
-            Body=json.dumps(page_mapping)
+        self.storage.put_object(mapping_key, json.dumps(page_mapping).encode("utf-8"), "application/json")
+
+        # Per-page shards so get_page_content can fetch one page with a ranged GET
+        blob, offsets = build_shards(pages)
+        self.storage.put_object(f"{document_id}_pages.jsonl", blob, "application/x-ndjson")
+        self.storage.put_object(
+            f"{document_id}_page_index.json",
+            json.dumps({"total_pages": len(doc), "offsets": offsets}).encode("utf-8"),
+            "application/json"
         )
+        for key in (mapping_key, f"{document_id}_page_index.json"):
+            self.structure_cache.invalidate(key)
 
         return {
             "status": "success",
@@ -112,14 +121,21 @@ class DocumentProcessor:
         } for match in results.matches]
 
     def get_page_content(self, document_id: str, page_num: int) -> Optional[str]:
-        """Get the content of a specific page from S3."""
+        """Get the content of a specific page from storage."""
         mapping_key = f"{document_id}_mapping.json"
         try:
-            response = self.s3_manager.s3_client.get_object(
-                Bucket=self.s3_manager.bucket_name,
-                Key=mapping_key
-            )
-            mapping = json.loads(response['Body'].read())
+            # Sharded layout: read only the requested page
+            page_index = self.structure_cache.get_json(self.storage, f"{document_id}_page_index.json")
+            if page_index:
+                position = page_num - 1
+                records = read_shards(self.storage, f"{document_id}_pages.jsonl", page_index["offsets"], [position])
+                page = records.get(position)
+                return page["text"] if page else None
+
+            # Documents indexed before sharding only have the full mapping
+            mapping = self.structure_cache.get_json(self.storage, mapping_key)
+            if not mapping:
+                return None
 
             for page in mapping["pages"]:
                 if page["page_num"] == page_num:
@@ -1,9 +1,13 @@
 import os
+from typing import Dict, Iterator, Optional, Tuple
 import boto3
 from botocore.exceptions import ClientError
 from botocore.config import Config
 
-class S3Manager:
+from backend.app.metrics import count, timed
+from backend.app.document.storage import StorageBackend
+
+class S3Manager(StorageBackend):
     def __init__(self):
         self.bucket_name = os.getenv("AWS_BUCKET_NAME")
         if not self.bucket_name:
@@ -26,7 +30,8 @@ class S3Manager:
 
     def upload_file(self, local_path: str, s3_key: str) -> bool:
         try:
-            self.s3_client.upload_file(local_path, self.bucket_name, s3_key)
+            with timed("s3_put"):
+                self.s3_client.upload_file(local_path, self.bucket_name, s3_key)
             return True
         except ClientError as e:
             return False
@@ -36,7 +41,8 @@ class S3Manager:
         Download from S3. Returns True if success, False if error.
         """
         try:
-            self.s3_client.download_file(self.bucket_name, s3_key, local_path)
+            with timed("s3_get"):
+                self.s3_client.download_file(self.bucket_name, s3_key, local_path)
             return True
         except ClientError:
             return False
@@ -61,3 +67,87 @@ class S3Manager:
             )
         except ClientError:
             return ""
+
+    def put_object(self, s3_key: str, body: bytes, content_type: Optional[str] = None) -> bool:
+        """Write an in-memory payload to S3."""
+        try:
+            extra = {"ContentType": content_type} if content_type else {}
+            with timed("s3_put"):
+                self.s3_client.put_object(Bucket=self.bucket_name, Key=s3_key, Body=body, **extra)
+            count("s3_put", len(body))
+            return True
+        except ClientError:
+            return False
+
+    def get_object(self, s3_key: str, if_none_match: Optional[str] = None) -> Optional[Dict]:
+        """
+        Read a whole object, optionally revalidating a cached copy.
+        Returns {"body", "etag", "not_modified"}; body is None when the
+        object still matches `if_none_match`. Returns None on error.
+        """
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        with timed("s3_get") as stage:
+            try:
+                obj = self.s3_client.get_object(**params)
+                body = obj["Body"].read()
+            except ClientError as e:
+                status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+                if if_none_match and (status == 304 or e.response.get("Error", {}).get("Code") in ("304", "NotModified")):
+                    stage["outcome"] = "not_modified"
+                    return {"body": None, "etag": if_none_match, "not_modified": True}
+                stage["outcome"] = "error"
+                return None
+        count("s3_get", len(body))
+        return {"body": body, "etag": obj.get("ETag"), "not_modified": False}
+
+    def get_range(self, s3_key: str, start: int, end: int) -> Optional[bytes]:
+        """
+        Read bytes [start, end] (inclusive, as in HTTP Range) of an object.
+        Returns None on error.
+        """
+        try:
+            with timed("s3_get"):
+                obj = self.s3_client.get_object(
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    Range=f"bytes={start}-{end}"
+                )
+                body = obj["Body"].read()
+            count("s3_get", len(body))
+            return body
+        except ClientError:
+            return None
+
+    def head_object(self, s3_key: str) -> Optional[Dict]:
+        """
+        Return size/etag/last_modified/content_type for an object,
+        or None if it doesn't exist or can't be read.
+        """
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return {
+                "size": head["ContentLength"],
+                "etag": head.get("ETag"),
+                "last_modified": head.get("LastModified"),
+                "content_type": head.get("ContentType"),
+            }
+        except ClientError:
+            return None
+
+    def stream_object(self, s3_key: str, byte_range: Optional[Tuple[int, int]] = None,
+                      chunk_size: int = 64 * 1024) -> Optional[Iterator[bytes]]:
+        """
+        Stream an object (or the inclusive byte range) in chunks without
+        reading it into memory. Returns None on error.
+        """
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if byte_range is not None:
+            params["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+        try:
+            obj = self.s3_client.get_object(**params)
+        except ClientError:
+            return None
+        return obj["Body"].iter_chunks(chunk_size=chunk_size)
+
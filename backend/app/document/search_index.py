@@ -0,0 +1,213 @@
+# app/document/search_index.py
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import literal, null, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.config import get_settings
+from backend.app.database.database import async_engine
+from backend.app.database.models import Document as DBDocument, DocumentCategory, DocumentContent, DocumentStatus, User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+_FTS_TOKEN_RE = re.compile(r"\w[\w.-]*", re.UNICODE)
+
+SQLITE_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS document_fts USING fts5(
+    document_id UNINDEXED, filename, title, description, tags, content,
+    tokenize = 'porter unicode61'
+)
+"""
+
+# Column weights: filename/title > tags > description > body text
+PG_SEARCH_VECTOR = """
+    setweight(to_tsvector(CAST(:language AS regconfig), coalesce(d.title, '') || ' ' || d.filename), 'A') ||
+    setweight(to_tsvector(CAST(:language AS regconfig), coalesce(d.tags, '')), 'B') ||
+    setweight(to_tsvector(CAST(:language AS regconfig), coalesce(d.description, '')), 'C') ||
+    setweight(to_tsvector(CAST(:language AS regconfig), left(coalesce(c.content, ''), :max_chars)), 'D')
+"""
+
+
+def dialect_name() -> str:
+    return async_engine.dialect.name
+
+
+async def ensure_fulltext_schema() -> None:
+    """Create the SQLite FTS5 table; PostgreSQL gets its index from migrations."""
+    if dialect_name() not in ("postgresql", "sqlite"):
+        logger.warning(f"Full-text search is not supported on {dialect_name()}; "
+                       f"document search falls back to matching metadata")
+    if dialect_name() != "sqlite":
+        return
+    async with async_engine.begin() as conn:
+        await conn.execute(text(SQLITE_SCHEMA))
+
+
+def fts5_query(query: str) -> str:
+    """Quote each term so user input can't break FTS5 query syntax (terms are ANDed)."""
+    return " ".join(f'"{token}"' for token in _FTS_TOKEN_RE.findall(query))
+
+
+async def index_document(db: AsyncSession, document: DBDocument, content: Optional[str]) -> None:
+    """Store extracted text and refresh the document's full-text entry.
+
+    Also called with content=None to re-index metadata only. The caller
+    commits.
+    """
+    existing = await db.get(DocumentContent, document.id)
+    if existing is None:
+        existing = DocumentContent(document_id=document.id, content=content)
+        db.add(existing)
+    elif content is not None:
+        existing.content = content
+        existing.updated_at = datetime.utcnow()
+    await db.flush()
+
+    if dialect_name() == "postgresql":
+        await db.execute(
+            text(f"""
+                UPDATE document_contents AS c
+                SET search_vector = {PG_SEARCH_VECTOR}
+                FROM documents AS d
+                WHERE d.id = c.document_id AND c.document_id = :document_id
+            """),
+            {"document_id": document.id, "language": settings.fulltext_language, "max_chars": settings.fulltext_max_chars}
+        )
+    elif dialect_name() == "sqlite":
+        await db.execute(text("DELETE FROM document_fts WHERE document_id = :document_id"), {"document_id": document.id})
+        await db.execute(
+            text("""
+                INSERT INTO document_fts (document_id, filename, title, description, tags, content)
+                VALUES (:document_id, :filename, :title, :description, :tags, :content)
+            """),
+            {
+                "document_id": document.id,
+                "filename": document.filename,
+                "title": document.title or "",
+                "description": document.description or "",
+                "tags": document.tags or "",
+                "content": (existing.content or "")[:settings.fulltext_max_chars],
+            }
+        )
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"%{escaped}%"
+
+
+def _metadata_match(query: str, user: User, category: Optional[str], limit: int, offset: int):
+    """Case-insensitive substring match on filename, title, description and tags, newest first.
+
+    For databases without a full-text index; matches score 0 and have no snippet.
+    """
+    pattern = _like_pattern(query)
+    statement = (
+        select(DBDocument.id, literal(0.0).label("rank"), null().label("snippet"))
+        .where(DBDocument.status != DocumentStatus.DELETED)
+        .where(or_(*(
+            column.ilike(pattern, escape="!")
+            for column in (DBDocument.filename, DBDocument.title, DBDocument.description, DBDocument.tags)
+        )))
+    )
+    if not user.is_admin:
+        statement = statement.where(DBDocument.created_by == user.id)
+    if category:
+        statement = statement.where(DBDocument.category == DocumentCategory(category))
+    return statement.order_by(DBDocument.created_at.desc(), DBDocument.id).limit(limit).offset(offset)
+
+
+def _filters(user: User, category: Optional[str]) -> Tuple[str, Dict]:
+    clauses = ["d.status != :deleted"]
+    params: Dict = {"deleted": DocumentStatus.DELETED.value}
+    if not user.is_admin:
+        clauses.append("d.created_by = :user_id")
+        params["user_id"] = user.id
+    if category:
+        # SQLEnum stores the member name
+        clauses.append("d.category = :category")
+        params["category"] = DocumentCategory(category).name
+    return " AND ".join(clauses), params
+
+
+async def search(db: AsyncSession, query: str, user: User, category: Optional[str],
+                 limit: int, offset: int) -> Tuple[List[Tuple[DBDocument, float, Optional[str]]], bool]:
+    """Ranked full-text search over metadata and extracted text.
+
+    Returns ([(document, score, highlighted snippet)], has_more). Higher
+    scores are better. Snippets are computed only for the rows on the page.
+    Databases other than PostgreSQL and SQLite get an unranked metadata
+    match instead.
+    """
+    where, params = _filters(user, category)
+    params.update({"limit": limit + 1, "offset": offset})
+
+    if dialect_name() == "postgresql":
+        params.update({"query": query, "language": settings.fulltext_language})
+        sql = f"""
+            SELECT page.id, page.rank,
+                   ts_headline(CAST(:language AS regconfig),
+                               coalesce(c.content, d.description, d.filename),
+                               websearch_to_tsquery(CAST(:language AS regconfig), :query),
+                               'MaxFragments=2, MaxWords=30, MinWords=8, StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}') AS snippet
+            FROM (
+                SELECT d.id, ts_rank_cd(c.search_vector, q) AS rank
+                FROM document_contents c
+                JOIN documents d ON d.id = c.document_id,
+                     websearch_to_tsquery(CAST(:language AS regconfig), :query) q
+                WHERE c.search_vector @@ q AND {where}
+                ORDER BY rank DESC, d.id
+                LIMIT :limit OFFSET :offset
+            ) page
+            JOIN documents d ON d.id = page.id
+            JOIN document_contents c ON c.document_id = page.id
+            ORDER BY page.rank DESC, page.id
+        """
+    elif dialect_name() == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return [], False
+        params["query"] = match
+        # bm25 is lower-is-better, so negate it into a score
+        sql = f"""
+            SELECT document_fts.document_id AS id,
+                   -bm25(document_fts, 0.0, 10.0, 10.0, 3.0, 5.0, 1.0) AS rank,
+                   snippet(document_fts, 5, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '…', 24) AS snippet
+            FROM document_fts
+            JOIN documents d ON d.id = document_fts.document_id
+            WHERE document_fts MATCH :query AND {where}
+            ORDER BY bm25(document_fts, 0.0, 10.0, 10.0, 3.0, 5.0, 1.0), d.id
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        rows = (await db.execute(_metadata_match(query, user, category, limit + 1, offset))).all()
+        return await _load_page(db, rows, limit)
+
+    rows = (await db.execute(text(sql), params)).all()
+    return await _load_page(db, rows, limit)
+
+
+async def _load_page(db: AsyncSession, rows, limit: int) -> Tuple[List[Tuple[DBDocument, float, Optional[str]]], bool]:
+    """Load the documents for up to `limit` (id, rank, snippet) rows; one extra row means there are more."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return [], False
+
+    documents = {
+        d.id: d for d in (await db.execute(
+            select(DBDocument).where(DBDocument.id.in_([r.id for r in rows]))
+        )).scalars()
+    }
+    results = [
+        (documents[row.id], float(row.rank or 0.0), row.snippet)
+        for row in rows if row.id in documents
+    ]
+    return results, has_more
@@ -0,0 +1,76 @@
+# app/document/sections.py
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Section summary vectors live apart from chunk vectors, so chunk queries need no extra filter
+SECTION_NAMESPACE = "sections"
+SUMMARY_CHARS = 2000
+SUMMARY_CHARS_PER_CHUNK = 300
+
+
+def section_tree_key(document_id: str) -> str:
+    return f"docling_mappings/{document_id}/sections.json"
+
+
+def section_id(document_id: str, node: int) -> str:
+    return f"{document_id}_section_{node}"
+
+
+def build_section_tree(
+    headings: Sequence[Optional[Sequence[str]]],
+    pages: Sequence[Optional[Sequence[int]]]
+) -> Tuple[List[Dict], List[int]]:
+    """Build the heading tree of a document from its chunks' heading paths.
+
+    Returns (nodes, chunk_nodes). Each node is
+    {"title", "parent", "chunks": [[first, last], ...], "pages": [first, last]}
+    with `parent` an index into nodes (None at the top); chunk ranges are
+    inclusive positions, merged while consecutive. `chunk_nodes[i]` is the
+    node chunk i belongs to. Chunks without headings share an untitled
+    top-level node.
+    """
+    nodes: List[Dict] = []
+    by_path: Dict[Tuple[str, ...], int] = {}
+    chunk_nodes: List[int] = []
+
+    for position, (path, chunk_pages) in enumerate(zip(headings, pages)):
+        path = tuple(path or ())
+        node = None
+        for depth in range(1 if path else 0, len(path) + 1):
+            prefix = path[:depth]
+            if prefix not in by_path:
+                by_path[prefix] = len(nodes)
+                nodes.append({"title": prefix[-1] if prefix else None, "parent": node, "chunks": [], "pages": None})
+            node = by_path[prefix]
+
+        entry = nodes[node]
+        if entry["chunks"] and entry["chunks"][-1][1] == position - 1:
+            entry["chunks"][-1][1] = position
+        else:
+            entry["chunks"].append([position, position])
+        if chunk_pages:
+            low, high = min(chunk_pages), max(chunk_pages)
+            if entry["pages"]:
+                low, high = min(low, entry["pages"][0]), max(high, entry["pages"][1])
+            entry["pages"] = [low, high]
+        chunk_nodes.append(node)
+
+    return nodes, chunk_nodes
+
+
+def heading_path(nodes: List[Dict], node: int) -> List[str]:
+    path = []
+    while node is not None:
+        if nodes[node]["title"]:
+            path.append(nodes[node]["title"])
+        node = nodes[node]["parent"]
+    return path[::-1]
+
+
+def chunk_positions(node: Dict) -> List[int]:
+    return [p for first, last in node["chunks"] for p in range(first, last + 1)]
+
+
+def section_summary(path: List[str], texts: Sequence[str]) -> str:
+    """Text embedded for a section: its heading path and the opening of each chunk."""
+    body = " ".join(text[:SUMMARY_CHARS_PER_CHUNK] for text in texts)
+    return (" > ".join(path) + "\n" + body)[:SUMMARY_CHARS]
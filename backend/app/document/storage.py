@@ -0,0 +1,214 @@
+# app/document/storage.py
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from backend.app.config import get_settings
+
+
+class StorageBackend:
+    """Object storage interface used for uploads, mappings and previews.
+
+    Methods follow S3Manager's conventions: writes/deletes return a bool,
+    reads return None (or "") on failure instead of raising.
+    """
+
+    def upload_file(self, local_path: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def put_object(self, key: str, body: bytes, content_type: Optional[str] = None) -> bool:
+        raise NotImplementedError
+
+    def download_file(self, key: str, local_path: str) -> bool:
+        raise NotImplementedError
+
+    def delete_file(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def get_presigned_url(self, key: str, expires_in=3600) -> str:
+        raise NotImplementedError
+
+    def get_object(self, key: str, if_none_match: Optional[str] = None) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def get_range(self, key: str, start: int, end: int) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def head_object(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def stream_object(self, key: str, byte_range: Optional[Tuple[int, int]] = None,
+                      chunk_size: int = 64 * 1024) -> Optional[Iterator[bytes]]:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of the stored object, if the backend has one.
+
+        Lets callers read files in place (conversion, zero-copy serving)
+        instead of downloading them to a temporary copy first.
+        """
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Filesystem-backed storage for air-gapped installs and tests.
+
+    Writes go to a temporary file in the destination directory and are
+    moved into place with os.replace, so readers never see partial files.
+    """
+
+    def __init__(self, root: str, signing_key: str = ""):
+        self.root = os.path.abspath(root)
+        self.signing_key = signing_key.encode("utf-8")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"Storage key escapes root: {key}")
+        return path
+
+    def _atomic_write(self, key: str, write) -> bool:
+        try:
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            return True
+        except (OSError, ValueError):
+            return False
+
+    @staticmethod
+    def _etag(stat: os.stat_result) -> str:
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def upload_file(self, local_path: str, key: str) -> bool:
+        def write(f):
+            with open(local_path, "rb") as src:
+                while chunk := src.read(1024 * 1024):
+                    f.write(chunk)
+        return self._atomic_write(key, write)
+
+    def put_object(self, key: str, body: bytes, content_type: Optional[str] = None) -> bool:
+        return self._atomic_write(key, lambda f: f.write(body))
+
+    def download_file(self, key: str, local_path: str) -> bool:
+        try:
+            shutil.copyfile(self._path(key), local_path)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def delete_file(self, key: str) -> bool:
+        try:
+            os.unlink(self._path(key))
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def sign(self, key: str, expires: int) -> str:
+        message = f"{key}:{expires}".encode("utf-8")
+        return hmac.new(self.signing_key, message, hashlib.sha256).hexdigest()
+
+    def verify_signature(self, key: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self.sign(key, expires), signature)
+
+    def get_presigned_url(self, key: str, expires_in=3600) -> str:
+        """
+        Signed link to the API's local file route, relative to the API base
+        URL (the same convention as the document stream_url).
+        """
+        expires = int(time.time()) + int(expires_in)
+        return f"documents/files/{quote(key)}?expires={expires}&signature={self.sign(key, expires)}"
+
+    def get_object(self, key: str, if_none_match: Optional[str] = None) -> Optional[Dict]:
+        try:
+            path = self._path(key)
+            with open(path, "rb") as f:
+                etag = self._etag(os.fstat(f.fileno()))
+                if if_none_match and if_none_match == etag:
+                    return {"body": None, "etag": etag, "not_modified": True}
+                return {"body": f.read(), "etag": etag, "not_modified": False}
+        except (OSError, ValueError):
+            return None
+
+    def get_range(self, key: str, start: int, end: int) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                f.seek(start)
+                return f.read(end - start + 1)
+        except (OSError, ValueError):
+            return None
+
+    def head_object(self, key: str) -> Optional[Dict]:
+        try:
+            stat = os.stat(self._path(key))
+        except (OSError, ValueError):
+            return None
+        return {
+            "size": stat.st_size,
+            "etag": self._etag(stat),
+            "last_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            "content_type": None,
+        }
+
+    def stream_object(self, key: str, byte_range: Optional[Tuple[int, int]] = None,
+                      chunk_size: int = 64 * 1024) -> Optional[Iterator[bytes]]:
+        try:
+            f = open(self._path(key), "rb")
+        except (OSError, ValueError):
+            return None
+
+        def iterate():
+            with f:
+                if byte_range is None:
+                    remaining = os.fstat(f.fileno()).st_size
+                else:
+                    f.seek(byte_range[0])
+                    remaining = byte_range[1] - byte_range[0] + 1
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+        return iterate()
+
+    def local_path(self, key: str) -> Optional[str]:
+        try:
+            path = self._path(key)
+        except ValueError:
+            return None
+        return path if os.path.isfile(path) else None
+
+
+@lru_cache()
+def get_storage() -> StorageBackend:
+    """
+    Process-wide storage backend selected by STORAGE_BACKEND ("s3" or
+    "local"). Routes and processors share one instance, so the S3 backend
+    reuses a single boto3 client and its connection pool.
+    """
+    settings = get_settings()
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.local_storage_root, signing_key=settings.secret_key)
+
+    from backend.app.document.s3_manager import S3Manager
+    return S3Manager()
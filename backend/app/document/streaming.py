@@ -0,0 +1,187 @@
+# app/document/streaming.py
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import anyio
+from fastapi import Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the object."""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range `Range` header into an inclusive (start, end).
+
+    Returns None when the whole object should be served (no header, a
+    malformed header or a multi-range request, which RFC 9110 lets us
+    answer with a full 200).
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def _http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the object."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if not etag:
+            return False
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+class FileRangeResponse(Response):
+    """Serve a byte range of a local file, zero-copy when the server allows.
+
+    When the ASGI server advertises the `http.response.zerocopysend`
+    extension the kernel copies the file straight to the socket
+    (sendfile); otherwise the range is read in chunks off the event loop.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, byte_range: Tuple[int, int], status_code: int,
+                 headers: Dict[str, str], media_type: str):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.byte_range = byte_range
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        start, end = self.byte_range
+        count = end - start + 1
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(start)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def build_range_response(
+    request: Request,
+    *,
+    size: int,
+    etag: Optional[str],
+    last_modified: Optional[datetime],
+    media_type: str,
+    filename: str,
+    open_stream: Optional[Callable[[Optional[Tuple[int, int]]], Optional[Iterator[bytes]]]] = None,
+    file_path: Optional[str] = None,
+    cache_control: str = "private, max-age=3600",
+) -> Response:
+    """Build a 200/206/304/416 response that streams the object in chunks.
+
+    Pass `file_path` for objects on the local filesystem (served with
+    FileRangeResponse), otherwise `open_stream(byte_range)`, which must
+    return an iterator over the requested bytes (inclusive range, or the
+    whole object for None). `open_stream` may block (an S3 GET), so it
+    runs in the threadpool.
+    """
+    headers: Dict[str, str] = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "Content-Disposition": f'inline; filename="{filename}"',
+    }
+    if etag:
+        headers["ETag"] = etag
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range != etag and if_range != headers.get("Last-Modified"):
+        # The client's cached copy is stale: send the whole object
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+
+    if byte_range is None:
+        status_code = status.HTTP_200_OK
+        headers["Content-Length"] = str(size)
+    else:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+        headers["Content-Length"] = str(byte_range[1] - byte_range[0] + 1)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    if file_path is not None:
+        if size == 0:
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+        return FileRangeResponse(file_path, byte_range or (0, size - 1), status_code, headers, media_type)
+
+    body = await run_in_threadpool(open_stream, byte_range)
+    if body is None:
+        return Response(status_code=status.HTTP_502_BAD_GATEWAY)
+    return StreamingResponse(body, status_code=status_code, headers=headers, media_type=media_type)
@@ -0,0 +1,146 @@
+# app/document/structure_cache.py
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class StructureCache:
+    """Size-capped LRU cache for JSON mappings kept in object storage.
+
+    Entries are keyed by storage key and remember the object's ETag. Within
+    `revalidate_seconds` of the last check a hit is served from memory;
+    after that the object is revalidated with If-None-Match, so an
+    unchanged mapping costs a 304 instead of a full download and parse.
+    """
+
+    def __init__(self, max_bytes: int, revalidate_seconds: float = 30.0):
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put_entry(self, key: str, etag: Optional[str], value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old["size"]
+            self._entries[key] = {"etag": etag, "value": value, "size": size, "checked_at": time.monotonic()}
+            self._size += size
+            while self._size > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted["size"]
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry["size"]
+
+    def get_json(self, storage, key: str) -> Optional[Any]:
+        """Return the parsed JSON object at `key`, or None if it can't be read."""
+        entry = self._get_entry(key)
+        if entry is not None and time.monotonic() - entry["checked_at"] < self.revalidate_seconds:
+            self.hits += 1
+            return entry["value"]
+
+        response = storage.get_object(key, if_none_match=entry["etag"] if entry else None)
+        if response is None:
+            return None
+        if response["not_modified"]:
+            self.hits += 1
+            entry["checked_at"] = time.monotonic()
+            return entry["value"]
+
+        self.misses += 1
+        body = response["body"]
+        value = json.loads(body)
+        self._put_entry(key, response["etag"], value, len(body))
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+@lru_cache()
+def get_structure_cache() -> StructureCache:
+    """Process-wide structure cache shared by all processor instances."""
+    settings = get_settings()
+    return StructureCache(
+        max_bytes=settings.structure_cache_max_bytes,
+        revalidate_seconds=settings.structure_cache_revalidate_seconds
+    )
+
+
+def build_shards(records: List[Dict]) -> Tuple[bytes, List[List[int]]]:
+    """Serialize records as JSON lines and return (blob, inclusive byte offsets).
+
+    The offsets let a single record be fetched with a ranged GET.
+    """
+    parts = []
+    offsets = []
+    position = 0
+    for record in records:
+        line = json.dumps(record).encode("utf-8") + b"\n"
+        parts.append(line)
+        offsets.append([position, position + len(line) - 1])
+        position += len(line)
+    return b"".join(parts), offsets
+
+
+def read_shards(storage, blob_key: str, offsets: List[List[int]], positions: List[int],
+                max_gap_bytes: Optional[int] = None) -> Dict[int, Dict]:
+    """Read the records at `positions` from a sharded blob in one ranged GET.
+
+    Records are contiguous, so the span from the first to the last wanted
+    record is fetched and the unwanted records in between are skipped.
+    With `max_gap_bytes`, wanted records further apart than that are read
+    with separate GETs instead of downloading everything in between.
+    """
+    wanted = sorted({p for p in positions if 0 <= p < len(offsets)})
+    if not wanted:
+        return {}
+
+    runs = [[wanted[0]]]
+    for p in wanted[1:]:
+        if max_gap_bytes is not None and offsets[p][0] - offsets[runs[-1][-1]][1] > max_gap_bytes:
+            runs.append([p])
+        else:
+            runs[-1].append(p)
+
+    records = {}
+    for run in runs:
+        start = offsets[run[0]][0]
+        end = offsets[run[-1]][1]
+        data = storage.get_range(blob_key, start, end)
+        if data is None:
+            return {}
+        for p in run:
+            record_start, record_end = offsets[p]
+            records[p] = json.loads(data[record_start - start:record_end - start + 1])
+    return records
@@ -0,0 +1,140 @@
+# app/document/thumbnails.py
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from backend.app.config import get_settings
+from backend.app.document.storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering parameters change so content-addressed keys change too
+RENDER_VERSION = 1
+_HASH_BLOCK_SIZE = 1024 * 1024
+THUMBNAIL_WIDTH = 256
+PREVIEW_WIDTH = 900
+PREVIEW_JPEG_QUALITY = 70
+
+
+def render_first_page(pdf_path: str) -> Tuple[bytes, bytes, int]:
+    """Render (thumbnail PNG, low-res preview JPEG, page count) for a PDF.
+
+    Runs in a worker process; PyMuPDF is imported here so the API process
+    never loads it just to enqueue work.
+    """
+    import fitz
+
+    with fitz.open(pdf_path) as doc:
+        page = doc[0]
+        width = page.rect.width or 1
+        thumb = page.get_pixmap(matrix=fitz.Matrix(THUMBNAIL_WIDTH / width, THUMBNAIL_WIDTH / width), alpha=False)
+        preview = page.get_pixmap(matrix=fitz.Matrix(PREVIEW_WIDTH / width, PREVIEW_WIDTH / width), alpha=False)
+        return thumb.tobytes("png"), preview.tobytes("jpg", jpg_quality=PREVIEW_JPEG_QUALITY), doc.page_count
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's bytes, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_keys(content_sha256: str) -> Tuple[str, str]:
+    """Storage keys for the thumbnail and preview of a source file with this SHA-256."""
+    digest = hashlib.sha256(f"{content_sha256}:v{RENDER_VERSION}".encode("utf-8")).hexdigest()
+    return f"thumbnails/{digest}.png", f"previews/{digest}.jpg"
+
+
+class ThumbnailGenerator:
+    """Render first-page thumbnails and previews on a process pool.
+
+    Images are addressed by the SHA-256 of the source file (computed at
+    upload, or here for documents that predate it) and the render version,
+    so re-uploads of identical files and re-runs of the backfill reuse
+    existing images instead of rendering again.
+    """
+
+    def __init__(self, storage: StorageBackend, max_workers: int = 2):
+        self.storage = storage
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _source_path(self, doc: Dict, tmpdir: str) -> Optional[str]:
+        """Local path of the document's source file, downloading it if needed."""
+        pdf_path = self.storage.local_path(doc["s3_key"])
+        if pdf_path is None:
+            pdf_path = os.path.join(tmpdir, f"{doc['id']}.pdf")
+            if not self.storage.download_file(doc["s3_key"], pdf_path):
+                logger.warning(f"Skipping thumbnail for {doc['id']}: source not found")
+                return None
+        return pdf_path
+
+    def generate_batch(self, documents: List[Dict]) -> Dict[str, Dict]:
+        """Generate images for documents given as {"id", "s3_key", "content_sha256"} dicts.
+
+        Returns {document_id: {"thumbnail_s3_key", "preview_s3_key",
+        "page_count", "content_sha256"}} for every document that now has
+        images; failures are logged and left out. Documents without a
+        `content_sha256` have their source hashed first.
+        """
+        results: Dict[str, Dict] = {}
+        pending = []
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for doc in documents:
+                pdf_path = None
+                digest = doc.get("content_sha256")
+                if not digest:
+                    pdf_path = self._source_path(doc, tmpdir)
+                    if pdf_path is None:
+                        continue
+                    digest = file_sha256(pdf_path)
+
+                thumb_key, preview_key = content_keys(digest)
+                images = {"thumbnail_s3_key": thumb_key, "preview_s3_key": preview_key, "content_sha256": digest}
+                if self.storage.head_object(thumb_key) and self.storage.head_object(preview_key):
+                    results[doc["id"]] = {**images, "page_count": None}
+                    continue
+
+                pdf_path = pdf_path or self._source_path(doc, tmpdir)
+                if pdf_path is None:
+                    continue
+                future = self.pool.submit(render_first_page, pdf_path)
+                pending.append((doc["id"], images, future))
+
+            for document_id, images, future in pending:
+                try:
+                    thumb, preview, page_count = future.result()
+                except Exception as e:
+                    logger.error(f"Thumbnail rendering failed for {document_id}: {str(e)}")
+                    continue
+
+                if not (self.storage.put_object(images["thumbnail_s3_key"], thumb, "image/png")
+                        and self.storage.put_object(images["preview_s3_key"], preview, "image/jpeg")):
+                    logger.error(f"Could not store thumbnail for {document_id}")
+                    continue
+                results[document_id] = {**images, "page_count": page_count}
+
+        return results
+
+
+@lru_cache()
+def get_thumbnail_generator() -> ThumbnailGenerator:
+    return ThumbnailGenerator(get_storage(), max_workers=get_settings().thumbnail_workers)
@@ -0,0 +1,61 @@
+# app/document/url_cache.py
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from backend.app.config import get_settings
+
+
+class PresignedUrlCache:
+    """Cache of presigned URLs keyed by (document, user).
+
+    A URL is handed out again until `refresh_margin` seconds before it
+    expires, so repeated requests for the same document get an identical
+    URL and the browser can keep serving the PDF from its own cache.
+    """
+
+    def __init__(self, expires_in: int = 3600, refresh_margin: int = 300, max_entries: int = 10000):
+        self.expires_in = expires_in
+        self.refresh_margin = min(refresh_margin, expires_in // 2)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_sign(self, document_id: str, user_id: str, s3_key: str,
+                    sign: Callable[[str, int], str]) -> Optional[Dict]:
+        """Return {"url", "expires_at"}, signing a new URL only when needed."""
+        key = (document_id, user_id, s3_key)
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[1] - self.refresh_margin > now:
+                self._entries.move_to_end(key)
+                return {"url": cached[0], "expires_at": int(cached[1])}
+
+        url = sign(s3_key, self.expires_in)
+        if not url:
+            return None
+        expires_at = now + self.expires_in
+
+        with self._lock:
+            self._entries[key] = (url, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return {"url": url, "expires_at": int(expires_at)}
+
+    def invalidate_document(self, document_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == document_id]:
+                del self._entries[key]
+
+
+@lru_cache()
+def get_url_cache() -> PresignedUrlCache:
+    settings = get_settings()
+    return PresignedUrlCache(
+        expires_in=settings.presigned_url_expires_seconds,
+        refresh_margin=settings.presigned_url_refresh_margin_seconds
+    )
@@ -1,10 +1,18 @@
 # app/main.py
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import logging
-from backend.app.routers import auth, documents, chat
+import threading
+import time
+from backend.app.routers import auth, documents, chat, profiles
+from backend.app.admission import get_admission_controller
 from backend.app.config import get_settings
+from backend.app.database.database import pool_status
+from backend.app.document.search_index import ensure_fulltext_schema
 from backend.app.logging_config import setup_logging
+from backend.app.responses import CompressionMiddleware
+from backend.app.metrics import METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
 
 # Setup logging first
 setup_logging()
@@ -12,6 +20,23 @@ logger = logging.getLogger("app")
 
 settings = get_settings()
 
+def warm_up() -> None:
+    """Import Docling, langchain and pinecone and build their clients.
+
+    Runs in a background thread so health and auth are served while the
+    ML stack loads; the first upload or chat request would otherwise pay it.
+    """
+    from backend.app.chat.chat_manager import build_chat_model
+    from backend.app.document.docling_processor import get_docling_processor
+
+    start = time.perf_counter()
+    try:
+        get_docling_processor().warm_up()
+        build_chat_model()
+        logger.info(f"Warm-up finished in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        logger.warning(f"Warm-up failed, loading on first use instead: {str(e)}")
+
 def create_application() -> FastAPI:
     """Create and configure the FastAPI application"""
     app = FastAPI(
@@ -21,6 +46,7 @@ def create_application() -> FastAPI:
         openapi_url=f"{settings.api_prefix}/openapi.json",
         docs_url=f"{settings.api_prefix}/docs",
         redoc_url=f"{settings.api_prefix}/redoc",
+        default_response_class=ORJSONResponse,
     )
 
     # Add CORS middleware
@@ -32,6 +58,17 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Compress JSON responses (brotli if installed, else gzip)
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.gzip_level,
+        brotli_quality=settings.brotli_quality,
+    )
+
+    # Outermost, so request latency includes compression and CORS
+    app.add_middleware(MetricsMiddleware)
+
     # Include routers with proper prefixes
     app.include_router(
         auth.router,
@@ -51,6 +88,12 @@ def create_application() -> FastAPI:
         tags=["Chat"]
     )
 
+    app.include_router(
+        profiles.router,
+        prefix=settings.api_prefix,
+        tags=["Profiling"]
+    )
+
     return app
 
 # Create the application instance
@@ -60,7 +103,9 @@ app = create_application()
 async def startup_event():
     """Startup event handler"""
     logger.info("Starting Tech RAG API")
-    # Add any additional startup tasks here
+    await ensure_fulltext_schema()
+    if settings.warmup_on_startup:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -77,3 +122,18 @@ async def root():
         "message": "Tech RAG API is running",
         "version": "1.0.0"
     }
+
+@app.get(f"{settings.api_prefix}/health/db")
+async def database_health():
+    """Async engine pool state and connection checkout wait times"""
+    return pool_status()
+
+@app.get(f"{settings.api_prefix}/health/admission")
+async def admission_health():
+    """Per-endpoint in-flight requests, queue depth and rejection counts"""
+    return get_admission_controller().snapshot()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition of request, pipeline stage and database metrics"""
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
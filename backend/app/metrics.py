@@ -0,0 +1,153 @@
+# app/metrics.py
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import anyio.to_thread
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Pipeline stages span milliseconds (S3, DB) to minutes (Docling conversion)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+REQUEST_LATENCY = Histogram(
+    "techrag_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "techrag_stage_duration_seconds",
+    "Latency of pipeline stages (conversion, chunking, embedding, vector index, S3, LLM)",
+    ["stage", "category", "outcome"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_ITEMS = Counter(
+    "techrag_stage_items_total",
+    "Items handled by pipeline stages (chunks embedded, vectors upserted, bytes moved)",
+    ["stage", "category"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "techrag_db_query_duration_seconds",
+    "Database statement execution time",
+    ["engine", "statement"],
+    buckets=FAST_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter(
+    "techrag_db_query_errors_total",
+    "Database statements that raised",
+    ["engine"],
+)
+# Sync routes and run_in_threadpool share one worker-thread limiter per event loop
+THREADPOOL_BUSY = Gauge("techrag_threadpool_busy_threads", "Worker threads in use when a request arrives")
+THREADPOOL_SIZE = Gauge("techrag_threadpool_size_threads", "Worker thread limit for sync routes and run_in_threadpool")
+THREADPOOL_WAITING = Gauge("techrag_threadpool_waiting_tasks", "Tasks queued for a worker thread when a request arrives")
+ADMISSION_QUEUE_DEPTH = Gauge("techrag_admission_queue_depth", "Requests queued for an admission slot", ["endpoint"])
+ADMISSION_IN_FLIGHT = Gauge("techrag_admission_in_flight", "Admitted requests still running", ["endpoint"])
+ADMISSION_REJECTIONS = Counter(
+    "techrag_admission_rejections_total",
+    "Requests answered 429 by admission control",
+    ["endpoint", "reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "techrag_admission_wait_seconds",
+    "Time admitted requests spent queued",
+    ["endpoint"],
+    buckets=STAGE_BUCKETS,
+)
+DB_POOL_WAIT = Histogram(
+    "techrag_db_pool_wait_seconds",
+    "Time requests wait to check out a pooled connection",
+    buckets=FAST_BUCKETS,
+)
+
+
+@contextmanager
+def timed(stage: str, category: Optional[str] = None) -> Iterator[Dict[str, str]]:
+    """Record how long the block takes, labelled success or error.
+
+    The block may set `outcome` on the yielded dict for results that are
+    neither (a conditional GET answered with 304) or for failures that
+    are returned rather than raised.
+    """
+    start = time.perf_counter()
+    labels = {}
+    try:
+        yield labels
+        labels.setdefault("outcome", "success")
+    finally:
+        outcome = labels.get("outcome", "error")
+        STAGE_LATENCY.labels(stage, category or "none", outcome).observe(time.perf_counter() - start)
+
+
+def count(stage: str, amount: float, category: Optional[str] = None) -> None:
+    STAGE_ITEMS.labels(stage, category or "none").inc(amount)
+
+
+def _statement_kind(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Time every statement on `engine` (pass async_engine.sync_engine for async)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        DB_QUERY_LATENCY.labels(name, _statement_kind(statement)).observe(time.perf_counter() - start)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        DB_QUERY_ERRORS.labels(name).inc()
+
+
+class MetricsMiddleware:
+    """Request latency per route template (not raw path, to bound label cardinality)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+        THREADPOOL_SIZE.set(limiter.total_tokens)
+        THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            ).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> bytes:
+    return generate_latest()
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,262 @@
+# app/profiling.py
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from backend.app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_current: ContextVar[Optional["ProfileSession"]] = ContextVar("current_profile", default=None)
+# tracemalloc is process-wide, so only one request can trace memory at a time
+_memory_lock = threading.Lock()
+
+
+def profile_key(profile_id: str, kind: str) -> str:
+    """Storage key for a profile artifact ("cpu" speedscope file or "memory" report)."""
+    suffix = "speedscope.json" if kind == "cpu" else "memory.json"
+    return f"profiles/{profile_id}.{suffix}"
+
+
+class ProfileSession:
+    """Sampling profiler for the threads doing one request's work.
+
+    A daemon thread snapshots the stacks of the tracked threads every
+    `interval` seconds via sys._current_frames(); nothing is installed in
+    the profiled threads, so their overhead is the GIL time of sampling.
+    Only worker threads that join with track() (see profiled()) are
+    sampled: the event-loop thread runs every concurrent request, so its
+    samples would be charged to this one.
+    """
+
+    def __init__(self, name: str, interval: float, max_seconds: float, memory: bool = False):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.memory = memory
+        self.memory_reports: List[Dict] = []
+        self._active: Dict[int, int] = {}
+        self._thread_names: Dict[int, str] = {}
+        # Identical stacks are stored once; samples hold indexes into _stacks
+        self._stack_ids: Dict[Tuple[Tuple[str, str, int], ...], int] = {}
+        self._stacks: List[Tuple[Tuple[str, str, int], ...]] = []
+        self._samples: Dict[int, List[int]] = {}
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._ended_at = 0.0
+
+    def start(self) -> None:
+        self._started_at = time.perf_counter()
+        if self.max_seconds > 0:
+            self._sampler = threading.Thread(target=self._run, name=f"profiler-{self.id[:8]}", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self._ended_at = time.perf_counter()
+
+    def add_thread(self) -> None:
+        current = threading.current_thread()
+        self._thread_names[current.ident] = current.name
+        self._active[current.ident] = self._active.get(current.ident, 0) + 1
+
+    def remove_thread(self) -> None:
+        ident = threading.get_ident()
+        if self._active.get(ident, 0) > 1:
+            self._active[ident] -= 1
+        else:
+            self._active.pop(ident, None)
+
+    def _run(self) -> None:
+        deadline = time.perf_counter() + self.max_seconds
+        while not self._stop.wait(self.interval) and time.perf_counter() < deadline:
+            frames = sys._current_frames()
+            for ident in list(self._active):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                    frame = frame.f_back
+                stack.reverse()
+                key = tuple(stack)
+                stack_id = self._stack_ids.get(key)
+                if stack_id is None:
+                    stack_id = self._stack_ids[key] = len(self._stacks)
+                    self._stacks.append(key)
+                self._samples.setdefault(ident, []).append(stack_id)
+
+    def speedscope(self) -> Dict:
+        """Samples in speedscope's "sampled" format, one profile per thread."""
+        frame_index: Dict[Tuple[str, str, int], int] = {}
+        frames = []
+
+        def index(frame: Tuple[str, str, int]) -> int:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            return frame_index[frame]
+
+        stacks = [[index(f) for f in stack] for stack in self._stacks]
+        profiles = []
+        for ident, samples in self._samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self.name} [{self._thread_names.get(ident, ident)}]",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(self._ended_at - self._started_at, 6),
+                "samples": [stacks[i] for i in samples],
+                "weights": [self.interval] * len(samples),
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": self.name,
+            "exporter": "tech-rag",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+def requested_kinds(header_value: Optional[str]) -> Tuple[bool, bool]:
+    """Parse X-Profile: "1"/"cpu" for CPU, "memory" for tracemalloc, or both."""
+    if not header_value:
+        return False, False
+    kinds = {k.strip().lower() for k in header_value.split(",")}
+    memory = "memory" in kinds
+    cpu = bool(kinds & {"1", "true", "cpu"}) or not memory
+    return cpu, memory
+
+
+def start_session(name: str, cpu: bool, memory: bool) -> ProfileSession:
+    settings = get_settings()
+    session = ProfileSession(
+        name,
+        interval=settings.profiling_interval_ms / 1000,
+        max_seconds=settings.profiling_max_seconds if cpu else 0,
+        memory=memory,
+    )
+    session.start()
+    _current.set(session)
+    return session
+
+
+def end_session(session: ProfileSession) -> None:
+    session.stop()
+    _current.set(None)
+
+
+def current_session() -> Optional[ProfileSession]:
+    return _current.get()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+@contextmanager
+def track(session: Optional[ProfileSession] = None) -> Iterator[None]:
+    """Include the calling thread in `session` (default: the active one), if any.
+
+    A no-op on an event-loop thread, which is shared with other requests.
+    """
+    session = session or _current.get()
+    if session is None or _on_event_loop():
+        yield
+        return
+    session.add_thread()
+    try:
+        yield
+    finally:
+        session.remove_thread()
+
+
+@contextmanager
+def memory_snapshot(label: str, session: Optional[ProfileSession] = None, top: int = 50) -> Iterator[None]:
+    """Diff tracemalloc snapshots around the block when the request asked for it."""
+    session = session or _current.get()
+    if session is None or not session.memory or not _memory_lock.acquire(blocking=False):
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(25)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        _memory_lock.release()
+        session.memory_reports.append({
+            "label": label,
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top_allocations": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_bytes": stat.size_diff,
+                    "size_bytes": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in after.compare_to(before, "lineno")[:top]
+            ],
+        })
+
+
+def profiled(func: Callable, label: Optional[str] = None) -> Callable:
+    """Wrap `func` to be profiled when a request session is active.
+
+    Returns `func` itself otherwise, so unprofiled requests pay nothing.
+    Use on functions handed to worker threads: the wrapper joins the
+    worker thread to the session and traces memory around the call.
+    """
+    session = _current.get()
+    if session is None:
+        return func
+
+    # The session is bound here, on the request's side, so the wrapper
+    # works whether or not the thread pool propagates context variables
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with track(session), memory_snapshot(label or func.__qualname__, session):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def session_artifacts(session: ProfileSession) -> List[Tuple[str, bytes]]:
+    """(storage key, JSON body) pairs to persist for a finished session."""
+    artifacts = []
+    if session.max_seconds > 0:
+        artifacts.append((profile_key(session.id, "cpu"), json.dumps(session.speedscope()).encode("utf-8")))
+    if session.memory_reports:
+        report = {"name": session.name, "reports": session.memory_reports}
+        artifacts.append((profile_key(session.id, "memory"), json.dumps(report).encode("utf-8")))
+    return artifacts
@@ -0,0 +1,64 @@
+# app/responses.py
+import hashlib
+import logging
+import re
+from typing import Any
+
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:  # brotli is optional; gzip covers every client
+    BrotliMiddleware = None
+
+logger = logging.getLogger(__name__)
+
+# File downloads, ranged streams and images: already compressed, and
+# re-encoding a 206 would break its Content-Range
+UNCOMPRESSED_PATHS = re.compile(r"/documents/(files/.*|[^/]+/(stream|thumbnail))$")
+
+
+class CompressionMiddleware:
+    """Brotli (when installed) or gzip for API responses above a size threshold.
+
+    Binary endpoints matched by UNCOMPRESSED_PATHS bypass compression
+    entirely so their zero-copy and Range handling is untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1000, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        if BrotliMiddleware is not None:
+            self.compressed = BrotliMiddleware(app, quality=brotli_quality, minimum_size=minimum_size, gzip_fallback=True)
+        else:
+            self.compressed = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=gzip_level)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and not UNCOMPRESSED_PATHS.search(scope["path"]):
+            await self.compressed(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def etag_json_response(request: Request, content: Any, cache_control: str = "private, no-cache") -> Response:
+    """Serialize `content` once and answer 304 if the client already has it.
+
+    The ETag is a hash of the encoded body, so it changes exactly when the
+    payload does. It is weak because compression may re-encode the body.
+    """
+    response = ORJSONResponse(content)
+    etag = f'W/"{hashlib.blake2b(response.body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return response
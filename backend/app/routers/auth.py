@@ -1,30 +1,51 @@
 # app/routers/auth.py
 from typing import Annotated, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session  # Added this import
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import uuid4
 
 from backend.app.auth.auth import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
     create_access_token,
-    authenticate_user,
-    verify_token
+    authenticate_user_async,
+    verify_token,
+    verify_stream_token
 )
+from backend.app.auth.user_cache import CachedUser, get_user_cache
 from backend.app.config import get_settings
-from backend.app.database.database import get_db
+from backend.app.database.database import AsyncSessionLocal, get_async_db
 from backend.app.database.models import User
 from backend.app.schemas import Token, UserCreate, User as UserSchema
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 settings = get_settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Session = Depends(get_db)
-) -> User:
+async def resolve_user(username: Optional[str]) -> Optional[CachedUser]:
+    """Map a token subject to a user, via the short-TTL user cache.
+
+    Cache hits touch no session; a miss uses its own short-lived session,
+    closed before the request carries on, so authentication never holds a
+    pooled connection for the rest of the request.
+    """
+    cache = get_user_cache()
+    cached = cache.get(username)
+    if cached is not None:
+        return cached
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalar_one_or_none()
+    if user is None:
+        return None
+    cached = CachedUser.from_user(user)
+    cache.put(cached)
+    return cached
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> CachedUser:
     """Dependency to get current authenticated user"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,7 +54,37 @@ async def get_current_user(
     )
 
     payload = verify_token(token, credentials_exception)
-    user = db.query(User).filter(User.username == payload.get("sub")).first()
+    if payload.get("scope") is not None:
+        # Scoped tokens (e.g. document stream links) are not session tokens
+        raise credentials_exception
+    user = await resolve_user(payload.get("sub"))
+    if user is None:
+        raise credentials_exception
+    return user
+
+async def get_stream_user(
+    document_id: str,
+    token: Optional[str] = Query(None),
+    bearer_token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> CachedUser:
+    """
+    Dependency for document streaming. Accepts a normal bearer token, or a
+    document-scoped `token` query parameter so browser PDF viewers, which
+    can't set headers, can fetch byte ranges directly.
+    """
+    if bearer_token:
+        return await get_current_user(bearer_token)
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if not token:
+        raise credentials_exception
+
+    payload = verify_stream_token(token, document_id, credentials_exception)
+    user = await resolve_user(payload.get("sub"))
     if user is None:
         raise credentials_exception
     return user
@@ -41,10 +92,10 @@ async def get_current_user(
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login endpoint that returns a JWT token"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,7 +107,7 @@ async def login(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserSchema)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CachedUser = Depends(get_current_user)):
     """Get current authenticated user information"""
     return UserSchema.from_orm(current_user)
 
@@ -65,8 +116,8 @@ async def register(
     username: str = Body(...),
     password: str = Body(...),
     is_admin: bool = Body(False),
-    current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Optional[CachedUser] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new user. Only admin users can create other admin users."""
     # Check admin privileges for admin user creation
@@ -77,7 +128,8 @@ async def register(
         )
 
     # Check username uniqueness
-    if db.query(User).filter(User.username == username).first():
+    existing = await db.execute(select(User.id).where(User.username == username))
+    if existing.first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
@@ -87,15 +139,15 @@ async def register(
     user = User(
         id=str(uuid4()),
         username=username,
-        password=get_password_hash(password),
+        password=await get_password_hash_async(password),
         is_admin=is_admin
     )
     db.add(user)
     try:
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating user: {str(e)}"
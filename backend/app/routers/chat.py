@@ -1,12 +1,20 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from typing import Any, List, Dict
-from backend.app.database.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from typing import Any, List, Dict, Optional
+from backend.app.database.database import SessionLocal, get_async_db
 from backend.app.routers.auth import get_current_user
-from sqlalchemy.orm import Session
-from backend.app.database.models import Document as DBDocument
+from backend.app.routers.profiles import profile_request
+from backend.app.admission import admission
+from backend.app.profiling import profiled
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.database.models import Document as DBDocument, DocumentCategory, DocumentStatus
 from backend.app.chat.chat_manager import ChatManager
+from backend.app.document.docling_processor import get_docling_processor
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 class ChatRequest(BaseModel):
@@ -14,10 +22,15 @@ class ChatRequest(BaseModel):
     query: str
     history: List[Dict[str, str]] = []
 
-@router.post("/ask")
+class RetrieveRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=20)
+    document_ids: Optional[List[str]] = None
+    category: Optional[DocumentCategory] = None
+    top_k: int = Field(5, ge=1, le=20)
+
+@router.post("/ask", dependencies=[Depends(admission("chat")), Depends(profile_request)])
 def ask_chat(
     req: ChatRequest,
-    db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ) -> Any:
     """
@@ -25,7 +38,9 @@ def ask_chat(
     We only allow the user if they own the doc or are admin.
     Then we do doc-based retrieval from Pinecone, pass it to an LLM, etc.
     """
-    doc = db.query(DBDocument).filter(DBDocument.id == req.document_id).first()
+    # Released before retrieval and the LLM call, which can take seconds
+    with SessionLocal() as db:
+        doc = db.query(DBDocument).filter(DBDocument.id == req.document_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     if doc.created_by != current_user.id and not current_user.is_admin:
@@ -33,12 +48,76 @@ def ask_chat(
 
     # You can pass [req.document_id] as the single doc to ChatManager or multiple
     chat_manager = ChatManager()
-    res = chat_manager.generate_response(
+    res = profiled(chat_manager.generate_response)(
         query=req.query,
         document_ids=[req.document_id],
         chat_history=req.history
     )
     return {
         "response": res["response"],
-        "citations": res["citations"]
+        "citations": res["citations"],
+        "attributions": res["attributions"]
+    }
+
+@router.post("/retrieve")
+async def retrieve_chunks(
+    req: RetrieveRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+) -> Any:
+    """
+    Retrieval without generation: the top chunks for each query, with
+    section titles, page numbers and scores. Scope with document_ids, a
+    category, or both; with neither, every document the user can see.
+    """
+    category = req.category.value if req.category else None
+    document_ids = None
+
+    if req.document_ids:
+        docs = (await db.execute(
+            select(DBDocument).where(DBDocument.id.in_(req.document_ids))
+        )).scalars().all()
+        if len(docs) != len(set(req.document_ids)) or any(d.status == DocumentStatus.DELETED for d in docs):
+            raise HTTPException(status_code=404, detail="Document not found")
+        if not current_user.is_admin and any(d.created_by != current_user.id for d in docs):
+            raise HTTPException(status_code=403, detail="Not authorized")
+        document_ids = [d.id for d in docs]
+    elif not current_user.is_admin:
+        query = select(DBDocument.id).where(
+            DBDocument.created_by == current_user.id,
+            DBDocument.status == DocumentStatus.COMPLETED
+        )
+        if req.category:
+            query = query.where(DBDocument.category == req.category)
+        document_ids = (await db.execute(query)).scalars().all()
+
+    try:
+        results = await run_in_threadpool(
+            get_docling_processor().search_batch,
+            req.queries,
+            document_ids=document_ids,
+            category=category,
+            top_k=req.top_k
+        )
+    except Exception as e:
+        logger.error(f"Error retrieving chunks: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving chunks: {str(e)}")
+    return {
+        "results": [
+            {
+                "query": query,
+                "chunks": [
+                    {
+                        "chunk_id": r["id"],
+                        "document_id": r["metadata"].get("document_id"),
+                        "section": r["metadata"].get("title"),
+                        "page_numbers": r["metadata"].get("page_numbers") or [],
+                        "text": r["metadata"].get("chunk_text", ""),
+                        "score": r["score"]
+                    }
+                    for r in chunks
+                ]
+            }
+            for query, chunks in zip(req.queries, results)
+        ]
     }
@@ -1,15 +1,28 @@
 # app/routers/documents.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
+import os
 
-from backend.app.database.database import get_db
+from backend.app.database.database import get_async_db
 from backend.app.database.models import Document as DBDocument, User, DocumentStatus
-from backend.app.routers.auth import get_current_user
-from backend.app.schemas import Document
+from backend.app.routers.auth import get_current_user, get_stream_user
+from backend.app.routers.profiles import profile_request
+from backend.app.admission import admission
+from backend.app.auth.auth import create_stream_token
+from backend.app.schemas import Document, DocumentPage, DocumentSearchHit, DocumentSearchPage, DocumentSemanticHit
 from backend.app.document.document_manager import DocumentManager
-from backend.app.document.s3_manager import S3Manager
+from backend.app.document.docling_processor import get_docling_processor
+from backend.app.document.storage import get_storage, LocalStorage
+from backend.app.document.url_cache import get_url_cache
+from backend.app.document.streaming import build_range_response
+from backend.app.document.pagination import apply_keyset, split_page
+from backend.app.document import search_index
+from backend.app.document.dedup import dedup_stats_statement, summarize_dedup_stats
+from backend.app.responses import etag_json_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -30,7 +43,11 @@ def convert_db_document(db_doc: DBDocument) -> Document:
             created_by=db_doc.created_by,
             file_type=db_doc.file_type,
             file_size=db_doc.file_size,
-            category=db_doc.category
+            category=db_doc.category,
+            thumbnail_s3_key=db_doc.thumbnail_s3_key,
+            thumbnail_generated=bool(db_doc.thumbnail_generated),
+            preview_s3_key=db_doc.preview_s3_key,
+            page_count=db_doc.page_count
         )
     except Exception as e:
         logger.error(f"Error converting document model: {str(e)}")
@@ -39,37 +56,49 @@ def convert_db_document(db_doc: DBDocument) -> Document:
             detail="Error processing document data"
         )
 
-@router.get("/list", response_model=List[Document])
+@router.get("/list", response_model=DocumentPage)
 async def list_documents(
+    request: Request,
     include_deleted: bool = False,
     category: Optional[str] = Query(None, enum=["Honeywell", "Tridium", "Johnson Controls", "General"]),
-    db: Session = Depends(get_db),
+    sort_by: str = Query("created_at", enum=["created_at", "filename", "category"]),
+    order: str = Query("desc", enum=["asc", "desc"]),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List documents with optional filters"""
+    """List documents with optional filters, one keyset page at a time"""
     try:
         logger.debug(f"Listing documents for user {current_user.username} (admin: {current_user.is_admin})")
-        query = db.query(DBDocument)
+        query = select(DBDocument)
 
         # Filter by deletion status
         if not include_deleted:
-            query = query.filter(DBDocument.status != DocumentStatus.DELETED)
+            query = query.where(DBDocument.status != DocumentStatus.DELETED)
 
         # Filter by user access
         if not current_user.is_admin:
-            query = query.filter(DBDocument.created_by == current_user.id)
+            query = query.where(DBDocument.created_by == current_user.id)
 
         # Filter by category if specified
         if category:
-            query = query.filter(DBDocument.category == category)
+            query = query.where(DBDocument.category == category)
 
         # Execute query
-        db_docs = query.all()
+        query = apply_keyset(query, sort_by, order, cursor, limit)
+        db_docs, next_cursor = split_page((await db.execute(query)).scalars().all(), sort_by, limit)
         logger.debug(f"Found {len(db_docs)} documents matching criteria")
 
-        # Convert to response model
-        return [convert_db_document(doc) for doc in db_docs]
+        # Convert to response model; unchanged pages are answered with 304
+        page = DocumentPage(
+            items=[convert_db_document(doc) for doc in db_docs],
+            next_cursor=next_cursor
+        )
+        return etag_json_response(request, page.model_dump(mode="json"))
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing documents: {str(e)}")
         raise HTTPException(
@@ -77,18 +106,18 @@ async def list_documents(
             detail=f"Error retrieving documents: {str(e)}"
         )
 
-@router.post("/upload", response_model=Document)
+@router.post("/upload", response_model=Document, dependencies=[Depends(admission("upload")), Depends(profile_request)])
 async def upload_document(
     file: UploadFile = File(...),
     category: str = Query("General", enum=["Honeywell", "Tridium", "Johnson Controls", "General"]),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Upload and process a new document"""
     try:
         logger.info(f"Processing upload request for {file.filename} from user {current_user.username}")
         doc_manager = DocumentManager(db)
-        doc_schema = doc_manager.upload_document(file, current_user, category)
+        doc_schema = await doc_manager.upload_document(file, current_user, category)
         return doc_schema
 
     except Exception as e:
@@ -101,35 +130,151 @@ async def upload_document(
 @router.get("/{document_id}/download_url")
 async def get_document_download_url(
     document_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Returns a presigned URL for this document's S3 object, if the user owns it or is admin.
+    The same URL is returned until shortly before it expires so the browser can cache the PDF.
     """
-    doc = db.query(DBDocument).filter(DBDocument.id == document_id).first()
+    doc = await db.get(DBDocument, document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     if doc.created_by != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    s3_manager = S3Manager()
-    presigned_url = s3_manager.get_presigned_url(doc.s3_key)
-    if not presigned_url:
+    presigned = get_url_cache().get_or_sign(
+        doc.id, current_user.id, doc.s3_key, get_storage().get_presigned_url
+    )
+    if not presigned:
         raise HTTPException(status_code=500, detail="Failed to generate presigned URL")
 
-    return {"url": presigned_url}
+    # Range-capable proxy link; cached like the presigned URL so it stays stable
+    stream = get_url_cache().get_or_sign(
+        doc.id, current_user.id, f"stream:{doc.s3_key}",
+        lambda _, expires_in: create_stream_token(current_user.username, doc.id, expires_in)
+    )
+    presigned["stream_url"] = f"documents/{doc.id}/stream?token={stream['url']}"
+    return presigned
+
+@router.api_route("/{document_id}/stream", methods=["GET", "HEAD"])
+async def stream_document(
+    document_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_stream_user)
+):
+    """
+    Stream the document with HTTP Range support so PDF viewers can fetch
+    byte ranges (and show page 1 of a linearized PDF) without downloading
+    the whole file. Responses carry ETag/Last-Modified for revalidation.
+    Locally stored files are served zero-copy where the server supports it.
+    """
+    doc = await db.get(DBDocument, document_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if doc.created_by != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    storage = get_storage()
+    head = await run_in_threadpool(storage.head_object, doc.s3_key)
+    if head is None:
+        raise HTTPException(status_code=404, detail="Document file not found")
+
+    return await build_range_response(
+        request,
+        size=head["size"],
+        etag=head["etag"],
+        last_modified=head["last_modified"],
+        media_type=doc.file_type or head["content_type"] or "application/octet-stream",
+        filename=doc.filename,
+        open_stream=lambda byte_range: storage.stream_object(doc.s3_key, byte_range),
+        file_path=storage.local_path(doc.s3_key)
+    )
+
+@router.get("/{document_id}/thumbnail")
+async def get_document_thumbnail(
+    document_id: str,
+    request: Request,
+    kind: str = Query("thumbnail", enum=["thumbnail", "preview"]),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Serve a pre-rendered thumbnail or preview image. Images are only ever
+    produced at ingestion or by the backfill script, never on request.
+    This URL stays the same when the image is re-rendered, so clients
+    revalidate with the image's ETag instead of caching it outright.
+    """
+    doc = await db.get(DBDocument, document_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if doc.created_by != current_user.id and not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    key = doc.thumbnail_s3_key if kind == "thumbnail" else doc.preview_s3_key
+    if not doc.thumbnail_generated or not key:
+        raise HTTPException(status_code=404, detail="Thumbnail not generated")
+
+    storage = get_storage()
+    head = await run_in_threadpool(storage.head_object, key)
+    if head is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+    return await build_range_response(
+        request,
+        size=head["size"],
+        etag=head["etag"],
+        last_modified=head["last_modified"],
+        media_type="image/png" if kind == "thumbnail" else "image/jpeg",
+        filename=os.path.basename(key),
+        open_stream=lambda byte_range: storage.stream_object(key, byte_range),
+        file_path=storage.local_path(key),
+        cache_control="private, no-cache"
+    )
+
+@router.api_route("/files/{key:path}", methods=["GET", "HEAD"])
+async def serve_local_file(
+    key: str,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...)
+):
+    """
+    Serve a file from local storage through a signed link; the local
+    backend's equivalent of an S3 presigned URL.
+    """
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Not found")
+    if not storage.verify_signature(key, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    file_path = storage.local_path(key)
+    head = await run_in_threadpool(storage.head_object, key)
+    if file_path is None or head is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    return await build_range_response(
+        request,
+        size=head["size"],
+        etag=head["etag"],
+        last_modified=head["last_modified"],
+        media_type="application/octet-stream",
+        filename=os.path.basename(key),
+        file_path=file_path
+    )
     
 @router.delete("/{document_id}", response_model=Document)
 async def delete_document(
     document_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark a document as deleted"""
     try:
         doc_manager = DocumentManager(db)
-        deleted_doc = doc_manager.delete_document(document_id, current_user)
+        deleted_doc = await doc_manager.delete_document(document_id, current_user)
         if not deleted_doc:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -146,36 +291,118 @@ async def delete_document(
             detail=f"Error deleting document: {str(e)}"
         )
 
-@router.get("/search", response_model=List[Document])
+@router.get("/search", response_model=DocumentSearchPage)
 async def search_documents(
+    request: Request,
     query: str,
     category: Optional[str] = Query(None, enum=["Honeywell", "Tridium", "Johnson Controls", "General"]),
-    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Search documents with vector-based retrieval"""
+    """
+    Full-text search over document metadata (filename, title, description,
+    tags) and extracted text, ranked by relevance with highlighted snippets.
+    """
     try:
-        # Build base query
-        q = db.query(DBDocument).filter(DBDocument.status != DocumentStatus.DELETED)
+        try:
+            offset = int(cursor) if cursor else 0
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
-        # Apply access control
-        if not current_user.is_admin:
-            q = q.filter(DBDocument.created_by == current_user.id)
+        results, has_more = await search_index.search(db, query, current_user, category, limit, offset)
+        items = [
+            DocumentSearchHit(**convert_db_document(doc).model_dump(), score=score, snippet=snippet)
+            for doc, score, snippet in results
+        ]
+        page = DocumentSearchPage(
+            items=items,
+            next_cursor=str(offset + limit) if has_more else None
+        )
+        return etag_json_response(request, page.model_dump(mode="json"))
 
-        # Apply category filter
-        if category:
-            q = q.filter(DBDocument.category == category)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching documents: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching documents: {str(e)}"
+        )
 
-        # Apply search filter
-        if query:
-            q = q.filter(DBDocument.filename.ilike(f"%{query}%"))
+@router.get("/semantic_search", response_model=List[DocumentSemanticHit])
+async def semantic_search_documents(
+    query: str,
+    category: Optional[str] = Query(None, enum=["Honeywell", "Tridium", "Johnson Controls", "General"]),
+    limit: int = Query(10, ge=1, le=50),
+    aggregate: str = Query("max", enum=["max", "mean"]),
+    top_n: int = Query(3, ge=1, le=10),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Rank the documents the user can see by how well their chunks match the
+    query, with the best-matching pages and snippets for each.
+    """
+    try:
+        document_ids = None
+        if not current_user.is_admin:
+            document_ids = (await db.execute(
+                select(DBDocument.id).where(
+                    DBDocument.created_by == current_user.id,
+                    DBDocument.status == DocumentStatus.COMPLETED
+                )
+            )).scalars().all()
+            if not document_ids:
+                return []
 
-        db_docs = q.all()
-        return [convert_db_document(d) for d in db_docs]
+        # Enough chunks that `limit` documents each get `top_n` candidates
+        ranked = await run_in_threadpool(
+            get_docling_processor().rank_documents,
+            query,
+            document_ids=document_ids,
+            category=category,
+            top_k=min(max(limit * top_n * 4, 50), 500),
+            aggregate=aggregate,
+            top_n=top_n
+        )
+        if not ranked:
+            return []
+
+        # Vectors can outlive their rows briefly, so drop deleted documents
+        rows = {
+            doc.id: doc for doc in (await db.execute(
+                select(DBDocument).where(
+                    DBDocument.id.in_([r["document_id"] for r in ranked]),
+                    DBDocument.status != DocumentStatus.DELETED
+                )
+            )).scalars()
+        }
+        return [
+            DocumentSemanticHit(
+                **convert_db_document(rows[r["document_id"]]).model_dump(),
+                score=r["score"],
+                page_numbers=r["page_numbers"],
+                matches=r["matches"]
+            )
+            for r in ranked if r["document_id"] in rows
+        ][:limit]
 
     except Exception as e:
-        logger.error(f"Error searching documents: {str(e)}")
+        logger.error(f"Error ranking documents: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error searching documents: {str(e)}"
+            detail=f"Error ranking documents: {str(e)}"
         )
+
+@router.get("/dedup_stats")
+async def get_dedup_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Indexed chunks, near-duplicates sharing a canonical vector, and the dedup ratio per category"""
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    rows = (await db.execute(dedup_stats_statement())).all()
+    return summarize_dedup_stats(rows)
@@ -0,0 +1,83 @@
+# app/routers/profiles.py
+import logging
+import re
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+
+from backend.app.auth.user_cache import CachedUser
+from backend.app.config import get_settings
+from backend.app.document.storage import get_storage
+from backend.app.profiling import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    ProfileSession,
+    end_session,
+    profile_key,
+    requested_kinds,
+    session_artifacts,
+    start_session
+)
+from backend.app.routers.auth import get_current_user
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/profiles", tags=["profiling"])
+settings = get_settings()
+
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+async def profile_request(
+    request: Request,
+    response: Response,
+    current_user: CachedUser = Depends(get_current_user)
+) -> AsyncIterator[Optional[ProfileSession]]:
+    """
+    Dependency that profiles the request when profiling is enabled and an
+    admin sends `X-Profile: cpu`, `memory` or `cpu,memory`. The profile id
+    is returned in `X-Profile-Id`; fetch the results from /profiles/{id}/{kind}.
+    """
+    header = request.headers.get(PROFILE_HEADER)
+    if not header or not settings.profiling_enabled:
+        yield None
+        return
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling is restricted to admins")
+
+    cpu, memory = requested_kinds(header)
+    session = start_session(f"{request.method} {request.url.path}", cpu=cpu, memory=memory)
+    response.headers[PROFILE_ID_HEADER] = session.id
+    try:
+        yield session
+    finally:
+        end_session(session)
+        storage = get_storage()
+        for key, body in session_artifacts(session):
+            if not await run_in_threadpool(storage.put_object, key, body, "application/json"):
+                logger.error(f"Could not store profile {key}")
+        logger.info(f"Stored profile {session.id} for {session.name}")
+
+@router.get("/{profile_id}/{kind}")
+async def download_profile(
+    profile_id: str,
+    kind: str,
+    current_user: CachedUser = Depends(get_current_user)
+):
+    """
+    Download a stored profile: `cpu` is a speedscope file (open it at
+    https://www.speedscope.app), `memory` the tracemalloc report.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
+    if kind not in ("cpu", "memory") or not _PROFILE_ID_RE.match(profile_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+    key = profile_key(profile_id, kind)
+    stored = await run_in_threadpool(get_storage().get_object, key)
+    if not stored or stored["body"] is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return Response(
+        content=stored["body"],
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{key.split("/")[-1]}"'}
+    )
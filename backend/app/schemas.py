@@ -62,6 +62,30 @@ class Document(DocumentBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class DocumentPage(BaseModel):
+    items: List[Document]
+    next_cursor: Optional[str] = None
+
+class DocumentSearchHit(Document):
+    score: float
+    snippet: Optional[str] = None  # Matched terms wrapped in <mark>...</mark>
+
+class DocumentSearchPage(BaseModel):
+    items: List[DocumentSearchHit]
+    next_cursor: Optional[str] = None
+
+class ChunkMatch(BaseModel):
+    chunk_id: str
+    score: float
+    section: Optional[str] = None
+    page_numbers: List[int] = []
+    snippet: str
+
+class DocumentSemanticHit(Document):
+    score: float
+    page_numbers: List[int] = []  # Pages of the best-matching chunks
+    matches: List[ChunkMatch] = []
+
 class ChatBase(BaseModel):
     title: str
 
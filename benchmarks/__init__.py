@@ -0,0 +1,22 @@
+# benchmarks/__init__.py
+"""Offline benchmarks for Tech RAG. Run modules with `python -m benchmarks.<name>`."""
+import os
+
+# Settings declares these as required; benchmarks never talk to the real services
+OFFLINE_ENV = {
+    "SECRET_KEY": "benchmark-secret",
+    "JWT_SECRET_KEY": "benchmark-jwt-secret",
+    "OPENAI_API_KEY": "sk-benchmark",
+    "PINECONE_API_KEY": "benchmark",
+    "PINECONE_ENVIRONMENT": "benchmark",
+    "PINECONE_INDEX_NAME": "benchmark",
+    "LANGCHAIN_ENDPOINT": "http://localhost",
+    "LANGCHAIN_API_KEY": "benchmark",
+    "LANGCHAIN_PROJECT": "benchmark",
+}
+
+
+def offline_env(**overrides: str) -> None:
+    """Fill in placeholder settings before any backend module is imported."""
+    for key, value in {**OFFLINE_ENV, **overrides}.items():
+        os.environ.setdefault(key, value)
@@ -0,0 +1,122 @@
+# benchmarks/auth.py
+"""Measure the per-request overhead of authentication.
+
+Compares token-to-user resolution with and without the user cache, and
+event-loop stall during concurrent logins with bcrypt on- and off-loop.
+
+    python -m benchmarks.auth --requests 2000 --logins 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from benchmarks import offline_env
+
+_db_dir = tempfile.mkdtemp(prefix="bench-auth-")
+offline_env(DATABASE_URL=f"sqlite:///{os.path.join(_db_dir, 'auth.db')}")
+
+from backend.app.auth.auth import create_access_token, get_password_hash, authenticate_user, authenticate_user_async
+from backend.app.auth.user_cache import get_user_cache
+from backend.app.database.database import AsyncSessionLocal, SessionLocal, init_db
+from backend.app.database.models import User
+from backend.app.routers.auth import get_current_user
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(samples):
+    return {
+        "mean_us": round(statistics.mean(samples) * 1e6, 1),
+        "p50_us": round(percentile(samples, 50) * 1e6, 1),
+        "p95_us": round(percentile(samples, 95) * 1e6, 1),
+    }
+
+
+async def time_resolution(token: str, requests: int, cached: bool):
+    cache = get_user_cache()
+    cache.clear()
+    ttl = cache.ttl_seconds
+    cache.ttl_seconds = ttl if cached else 0
+    samples = []
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            await get_current_user(token)
+            samples.append(time.perf_counter() - start)
+    finally:
+        cache.ttl_seconds = ttl
+    return summarize(samples)
+
+
+async def time_login_stall(username: str, password: str, logins: int, off_loop: bool):
+    """Largest gap between 1 ms ticks on the loop while logins run."""
+    gaps = []
+    running = True
+
+    async def ticker():
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    async def login():
+        if off_loop:
+            async with AsyncSessionLocal() as db:
+                await authenticate_user_async(db, username, password)
+        else:
+            db = SessionLocal()
+            try:
+                authenticate_user(db, username, password)
+            finally:
+                db.close()
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return {"max_loop_stall_ms": round(max(gaps) * 1000, 1), "total_s": round(elapsed, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--logins", type=int, default=8)
+    args = parser.parse_args()
+
+    init_db()
+    username, password = f"bench-{uuid.uuid4().hex[:8]}", "bench-password"
+    db = SessionLocal()
+    db.add(User(id=str(uuid.uuid4()), username=username, password=get_password_hash(password), is_admin=False))
+    db.commit()
+    db.close()
+    token = create_access_token({"sub": username})
+
+    async def run():
+        return {
+            "resolve_user": {
+                "uncached": await time_resolution(token, args.requests, cached=False),
+                "cached": await time_resolution(token, args.requests, cached=True),
+            },
+            "login": {
+                "bcrypt_on_loop": await time_login_stall(username, password, args.logins, off_loop=False),
+                "bcrypt_off_loop": await time_login_stall(username, password, args.logins, off_loop=True),
+            },
+        }
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/corpus.py
+"""Generate a deterministic corpus of technical-manual-like PDFs.
+
+Pages carry numbered section headings, prose built from building
+automation vocabulary and a small parameter table, so Docling produces
+realistic headings, paragraphs and tables to chunk.
+"""
+import os
+import random
+from typing import Dict, List
+
+TOPICS = [
+    "Controller Installation", "BACnet Configuration", "Alarm Management", "Trend Logging",
+    "VAV Box Commissioning", "Chiller Plant Sequencing", "Network Wiring", "Firmware Upgrade",
+    "Point Mapping", "Schedule Programming", "Sensor Calibration", "Fault Diagnostics",
+]
+NOUNS = [
+    "controller", "setpoint", "damper", "actuator", "sensor", "schedule", "alarm", "trend",
+    "supervisor", "station", "module", "relay", "valve", "fan", "zone", "loop", "driver",
+    "network", "device", "terminal", "register", "point", "override", "interlock",
+]
+VERBS = [
+    "configure", "verify", "calibrate", "commission", "reset", "monitor", "enable",
+    "disable", "map", "assign", "acknowledge", "override", "restore", "inspect",
+]
+UNITS = ["degF", "degC", "%RH", "Pa", "in.wc", "cfm", "psi", "V", "mA"]
+
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(VERBS).capitalize(), "the", rng.choice(NOUNS)]
+    for _ in range(rng.randint(6, 14)):
+        words.append(rng.choice(NOUNS + VERBS + ["the", "and", "before", "after", "each", "with"]))
+    return " ".join(words) + "."
+
+
+def page_content(rng: random.Random, page: int, topic: str) -> Dict:
+    return {
+        "heading": f"{page}.{rng.randint(1, 9)} {topic}: {rng.choice(NOUNS).capitalize()} {rng.choice(VERBS)}",
+        "paragraphs": [" ".join(sentence(rng) for _ in range(rng.randint(3, 6))) for _ in range(rng.randint(2, 4))],
+        "table": [
+            (f"{rng.choice(NOUNS).upper()}-{rng.randint(100, 999)}", f"{rng.uniform(0, 100):.1f}", rng.choice(UNITS))
+            for _ in range(rng.randint(3, 6))
+        ],
+    }
+
+
+def generate_pdf(path: str, pages: int, seed: int = 0) -> str:
+    """Write a `pages`-page PDF to `path` (PyMuPDF is imported lazily)."""
+    import fitz
+
+    rng = random.Random(seed)
+    topic = rng.choice(TOPICS)
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        content = page_content(rng, number, topic)
+        page = doc.new_page()
+        y = 72
+        page.insert_text((72, y), content["heading"], fontsize=14)
+        y += 28
+        for paragraph in content["paragraphs"]:
+            rect = fitz.Rect(72, y, page.rect.width - 72, y + 120)
+            page.insert_textbox(rect, paragraph, fontsize=10)
+            y += 125
+        for name, value, unit in content["table"]:
+            page.insert_text((72, y), name, fontsize=10)
+            page.insert_text((260, y), value, fontsize=10)
+            page.insert_text((360, y), unit, fontsize=10)
+            y += 16
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def build_corpus(directory: str, page_counts: List[int], per_size: int = 1, revisions: int = 0) -> List[Dict]:
+    """Generate (or reuse) PDFs for each page count; returns [{"path", "pages"}].
+
+    Each manual gets `revisions` extra copies with the same content, like
+    successive product revisions that repeat most of their text.
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for pages in page_counts:
+        for i in range(per_size):
+            for revision in range(revisions + 1):
+                suffix = f"-rev{revision}" if revision else ""
+                path = os.path.join(directory, f"manual-{pages:04d}p-{i}{suffix}.pdf")
+                if not os.path.exists(path):
+                    generate_pdf(path, pages, seed=pages * 1000 + i)
+                corpus.append({"path": path, "pages": pages})
+    return corpus
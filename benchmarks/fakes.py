@@ -0,0 +1,281 @@
+# benchmarks/fakes.py
+"""In-process stand-ins for S3, OpenAI embeddings and chat, and Pinecone.
+
+Each fake can inject latency so benchmarks reflect network-bound stages
+without calling the real services. Calls go through the same `timed`
+stages as the real clients, so the metrics breakdown stays comparable.
+"""
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.app.document.storage import LocalStorage
+from backend.app.metrics import count, timed
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class Latency:
+    """Sleep for `fixed_ms` plus `per_item_ms` per item, with optional jitter."""
+
+    def __init__(self, fixed_ms: float = 0.0, per_item_ms: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.fixed_ms = fixed_ms
+        self.per_item_ms = per_item_ms
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self, items: int = 1) -> None:
+        delay = self.fixed_ms + self.per_item_ms * items
+        if delay <= 0:
+            return
+        if self.jitter:
+            with self._lock:
+                delay *= 1 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(delay / 1000)
+
+
+class FakeS3(LocalStorage):
+    """LocalStorage that behaves like a remote bucket.
+
+    Every request pays the injected latency, and local_path() returns None
+    so the pipeline downloads objects the way it does from S3.
+    """
+
+    def __init__(self, root: str, latency: Optional[Latency] = None):
+        super().__init__(root, signing_key="benchmark")
+        self.latency = latency or Latency()
+
+    def _request(self, stage: str, func, *args, **kwargs):
+        with timed(stage):
+            self.latency.wait()
+            return func(*args, **kwargs)
+
+    def upload_file(self, local_path: str, key: str) -> bool:
+        return self._request("s3_put", super().upload_file, local_path, key)
+
+    def put_object(self, key: str, body: bytes, content_type: Optional[str] = None) -> bool:
+        count("s3_put", len(body))
+        return self._request("s3_put", super().put_object, key, body, content_type)
+
+    def download_file(self, key: str, local_path: str) -> bool:
+        return self._request("s3_get", super().download_file, key, local_path)
+
+    def get_object(self, key: str, if_none_match: Optional[str] = None) -> Optional[Dict]:
+        return self._request("s3_get", super().get_object, key, if_none_match)
+
+    def get_range(self, key: str, start: int, end: int) -> Optional[bytes]:
+        return self._request("s3_get", super().get_range, key, start, end)
+
+    def head_object(self, key: str) -> Optional[Dict]:
+        return self._request("s3_head", super().head_object, key)
+
+    def delete_file(self, key: str) -> bool:
+        return self._request("s3_delete", super().delete_file, key)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+
+class HashingEmbeddings:
+    """Deterministic bag-of-words embedder with the OpenAIEmbeddings interface.
+
+    Tokens are hashed into a signed `dimensions`-wide vector and
+    L2-normalised, so texts sharing words get high cosine similarity.
+    """
+
+    def __init__(self, dimensions: int = 256, latency: Optional[Latency] = None):
+        self.dimensions = dimensions
+        self.latency = latency or Latency()
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in _TOKEN_RE.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _record(self, texts: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.texts += texts
+
+    def embed_query(self, text: str) -> List[float]:
+        self._record(1)
+        self.latency.wait(1)
+        return self._embed(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._record(len(texts))
+        self.latency.wait(len(texts))
+        return [self._embed(text) for text in texts]
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    values = value if isinstance(value, list) else [value]
+    if op == "$eq":
+        return operand in values
+    if op == "$ne":
+        return operand not in values
+    if op == "$in":
+        return any(v in operand for v in values)
+    if op == "$nin":
+        return not any(v in operand for v in values)
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def matches_filter(metadata: Dict, filter_dict: Optional[Dict]) -> bool:
+    """Evaluate a Pinecone metadata filter ($eq/$in/$and/$or/... and list fields)."""
+    if not filter_dict:
+        return True
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, f) for f in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, f) for f in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(_compare(metadata.get(key), op, operand) for op, operand in condition.items()):
+                return False
+        elif not _compare(metadata.get(key), "$eq", condition):
+            return False
+    return True
+
+
+class FakeIndex:
+    """Brute-force in-memory vector index with Pinecone's Index interface.
+
+    Supports namespaces, metadata filters, upsert, update, query and delete.
+    Scores are cosine similarities (vectors are normalised on upsert).
+    """
+
+    def __init__(self, latency: Optional[Latency] = None):
+        self.latency = latency or Latency()
+        self._namespaces: Dict[str, Dict[str, Tuple[np.ndarray, Dict]]] = {}
+        self._lock = threading.Lock()
+        self.queries = 0
+        # Vectors that passed the filter and were scored, summed over queries
+        self.scored = 0
+
+    def upsert(self, vectors: Iterable[Dict], namespace: str = "", **kwargs) -> Dict:
+        vectors = list(vectors)
+        self.latency.wait(len(vectors))
+        with self._lock:
+            space = self._namespaces.setdefault(namespace, {})
+            for v in vectors:
+                values = np.asarray(v["values"], dtype=np.float32)
+                norm = float(np.linalg.norm(values)) or 1.0
+                space[v["id"]] = (values / norm, dict(v.get("metadata") or {}))
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector: List[float], top_k: int = 10, filter: Optional[Dict] = None,
+              include_metadata: bool = False, namespace: str = "", **kwargs) -> SimpleNamespace:
+        self.latency.wait()
+        with self._lock:
+            self.queries += 1
+            candidates = [
+                (vector_id, values, metadata)
+                for vector_id, (values, metadata) in self._namespaces.get(namespace, {}).items()
+                if matches_filter(metadata, filter)
+            ]
+            self.scored += len(candidates)
+        if not candidates:
+            return SimpleNamespace(matches=[])
+
+        query = np.asarray(vector, dtype=np.float32)
+        query /= float(np.linalg.norm(query)) or 1.0
+        scores = np.stack([c[1] for c in candidates]) @ query
+        top = np.argsort(-scores)[:top_k]
+        return SimpleNamespace(matches=[
+            SimpleNamespace(
+                id=candidates[i][0],
+                score=float(scores[i]),
+                metadata=candidates[i][2] if include_metadata else None
+            )
+            for i in top
+        ])
+
+    def update(self, id: str, set_metadata: Optional[Dict] = None, namespace: str = "", **kwargs) -> Dict:
+        self.latency.wait()
+        with self._lock:
+            entry = self._namespaces.get(namespace, {}).get(id)
+            if entry is not None and set_metadata:
+                entry[1].update(set_metadata)
+        return {}
+
+    def fetch(self, ids: List[str], namespace: str = "", **kwargs) -> SimpleNamespace:
+        self.latency.wait()
+        with self._lock:
+            space = self._namespaces.get(namespace, {})
+            return SimpleNamespace(vectors={
+                vector_id: SimpleNamespace(id=vector_id, values=space[vector_id][0].tolist(), metadata=space[vector_id][1])
+                for vector_id in ids if vector_id in space
+            })
+
+    def delete(self, ids: Optional[List[str]] = None, filter: Optional[Dict] = None,
+               delete_all: bool = False, namespace: str = "", **kwargs) -> Dict:
+        self.latency.wait()
+        with self._lock:
+            space = self._namespaces.setdefault(namespace, {})
+            if delete_all:
+                space.clear()
+            for vector_id in ids or []:
+                space.pop(vector_id, None)
+            if filter:
+                for vector_id in [k for k, (_, m) in space.items() if matches_filter(m, filter)]:
+                    del space[vector_id]
+        return {}
+
+    def describe_index_stats(self, **kwargs) -> Dict:
+        with self._lock:
+            namespaces = {name: {"vector_count": len(space)} for name, space in self._namespaces.items()}
+        return {"namespaces": namespaces, "total_vector_count": sum(n["vector_count"] for n in namespaces.values())}
+
+
+class FakeChatModel:
+    """Stand-in for ChatOpenAI.generate that answers from the prompt's context.
+
+    The answer reuses the first sentences of the supplied context so the
+    citation aligner has real overlap to work with.
+    """
+
+    def __init__(self, latency: Optional[Latency] = None, answer_sentences: int = 3):
+        self.latency = latency or Latency()
+        self.answer_sentences = answer_sentences
+        self.calls = 0
+
+    def generate(self, batches: List[List[Any]]) -> SimpleNamespace:
+        self.calls += 1
+        generations = []
+        for messages in batches:
+            prompt = messages[-1].content if messages else ""
+            # Longer prompts cost more, roughly as they would for a real model
+            self.latency.wait(len(prompt) // 4000 + 1)
+            context = prompt.split("Content:", 1)[-1]
+            sentences = [s.strip() for s in context.split(".") if len(s.split()) > 4][:self.answer_sentences]
+            text = ". ".join(sentences) + "." if sentences else "The documents do not cover this."
+            generations.append([SimpleNamespace(text=text)])
+        return SimpleNamespace(generations=generations)
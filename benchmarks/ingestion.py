@@ -0,0 +1,182 @@
+# benchmarks/ingestion.py
+"""Measure ingestion throughput against in-process S3, embeddings and Pinecone.
+
+Runs `DoclingProcessor.process_and_index_document` (mode "processor") and
+the full `DocumentManager.upload_document` path (mode "upload") over a
+generated corpus of PDFs and reports pages/s, chunks/s, peak RSS, a
+per-stage time breakdown and the near-duplicate ratio per category
+(--revisions adds repeated manuals). Results are printed and written as JSON.
+
+    python -m benchmarks.ingestion --pages 1 10 50 --embed-latency-ms 80 --output ingestion.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from benchmarks import offline_env
+
+_work_dir = tempfile.mkdtemp(prefix="bench-ingest-")
+offline_env(
+    DATABASE_URL=f"sqlite:///{os.path.join(_work_dir, 'ingest.db')}",
+    STORAGE_BACKEND="local",
+    LOCAL_STORAGE_ROOT=os.path.join(_work_dir, "storage"),
+)
+
+from starlette.datastructures import Headers, UploadFile
+
+from backend.app.database.database import AsyncSessionLocal, SessionLocal, init_db
+from backend.app.database.models import User
+from backend.app.document.dedup import dedup_stats_statement, summarize_dedup_stats
+from backend.app.document.docling_processor import DoclingProcessor
+from backend.app.document.document_manager import DocumentManager
+from backend.app.document.search_index import ensure_fulltext_schema
+from backend.app.document.thumbnails import ThumbnailGenerator
+from benchmarks.corpus import build_corpus
+from benchmarks.fakes import FakeIndex, FakeS3, HashingEmbeddings, Latency
+from benchmarks.stats import peak_rss_mb, stage_breakdown, stage_totals
+
+
+def chunk_vectors(index) -> int:
+    """Chunk vectors in the default namespace (section summaries are kept apart)."""
+    return index.describe_index_stats()["namespaces"].get("", {}).get("vector_count", 0)
+
+
+def summarize_run(mode: str, rows, elapsed: float, before, after):
+    pages = sum(r["pages"] for r in rows)
+    chunks = sum(r["chunks"] for r in rows)
+    return {
+        "mode": mode,
+        "documents": len(rows),
+        "failed": sum(1 for r in rows if not r["ok"]),
+        "pages": pages,
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 3) if elapsed else None,
+        "chunks_per_s": round(chunks / elapsed, 3) if elapsed else None,
+        "per_document": rows,
+        "stages": stage_breakdown(before, after),
+    }
+
+
+def run_processor(processor: DoclingProcessor, storage: FakeS3, corpus):
+    rows = []
+    before = stage_totals()
+    start = time.perf_counter()
+    for item in corpus:
+        document_id = str(uuid.uuid4())
+        key = f"documents/bench/{document_id}/{os.path.basename(item['path'])}"
+        with open(item["path"], "rb") as f:
+            storage.put_object(key, f.read(), "application/pdf")
+
+        doc_start = time.perf_counter()
+        result = processor.process_and_index_document(document_id, key, {"category": "General", "uploaded_by": "bench"})
+        rows.append({
+            "file": os.path.basename(item["path"]),
+            "pages": item["pages"],
+            "chunks": result.get("indexed_chunks", 0),
+            "seconds": round(time.perf_counter() - doc_start, 3),
+            "ok": result["status"] == "success",
+        })
+    return summarize_run("processor", rows, time.perf_counter() - start, before, stage_totals())
+
+
+async def run_upload(processor: DoclingProcessor, storage: FakeS3, corpus, user: User):
+    rows = []
+    thumbnails = ThumbnailGenerator(storage, max_workers=2)
+    before = stage_totals()
+    start = time.perf_counter()
+    try:
+        for item in corpus:
+            with open(item["path"], "rb") as f:
+                upload = UploadFile(
+                    file=io.BytesIO(f.read()),
+                    filename=os.path.basename(item["path"]),
+                    headers=Headers({"content-type": "application/pdf"}),
+                )
+            vectors_before = chunk_vectors(processor.index)
+            doc_start = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                manager = DocumentManager(db, storage=storage, processor=processor, thumbnails=thumbnails)
+                document = await manager.upload_document(upload, user, "General")
+            rows.append({
+                "file": upload.filename,
+                "pages": item["pages"],
+                "chunks": chunk_vectors(processor.index) - vectors_before,
+                "seconds": round(time.perf_counter() - doc_start, 3),
+                "ok": document.status == "completed",
+            })
+    finally:
+        thumbnails.shutdown()
+    return summarize_run("upload", rows, time.perf_counter() - start, before, stage_totals())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50], help="Page counts of generated PDFs")
+    parser.add_argument("--per-size", type=int, default=1, help="Documents per page count")
+    parser.add_argument("--revisions", type=int, default=0, help="Repeated copies of each manual, to measure dedup")
+    parser.add_argument("--mode", choices=["processor", "upload", "both"], default="both")
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "tech-rag-bench-corpus"))
+    parser.add_argument("--s3-latency-ms", type=float, default=20.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=60.0, help="Per embedding request")
+    parser.add_argument("--embed-item-latency-ms", type=float, default=0.5, help="Per text in a request")
+    parser.add_argument("--index-latency-ms", type=float, default=15.0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.corpus_dir, args.pages, args.per_size, args.revisions)
+    storage = FakeS3(os.path.join(_work_dir, "s3"), Latency(args.s3_latency_ms, jitter=0.2))
+    embeddings = HashingEmbeddings(latency=Latency(args.embed_latency_ms, args.embed_item_latency_ms, jitter=0.2))
+    index = FakeIndex(Latency(args.index_latency_ms, jitter=0.2))
+
+    # Chunk signatures for duplicate detection live in the database
+    init_db()
+    setup_start = time.perf_counter()
+    processor = DoclingProcessor(storage=storage, embeddings=embeddings, index=index)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "processor_setup_s": round(time.perf_counter() - setup_start, 3),
+        "runs": [],
+    }
+
+    if args.mode in ("processor", "both"):
+        report["runs"].append(run_processor(processor, storage, corpus))
+
+    if args.mode in ("upload", "both"):
+        db = SessionLocal()
+        user = User(id=str(uuid.uuid4()), username=f"bench-{uuid.uuid4().hex[:8]}", password="x", is_admin=True)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.close()
+
+        async def upload():
+            await ensure_fulltext_schema()
+            return await run_upload(processor, storage, corpus, user)
+
+        report["runs"].append(asyncio.run(upload()))
+
+    report["embedding_requests"] = embeddings.calls
+    with SessionLocal() as db:
+        report["dedup"] = summarize_dedup_stats(db.execute(dedup_stats_statement()).all())
+    report["embedded_texts"] = embeddings.texts
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    output = json.dumps(report, indent=2, default=str)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+# benchmarks/load_test.py
+"""Load-test the API with a realistic request mix at stepped arrival rates.
+
+Virtual technicians log in through /auth/login, then requests arrive
+open-loop (Poisson) at each rate in --rates, picked from a weighted mix of
+list, search, download_url and chat/ask (upload optional). For every step
+the report gives throughput, latency percentiles and error rate per route,
+plus worker-thread pool usage scraped from /metrics, and names the first
+rate at which the node saturates.
+
+By default the app runs in-process under uvicorn with SQLite, local
+storage and fake embeddings/index/LLM seeded with a synthetic library.
+Pass --base-url to load an existing deployment instead.
+
+    python -m benchmarks.load_test --rates 5 10 20 40 --step-seconds 20
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks import offline_env
+
+_work_dir = tempfile.mkdtemp(prefix="bench-load-")
+offline_env(
+    DATABASE_URL=f"sqlite:///{os.path.join(_work_dir, 'load.db')}",
+    STORAGE_BACKEND="local",
+    LOCAL_STORAGE_ROOT=os.path.join(_work_dir, "storage"),
+    # Measure the node, not the per-user limits (ADMISSION_ENABLED=true to include them)
+    ADMISSION_ENABLED="false",
+)
+
+import requests
+
+from backend.app.config import get_settings
+from benchmarks.stats import latency_summary
+
+DEFAULT_MIX = {"list": 40, "search": 25, "download_url": 20, "chat": 15, "upload": 0}
+QUESTIONS = [
+    "How do I commission a VAV box?", "What is the alarm acknowledge procedure?",
+    "How do I calibrate the zone sensor?", "Which firmware versions support BACnet MS/TP?",
+    "How do I override a schedule?", "What wiring is required for the supervisor network?",
+]
+_GAUGE_RE = re.compile(r"^(techrag_threadpool_\w+)\s+([0-9.eE+-]+)$", re.MULTILINE)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stub_external_services(args):
+    """Point the app at in-process fakes for Pinecone, OpenAI and S3.
+
+    The app resolves its processor through get_docling_processor() and
+    builds its chat model per request via build_chat_model(), so those
+    names are rebound in the modules that use them.
+    """
+    from backend.app.chat import chat_manager
+    from backend.app.document import document_manager
+    from backend.app.document.docling_processor import DoclingProcessor
+    from backend.app.document.storage import get_storage
+    from backend.app.routers import chat as chat_router, documents as documents_router
+    from benchmarks.fakes import FakeChatModel, FakeIndex, HashingEmbeddings, Latency
+
+    processor = DoclingProcessor(
+        storage=get_storage(),
+        embeddings=HashingEmbeddings(latency=Latency(args.embed_latency_ms, jitter=0.2)),
+        index=FakeIndex(Latency(args.index_latency_ms, jitter=0.2)),
+    )
+    llm = FakeChatModel(Latency(args.llm_latency_ms, jitter=0.3))
+    for module in (chat_router, documents_router, chat_manager, document_manager):
+        module.get_docling_processor = lambda: processor
+    chat_manager.build_chat_model = lambda: llm
+    return processor
+
+
+def seed_library(processor, users: int, documents_per_user: int, chunks_per_document: int) -> List[Dict]:
+    """Create users, completed documents, their chunks in the index and FTS rows."""
+    import asyncio
+
+    from backend.app.auth.auth import get_password_hash
+    from backend.app.database.database import AsyncSessionLocal, SessionLocal, init_db
+    from backend.app.database.models import Document, DocumentStatus, User
+    from backend.app.document import search_index
+    from benchmarks.corpus import page_content
+
+    init_db()
+    rng = random.Random(7)
+    password_hash = get_password_hash("load-test")
+    accounts, document_ids = [], []
+    db = SessionLocal()
+    for u in range(users):
+        user = User(id=str(uuid.uuid4()), username=f"tech{u:03d}", password=password_hash, is_admin=False)
+        db.add(user)
+        accounts.append({"username": user.username, "password": "load-test", "id": user.id})
+        for d in range(documents_per_user):
+            document_id = str(uuid.uuid4())
+            s3_key = f"documents/{user.id}/{document_id}/manual-{d}.pdf"
+            processor.storage.put_object(s3_key, b"%PDF-1.4\n%load-test\n", "application/pdf")
+            doc = Document(
+                id=document_id, filename=f"manual-{u}-{d}.pdf", s3_key=s3_key,
+                status=DocumentStatus.COMPLETED, created_by=user.id, file_type="application/pdf",
+                file_size=20, category="General", total_chunks=chunks_per_document
+            )
+            db.add(doc)
+            document_ids.append(document_id)
+
+            vectors = []
+            for c in range(chunks_per_document):
+                content = page_content(rng, c + 1, "Controller Installation")
+                text = content["heading"] + ". " + " ".join(content["paragraphs"])
+                vectors.append({
+                    "id": f"{document_id}_chunk_{c}",
+                    "values": processor.embeddings.embed_query(text),
+                    "metadata": {
+                        "document_id": document_id, "s3_key": s3_key, "title": content["heading"],
+                        "page_numbers": [c + 1], "chunk_text": text, "category": "General",
+                    },
+                })
+            processor.index.upsert(vectors=vectors)
+    db.commit()
+    db.close()
+
+    async def index_fulltext():
+        await search_index.ensure_fulltext_schema()
+        async with AsyncSessionLocal() as session:
+            for document_id in document_ids:
+                await search_index.index_document(session, await session.get(Document, document_id), None)
+            await session.commit()
+
+    asyncio.run(index_fulltext())
+    return accounts
+
+
+def start_server(port: int):
+    import uvicorn
+
+    from backend.app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+class VirtualUser:
+    def __init__(self, api: str, username: str, password: str):
+        self.api = api
+        self.session = requests.Session()
+        response = self.session.post(f"{api}/auth/login", data={"username": username, "password": password})
+        response.raise_for_status()
+        self.session.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        page = self.session.get(f"{api}/documents/list", params={"limit": 200}).json()
+        self.document_ids = [d["id"] for d in page["items"]]
+
+    def request(self, route: str, rng: random.Random, upload_file: Optional[str]) -> requests.Response:
+        if route == "list":
+            return self.session.get(f"{self.api}/documents/list", params={"limit": 50})
+        if route == "search":
+            return self.session.get(f"{self.api}/documents/search", params={"query": rng.choice(["alarm", "wiring", "sensor calibration", "firmware"])})
+        if route == "download_url":
+            return self.session.get(f"{self.api}/documents/{rng.choice(self.document_ids)}/download_url")
+        if route == "chat":
+            return self.session.post(f"{self.api}/chat/ask", json={
+                "document_id": rng.choice(self.document_ids), "query": rng.choice(QUESTIONS), "history": []
+            })
+        if route == "upload":
+            with open(upload_file, "rb") as f:
+                return self.session.post(f"{self.api}/documents/upload", params={"category": "General"},
+                                         files={"file": (os.path.basename(upload_file), f, "application/pdf")})
+        raise ValueError(route)
+
+
+def scrape_threadpool(metrics_url: str, samples: List[Dict], stop: threading.Event, interval: float = 0.25) -> None:
+    while not stop.wait(interval):
+        try:
+            text = requests.get(metrics_url, timeout=2).text
+        except requests.RequestException:
+            continue
+        samples.append({name: float(value) for name, value in _GAUGE_RE.findall(text)})
+
+
+def run_step(users: List[VirtualUser], mix: Dict[str, int], rate: float, seconds: float,
+             metrics_url: str, pool: ThreadPoolExecutor, upload_file: Optional[str], seed: int) -> Dict:
+    rng = random.Random(seed)
+    routes, weights = zip(*[(r, w) for r, w in mix.items() if w > 0])
+    results: List[Dict] = []
+    lock = threading.Lock()
+
+    def fire(user: VirtualUser, route: str, request_rng: random.Random):
+        start = time.perf_counter()
+        try:
+            status = user.request(route, request_rng, upload_file).status_code
+        except requests.RequestException:
+            status = 0
+        with lock:
+            results.append({"route": route, "status": status, "latency": time.perf_counter() - start})
+
+    threadpool_samples: List[Dict] = []
+    stop = threading.Event()
+    scraper = threading.Thread(target=scrape_threadpool, args=(metrics_url, threadpool_samples, stop), daemon=True)
+    scraper.start()
+
+    futures = []
+    step_start = time.perf_counter()
+    next_arrival = step_start
+    while next_arrival < step_start + seconds:
+        time.sleep(max(0.0, next_arrival - time.perf_counter()))
+        route = rng.choices(routes, weights)[0]
+        futures.append(pool.submit(fire, rng.choice(users), route, random.Random(rng.random())))
+        next_arrival += rng.expovariate(rate)
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - step_start
+    stop.set()
+    scraper.join()
+
+    per_route = {}
+    for route in routes:
+        rows = [r for r in results if r["route"] == route]
+        if not rows:
+            continue
+        errors = sum(1 for r in rows if not 200 <= r["status"] < 400)
+        per_route[route] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / elapsed, 2),
+            "error_rate": round(errors / len(rows), 4),
+            **latency_summary([r["latency"] for r in rows]),
+        }
+
+    busy = [s.get("techrag_threadpool_busy_threads", 0) for s in threadpool_samples]
+    waiting = [s.get("techrag_threadpool_waiting_tasks", 0) for s in threadpool_samples]
+    size = max((s.get("techrag_threadpool_size_threads", 0) for s in threadpool_samples), default=0)
+    all_latencies = [r["latency"] for r in results]
+    return {
+        "offered_rps": rate,
+        "achieved_rps": round(len(results) / elapsed, 2),
+        "error_rate": round(sum(1 for r in results if not 200 <= r["status"] < 400) / (len(results) or 1), 4),
+        **latency_summary(all_latencies),
+        "threadpool": {
+            "size": size,
+            "max_busy": max(busy, default=0),
+            "max_waiting": max(waiting, default=0),
+            "exhausted": bool(size) and (max(busy, default=0) >= size or max(waiting, default=0) > 0),
+        },
+        "routes": per_route,
+    }
+
+
+def find_saturation(steps: List[Dict]) -> Optional[Dict]:
+    """First step where throughput falls behind, errors appear, tail latency
+    balloons against the lightest step, or the worker-thread pool runs out."""
+    if not steps:
+        return None
+    baseline_p95 = steps[0].get("p95_ms") or 0
+    for step in steps:
+        reasons = []
+        if step["achieved_rps"] < 0.9 * step["offered_rps"]:
+            reasons.append("throughput below offered rate")
+        if step["error_rate"] > 0.01:
+            reasons.append("error rate above 1%")
+        if baseline_p95 and step.get("p95_ms", 0) > 3 * baseline_p95:
+            reasons.append("p95 latency above 3x baseline")
+        if step["threadpool"]["exhausted"]:
+            reasons.append("worker-thread pool exhausted (sync routes / run_in_threadpool queueing)")
+        if reasons:
+            return {"offered_rps": step["offered_rps"], "reasons": reasons}
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="Load an existing deployment (e.g. http://host:8000) instead of in-process")
+    parser.add_argument("--credentials", nargs="+", default=[], help="username:password pairs for --base-url")
+    parser.add_argument("--rates", type=float, nargs="+", default=[5, 10, 20, 40], help="Requests/second per step")
+    parser.add_argument("--step-seconds", type=float, default=20.0)
+    parser.add_argument("--mix", nargs="+", default=[], help="route=weight overrides, e.g. chat=30 upload=1")
+    parser.add_argument("--users", type=int, default=20, help="Virtual technicians (in-process mode)")
+    parser.add_argument("--documents-per-user", type=int, default=10)
+    parser.add_argument("--chunks-per-document", type=int, default=40)
+    parser.add_argument("--upload-file", help="PDF to send for the upload route")
+    parser.add_argument("--client-threads", type=int, default=256)
+    parser.add_argument("--embed-latency-ms", type=float, default=60.0)
+    parser.add_argument("--index-latency-ms", type=float, default=20.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=1500.0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    mix = dict(DEFAULT_MIX)
+    for item in args.mix:
+        route, weight = item.split("=")
+        mix[route] = int(weight)
+    if mix.get("upload") and not args.upload_file:
+        parser.error("the upload route needs --upload-file")
+
+    server = None
+    if args.base_url:
+        base_url = args.base_url.rstrip("/")
+        accounts = [dict(zip(("username", "password"), c.split(":", 1))) for c in args.credentials]
+        if not accounts:
+            parser.error("--base-url needs --credentials")
+    else:
+        processor = stub_external_services(args)
+        accounts = seed_library(processor, args.users, args.documents_per_user, args.chunks_per_document)
+        port = free_port()
+        server = start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    api = base_url + get_settings().api_prefix
+    users = [VirtualUser(api, a["username"], a["password"]) for a in accounts]
+    users = [u for u in users if u.document_ids] or users
+
+    steps = []
+    with ThreadPoolExecutor(max_workers=args.client_threads) as pool:
+        for i, rate in enumerate(args.rates):
+            steps.append(run_step(users, mix, rate, args.step_seconds, f"{base_url}/metrics", pool, args.upload_file, seed=i))
+
+    if server is not None:
+        server.should_exit = True
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "target": args.base_url or "in-process",
+        "mix": mix,
+        "users": len(users),
+        "steps": steps,
+        "saturation": find_saturation(steps),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
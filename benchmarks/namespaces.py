@@ -0,0 +1,198 @@
+# benchmarks/namespaces.py
+"""Measure query latency on a large index with and without vector namespaces.
+
+The same synthetic index (--vectors chunks over --documents documents,
+spread over the four categories and --tenants owners) is laid out in each
+namespace mode in --modes (none = one shared namespace, category, tenant)
+and searched through `DoclingProcessor` the way the API does: within one
+document (chat), over one user's library (semantic search), within a
+category (/chat/retrieve) and library-wide (admin). The report gives
+p50/p95 latency, index queries and vectors scored per search.
+
+It also commits a tenant-scoped dedup plan and checks that the LSH bucket
+keys fit their column (SQLite does not enforce VARCHAR widths, Postgres
+does) and that copies only link within a tenant; the run exits non-zero
+if they don't.
+
+    python -m benchmarks.namespaces --vectors 200000 --modes none category tenant
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks import offline_env
+
+_work_dir = tempfile.mkdtemp(prefix="bench-namespaces-")
+offline_env(
+    DATABASE_URL=f"sqlite:///{os.path.join(_work_dir, 'namespaces.db')}",
+    STORAGE_BACKEND="local",
+    LOCAL_STORAGE_ROOT=os.path.join(_work_dir, "storage"),
+    DEDUP_ENABLED="false",
+    HIERARCHICAL_RETRIEVAL="false",
+    QUERY_EMBEDDING_BATCH_WAIT_MS="0",
+)
+
+from sqlalchemy import func, select
+
+from backend.app.database.database import SessionLocal, init_db
+from backend.app.database.models import ChunkLSHBucket
+from backend.app.document.dedup import ChunkDeduplicator
+from backend.app.document.docling_processor import DoclingProcessor
+from backend.app.document.namespaces import vector_namespace
+from benchmarks.corpus import sentence
+from benchmarks.fakes import FakeIndex, FakeS3, HashingEmbeddings, Latency
+from benchmarks.stats import latency_summary
+
+CATEGORIES = ["Honeywell", "Tridium", "Johnson Controls", "General"]
+DIMENSIONS = 256
+
+
+def build_documents(documents: int, tenants: int, rng: random.Random):
+    """{document_id: (category, owner_id)}"""
+    return {
+        f"doc{i}": (rng.choice(CATEGORIES), f"user{rng.randrange(tenants)}")
+        for i in range(documents)
+    }
+
+
+def seed_index(index: FakeIndex, mode: str, scopes, vectors: int, seed: int, batch_size: int = 5000) -> None:
+    """Write `vectors` random chunk vectors, each into its document's namespace under `mode`."""
+    rng = np.random.default_rng(seed)
+    document_ids = list(scopes)
+    for start in range(0, vectors, batch_size):
+        size = min(batch_size, vectors - start)
+        values = rng.standard_normal((size, DIMENSIONS)).astype(np.float32)
+        owners = rng.integers(0, len(document_ids), size)
+        by_namespace = {}
+        for offset, (row, doc) in enumerate(zip(values, owners)):
+            document_id = document_ids[doc]
+            category, owner_id = scopes[document_id]
+            by_namespace.setdefault(vector_namespace(mode, category, owner_id), []).append({
+                "id": f"{document_id}_chunk_{start + offset}",
+                "values": row,
+                "metadata": {"document_id": document_id, "category": category, "owner_id": owner_id,
+                             "chunk_text": f"chunk {start + offset}"}
+            })
+        for namespace, batch in by_namespace.items():
+            index.upsert(batch, namespace=namespace)
+
+
+def measure(index: FakeIndex, search, queries, rng: random.Random, searches: int):
+    latencies, scored, calls = [], 0, 0
+    for _ in range(searches):
+        before_scored, before_queries = index.scored, index.queries
+        start = time.perf_counter()
+        search(rng.choice(queries))
+        latencies.append(time.perf_counter() - start)
+        scored += index.scored - before_scored
+        calls += index.queries - before_queries
+    return {
+        **latency_summary(latencies),
+        "index_queries_per_search": round(calls / searches, 2),
+        "vectors_scored_mean": round(scored / searches, 1),
+    }
+
+
+def run_mode(mode: str, scopes, args) -> dict:
+    index = FakeIndex(Latency(args.index_latency_ms))
+    seed_start = time.perf_counter()
+    seed_index(index, mode, scopes, args.vectors, args.seed)
+    seed_seconds = time.perf_counter() - seed_start
+
+    processor = DoclingProcessor(
+        storage=FakeS3(os.path.join(_work_dir, "s3")),
+        embeddings=HashingEmbeddings(DIMENSIONS),
+        index=index,
+        scopes=lambda ids: {d: scopes[d] for d in ids if d in scopes}
+    )
+    processor.namespace_mode = mode
+
+    rng = random.Random(args.seed)
+    queries = [sentence(rng) for _ in range(50)]
+    document_ids = list(scopes)
+    libraries = {}
+    for document_id, (_, owner_id) in scopes.items():
+        libraries.setdefault(owner_id, []).append(document_id)
+    owners = list(libraries)
+
+    paths = {
+        "document": lambda q: processor.search_document(q, rng.choice(document_ids), top_k=5),
+        "user_library": lambda q: processor.rank_documents(q, document_ids=libraries[rng.choice(owners)], top_k=50),
+        "category": lambda q: processor.search_batch([q], category=rng.choice(CATEGORIES), top_k=5),
+        "library": lambda q: processor.search_document(q, top_k=5),
+    }
+    stats = index.describe_index_stats()["namespaces"]
+    return {
+        "mode": mode,
+        "namespaces": len(stats),
+        "largest_namespace": max(n["vector_count"] for n in stats.values()),
+        "seed_s": round(seed_seconds, 3),
+        **{name: measure(index, search, queries, rng, args.searches) for name, search in paths.items()},
+    }
+
+
+def check_tenant_dedup(seed: int) -> dict:
+    """Plan and commit one document, then a copy in the same tenant and one in another."""
+    init_db()
+    rng = random.Random(seed)
+    texts = [" ".join(sentence(rng) for _ in range(8)) for _ in range(5)]
+    chunk_ids = lambda document_id: [f"{document_id}_chunk_{i}" for i in range(len(texts))]
+    tenants = [vector_namespace("tenant", owner_id=str(uuid.uuid4())) for _ in range(2)]
+    dedup = ChunkDeduplicator()
+
+    linked = []
+    for document_id, scope in (("dedup-a", tenants[0]), ("dedup-b", tenants[0]), ("dedup-c", tenants[1])):
+        plan = dedup.plan(document_id, "General", chunk_ids(document_id), texts, scope=scope)
+        dedup.commit(plan)
+        linked.append(len(plan.canonical))
+
+    with SessionLocal() as db:
+        longest = db.execute(select(func.max(func.length(ChunkLSHBucket.bucket)))).scalar() or 0
+    width = ChunkLSHBucket.__table__.c.bucket.type.length
+    return {
+        "bucket_key_max": longest,
+        "bucket_column_width": width,
+        "same_tenant_linked": linked[1],
+        "other_tenant_linked": linked[2],
+        "ok": longest <= width and linked[1] == len(texts) and linked[2] == 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", choices=["none", "category", "tenant"], default=["none", "category", "tenant"])
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--searches", type=int, default=50, help="Per search path and mode")
+    parser.add_argument("--index-latency-ms", type=float, default=0.0, help="Per index request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    scopes = build_documents(args.documents, args.tenants, random.Random(args.seed))
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": vars(args),
+        "runs": [run_mode(mode, scopes, args) for mode in args.modes],
+        "tenant_dedup": check_tenant_dedup(args.seed),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if not report["tenant_dedup"]["ok"]:
+        raise SystemExit("Tenant-scoped dedup check failed; see tenant_dedup in the report")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/payloads.py
+"""Measure response size and latency for document list payloads.
+
+Drives a small in-process ASGI app with the real schemas and response
+helpers: stdlib JSON vs orjson, uncompressed vs compressed, and a
+revalidation that comes back 304.
+
+    python -m benchmarks.payloads --documents 200 --requests 300
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from benchmarks import offline_env
+
+offline_env()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from backend.app.responses import CompressionMiddleware, etag_json_response
+from backend.app.schemas import DocumentPage
+
+
+def make_page(count: int) -> DocumentPage:
+    now = datetime.utcnow()
+    return DocumentPage(items=[
+        {
+            "id": str(uuid.uuid4()),
+            "filename": f"Controller Installation Guide Rev {i}.pdf",
+            "s3_key": f"documents/{uuid.uuid4()}.pdf",
+            "status": "completed",
+            "total_chunks": 120,
+            "processed_chunks": 120,
+            "created_at": now,
+            "updated_at": now,
+            "created_by": str(uuid.uuid4()),
+            "file_type": "application/pdf",
+            "file_size": 1024 * 1024 + i,
+            "category": "Honeywell",
+            "thumbnail_generated": True,
+            "thumbnail_s3_key": f"thumbnails/{uuid.uuid4().hex}.png",
+            "page_count": 48,
+        }
+        for i in range(count)
+    ], next_cursor="eyJjcmVhdGVkX2F0IjoiMjAyNC0wMS0wMSJ9")
+
+
+def build_app(page: DocumentPage, compressed: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/stdlib")
+    async def stdlib():
+        return JSONResponse(page.model_dump(mode="json"))
+
+    @app.get("/orjson")
+    async def fast(request: Request):
+        return etag_json_response(request, page.model_dump(mode="json"))
+
+    if compressed:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+
+async def call(app, path: str, headers: dict):
+    """One request through the ASGI app; returns (status, body bytes)."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return start["status"], dict((k.decode(), v.decode()) for k, v in start["headers"]), body
+
+
+async def measure(app, path: str, headers: dict, requests: int):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        status, response_headers, body = await call(app, path, headers)
+        samples.append(time.perf_counter() - start)
+    return {
+        "status": status,
+        "bytes": len(body),
+        "encoding": response_headers.get("content-encoding", "identity"),
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p95_ms": round(sorted(samples)[int(len(samples) * 0.95)] * 1000, 3),
+    }, response_headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    page = make_page(args.documents)
+    plain, compressed = build_app(page, compressed=False), build_app(page, compressed=True)
+    accept = {"accept-encoding": "br, gzip"}
+
+    async def run():
+        results = {
+            "stdlib_json": (await measure(plain, "/stdlib", {}, args.requests))[0],
+            "orjson": (await measure(plain, "/orjson", {}, args.requests))[0],
+        }
+        results["orjson_compressed"], headers = await measure(compressed, "/orjson", accept, args.requests)
+        results["revalidated_304"] = (await measure(
+            compressed, "/orjson", {**accept, "if-none-match": headers["etag"]}, args.requests
+        ))[0]
+        return results
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/query_embedding.py
+"""Measure query-embedding micro-batching under concurrent searches.
+
+Closed-loop client threads call `DoclingProcessor.search_document`
+back-to-back against a fake embedder with per-request latency and an
+in-process index. Each batching window in --waits (0 = one embedding
+request per search) is run at each --concurrency level; the report gives
+searches/s, latency percentiles and embedding requests per search.
+
+    python -m benchmarks.query_embedding --waits 0 2 5 10 --concurrency 1 8 32
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from benchmarks import offline_env
+
+_work_dir = tempfile.mkdtemp(prefix="bench-query-embed-")
+offline_env(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=os.path.join(_work_dir, "storage"))
+
+from backend.app.document.docling_processor import DoclingProcessor
+from backend.app.document.embedding_batcher import CoalescingEmbeddings
+from benchmarks.corpus import sentence
+from benchmarks.fakes import FakeIndex, FakeS3, HashingEmbeddings, Latency
+from benchmarks.stats import latency_summary
+
+
+def seed_index(processor: DoclingProcessor, chunks: int, rng: random.Random) -> None:
+    texts = [" ".join(sentence(rng) for _ in range(4)) for _ in range(chunks)]
+    vectors = processor.embeddings.embed_documents(texts)
+    processor.index.upsert([
+        {"id": f"doc{i % 50}_chunk_{i}", "values": v, "metadata": {"document_id": f"doc{i % 50}", "chunk_text": t}}
+        for i, (t, v) in enumerate(zip(texts, vectors))
+    ])
+
+
+def run(processor: DoclingProcessor, embeddings: HashingEmbeddings, queries, threads: int, per_thread: int, seed: int):
+    calls_before = embeddings.calls
+    latencies = []
+    lock = threading.Lock()
+
+    def client(n: int):
+        rng = random.Random(seed + n)
+        local = []
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            processor.search_document(rng.choice(queries), top_k=5)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=client, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    requests = embeddings.calls - calls_before
+    return {
+        "concurrency": threads,
+        "searches": len(latencies),
+        "seconds": round(elapsed, 3),
+        "searches_per_s": round(len(latencies) / elapsed, 2),
+        "embedding_requests": requests,
+        "embedding_requests_per_search": round(requests / len(latencies), 3),
+        **latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--waits", type=float, nargs="+", default=[0, 2, 5, 10], help="Batching windows in ms (0 = off)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--searches-per-thread", type=int, default=50)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--distinct-queries", type=int, default=200, help="Smaller pools give more duplicate queries")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--embed-latency-ms", type=float, default=80.0, help="Per embedding request")
+    parser.add_argument("--embed-item-latency-ms", type=float, default=0.2, help="Per text in a request")
+    parser.add_argument("--index-latency-ms", type=float, default=10.0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    embeddings = HashingEmbeddings(latency=Latency(args.embed_latency_ms, args.embed_item_latency_ms, jitter=0.2))
+    processor = DoclingProcessor(
+        storage=FakeS3(os.path.join(_work_dir, "s3")),
+        embeddings=embeddings,
+        index=FakeIndex(Latency(args.index_latency_ms, jitter=0.2)),
+    )
+    seed_index(processor, args.chunks, rng)
+    queries = [sentence(rng) for _ in range(args.distinct_queries)]
+
+    report = {"timestamp": datetime.now(timezone.utc).isoformat(), "config": vars(args), "runs": []}
+    for wait_ms in args.waits:
+        if wait_ms > 0:
+            processor.query_embeddings = CoalescingEmbeddings(embeddings, wait_ms, args.max_batch_size)
+        else:
+            processor.query_embeddings = embeddings
+        for threads in args.concurrency:
+            result = run(processor, embeddings, queries, threads, args.searches_per_thread, seed=threads)
+            report["runs"].append({"wait_ms": wait_ms, **result})
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
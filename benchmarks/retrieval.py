@@ -0,0 +1,235 @@
+# benchmarks/retrieval.py
+"""Measure retrieval quality and latency for chunking/retrieval configurations.
+
+Each configuration (chunk size, peer merging, top_k, section candidates)
+ingests the same corpus into a fresh in-process index, then answers a
+labelled question set through `DoclingProcessor.search_document`
+(library-wide; and within the expected document, flat vs two-stage
+section-then-chunk) and `ChatManager.retrieve` (per-document, as
+/chat/ask does), whose hits are then widened by `ChatManager.fit_context`
+(neighbour/section expansion within the token budget). Reports recall@k,
+MRR, p50/p95 latency, vectors scored per question and prompt tokens per
+configuration.
+
+Labelled questions are JSON lines of
+{"question": ..., "document": "<file name>", "pages": [..]} over the PDFs
+in --documents-dir. Without --questions, a synthetic corpus is generated
+and questions are drawn from its pages.
+
+    python -m benchmarks.retrieval --configs "large:8191:1:3" "small:512:1:5:8" "unmerged:512:0:5"
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from benchmarks import offline_env
+
+_work_dir = tempfile.mkdtemp(prefix="bench-retrieval-")
+# Configurations are compared chunk for chunk, so near-duplicates are indexed too
+offline_env(STORAGE_BACKEND="local", LOCAL_STORAGE_ROOT=os.path.join(_work_dir, "storage"), DEDUP_ENABLED="false")
+
+import tiktoken
+
+from backend.app.chat.chat_manager import ChatManager
+from backend.app.document.docling_processor import DoclingProcessor
+from benchmarks.corpus import build_corpus
+from benchmarks.fakes import FakeIndex, FakeS3, HashingEmbeddings, Latency
+from benchmarks.stats import latency_summary
+
+RECALL_KS = (1, 3, 5, 10)
+
+
+def parse_config(spec: str) -> Dict:
+    """Parse "name:max_tokens:merge_peers:top_k[:sections]" into a config dict."""
+    name, max_tokens, merge_peers, top_k, *sections = spec.split(":")
+    return {
+        "name": name,
+        "chunk_max_tokens": int(max_tokens),
+        "merge_peers": merge_peers == "1",
+        "top_k": int(top_k),
+        "section_candidates": int(sections[0]) if sections else 5,
+    }
+
+
+def generate_questions(corpus: List[Dict], per_document: int, seed: int = 0) -> List[Dict]:
+    """Draw questions from random sentences of the generated PDFs' pages."""
+    import fitz
+
+    rng = random.Random(seed)
+    questions = []
+    for item in corpus:
+        with fitz.open(item["path"]) as doc:
+            for _ in range(per_document):
+                page_no = rng.randint(1, doc.page_count)
+                sentences = [s.strip() for s in doc[page_no - 1].get_text().replace("\n", " ").split(".") if len(s.split()) > 6]
+                if not sentences:
+                    continue
+                words = rng.choice(sentences).split()
+                start = rng.randint(0, max(0, len(words) - 8))
+                questions.append({
+                    "question": "How do I " + " ".join(words[start:start + 8]).lower() + "?",
+                    "document": os.path.basename(item["path"]),
+                    "pages": [page_no],
+                })
+    return questions
+
+
+def is_relevant(result: Dict, expected_id: str, expected_pages: Optional[List[int]]) -> bool:
+    metadata = result.get("metadata") or {}
+    if metadata.get("document_id") != expected_id:
+        return False
+    if not expected_pages:
+        return True
+    return bool(set(metadata.get("page_numbers") or []) & set(expected_pages))
+
+
+def score(ranked: List[List[bool]]) -> Dict:
+    """recall@k and MRR from per-question relevance flags in rank order."""
+    total = len(ranked) or 1
+    report = {f"recall@{k}": round(sum(any(flags[:k]) for flags in ranked) / total, 4) for k in RECALL_KS}
+    report["mrr"] = round(sum(
+        next((1 / (i + 1) for i, hit in enumerate(flags) if hit), 0.0) for flags in ranked
+    ) / total, 4)
+    return report
+
+
+def run_config(config: Dict, documents: List[Dict], questions: List[Dict], args) -> Dict:
+    storage = FakeS3(os.path.join(_work_dir, config["name"]), Latency(args.s3_latency_ms))
+    embeddings = HashingEmbeddings(latency=Latency(args.embed_latency_ms))
+    index = FakeIndex(Latency(args.index_latency_ms))
+    processor = DoclingProcessor(
+        storage=storage, embeddings=embeddings, index=index,
+        chunk_max_tokens=config["chunk_max_tokens"], merge_peers=config["merge_peers"]
+    )
+    processor.section_candidates = config["section_candidates"]
+    # Retrieval only: no LLM is called, so none is built
+    chat = ChatManager(
+        document_processor=processor, llm=object(), top_k=config["top_k"], context_window=args.context_window,
+        context_mode=args.context_mode, context_token_budget=args.context_token_budget
+    )
+    encoding = tiktoken.get_encoding("cl100k_base")
+
+    ingest_start = time.perf_counter()
+    ids = {}
+    for item in documents:
+        document_id = str(uuid.uuid4())
+        key = f"documents/bench/{document_id}/{os.path.basename(item['path'])}"
+        with open(item["path"], "rb") as f:
+            storage.put_object(key, f.read(), "application/pdf")
+        result = processor.process_and_index_document(document_id, key, {"category": "General"})
+        if result["status"] == "success":
+            ids[os.path.basename(item["path"])] = document_id
+    ingest_seconds = time.perf_counter() - ingest_start
+
+    paths = {
+        name: {"ranked": [], "latency": [], "scored": []}
+        for name in ("search_document", "document_flat", "document_hierarchical")
+    }
+    paths["chat_manager"] = {"ranked": [], "latency": [], "scored": [], "tokens": []}
+    paths["chat_context"] = {"ranked": [], "latency": [], "scored": [], "tokens": []}
+
+    def run_path(name: str, search, expected_id: str, pages, section_candidates: int):
+        processor.section_candidates = section_candidates
+        scored = index.scored
+        start = time.perf_counter()
+        results = search()
+        paths[name]["latency"].append(time.perf_counter() - start)
+        paths[name]["scored"].append(index.scored - scored)
+        paths[name]["ranked"].append([is_relevant(r, expected_id, pages) for r in results])
+        return results
+
+    all_ids = list(ids.values())
+    for q in questions:
+        expected_id = ids.get(q["document"])
+        if expected_id is None:
+            continue
+        question, pages = q["question"], q.get("pages")
+
+        run_path("search_document", lambda: processor.search_document(question, top_k=max(RECALL_KS)),
+                 expected_id, pages, 0)
+        run_path("document_flat", lambda: processor.search_document(question, expected_id, top_k=max(RECALL_KS)),
+                 expected_id, pages, 0)
+        run_path("document_hierarchical", lambda: processor.search_document(question, expected_id, top_k=max(RECALL_KS)),
+                 expected_id, pages, config["section_candidates"])
+
+        results = run_path("chat_manager", lambda: chat.retrieve(question, all_ids),
+                           expected_id, pages, config["section_candidates"])
+        prompt = chat.system_prompt + chat.build_prompt(question, results)
+        paths["chat_manager"]["tokens"].append(len(encoding.encode(prompt)))
+
+        passages = run_path("chat_context", lambda: chat.fit_context(results),
+                            expected_id, pages, config["section_candidates"])
+        prompt = chat.system_prompt + chat.build_prompt(question, passages)
+        paths["chat_context"]["tokens"].append(len(encoding.encode(prompt)))
+
+    report = {
+        **config,
+        "documents_indexed": len(ids),
+        "vectors": index.describe_index_stats()["namespaces"].get("", {}).get("vector_count", 0),
+        "section_vectors": index.describe_index_stats()["namespaces"].get("sections", {}).get("vector_count", 0),
+        "ingest_s": round(ingest_seconds, 3),
+        "questions": len(paths["search_document"]["ranked"]),
+    }
+    for name, data in paths.items():
+        report[name] = {**score(data["ranked"]), **latency_summary(data["latency"])}
+        if data["scored"]:
+            report[name]["vectors_scored_mean"] = round(sum(data["scored"]) / len(data["scored"]), 1)
+        if data.get("tokens"):
+            report[name]["prompt_tokens_mean"] = round(sum(data["tokens"]) / len(data["tokens"]), 1)
+            report[name]["prompt_tokens_max"] = max(data["tokens"])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--configs", nargs="+", default=["default:8191:1:3"],
+                        help="name:chunk_max_tokens:merge_peers(0/1):top_k[:section_candidates]; several configs are compared")
+    parser.add_argument("--questions", help="JSONL of labelled questions (default: generated)")
+    parser.add_argument("--documents-dir", help="PDFs the labelled questions refer to")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 20, 40], help="Generated corpus page counts")
+    parser.add_argument("--questions-per-document", type=int, default=20)
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "tech-rag-bench-corpus"))
+    parser.add_argument("--context-window", type=int, default=1, help="Neighbour chunks added either side of a hit")
+    parser.add_argument("--context-mode", choices=["neighbours", "section"], default="neighbours")
+    parser.add_argument("--context-token-budget", type=int, default=6000)
+    parser.add_argument("--s3-latency-ms", type=float, default=0.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--index-latency-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    if args.questions:
+        if not args.documents_dir:
+            parser.error("--questions needs --documents-dir")
+        documents = [
+            {"path": os.path.join(args.documents_dir, name)}
+            for name in sorted(os.listdir(args.documents_dir)) if name.lower().endswith(".pdf")
+        ]
+        with open(args.questions) as f:
+            questions = [json.loads(line) for line in f if line.strip()]
+    else:
+        documents = build_corpus(args.corpus_dir, args.pages)
+        questions = generate_questions(documents, args.questions_per_document)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "documents": len(documents),
+        "questions": len(questions),
+        "configs": [run_config(parse_config(spec), documents, questions, args) for spec in args.configs],
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
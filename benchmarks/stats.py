@@ -0,0 +1,63 @@
+# benchmarks/stats.py
+"""Shared helpers for summarising benchmark measurements."""
+import resource
+import statistics
+import sys
+from typing import Dict, List
+
+from backend.app.metrics import STAGE_LATENCY
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """Mean/p50/p95/p99 of samples given in seconds, reported in milliseconds."""
+    if not samples:
+        return {}
+    return {
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def stage_totals() -> Dict[str, Dict[str, float]]:
+    """Cumulative {stage: {"count", "seconds"}} from the stage latency histogram."""
+    totals: Dict[str, Dict[str, float]] = {}
+    for metric in STAGE_LATENCY.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_sum"):
+                field = "seconds"
+            elif sample.name.endswith("_count"):
+                field = "count"
+            else:
+                continue
+            entry = totals.setdefault(sample.labels["stage"], {"count": 0, "seconds": 0.0})
+            entry[field] += sample.value
+    return totals
+
+
+def stage_breakdown(before: Dict, after: Dict) -> Dict[str, Dict[str, float]]:
+    """Per-stage calls, total seconds and mean ms between two stage_totals()."""
+    breakdown = {}
+    for stage, totals in sorted(after.items()):
+        previous = before.get(stage, {"count": 0, "seconds": 0.0})
+        calls = int(totals["count"] - previous["count"])
+        seconds = totals["seconds"] - previous["seconds"]
+        if calls:
+            breakdown[stage] = {
+                "calls": calls,
+                "total_s": round(seconds, 4),
+                "mean_ms": round(seconds / calls * 1000, 3),
+            }
+    return breakdown
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
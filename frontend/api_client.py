@@ -20,14 +20,40 @@ class APIClient:
         """Get API base URL from session state"""
         return st.session_state.get("api_base_url", "")
 
+    ETAG_CACHE_SIZE = 200
+
     @classmethod
     def get(cls, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make GET request to API endpoint"""
+        """Make GET request to API endpoint, revalidating cached responses by ETag"""
+        session = cls.get_session()
+        base_url = cls.get_base_url()
+        url = f"{base_url}/{endpoint.lstrip('/')}"
+        cache = st.session_state.setdefault("etag_cache", {})
+        key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        cached = cache.get(key)
+
+        headers = {"If-None-Match": cached[0]} if cached else None
+        response = session.get(url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+
+        etag = response.headers.get("ETag")
+        if etag:
+            if len(cache) >= cls.ETAG_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+            cache[key] = (etag, data)
+        return data
+
+    @classmethod
+    def get_bytes(cls, endpoint: str, params: Optional[Dict] = None) -> bytes:
+        """Make GET request to a binary API endpoint (images, files)"""
         session = cls.get_session()
         base_url = cls.get_base_url()
         response = session.get(f"{base_url}/{endpoint.lstrip('/')}", params=params)
         response.raise_for_status()
-        return response.json()
+        return response.content
 
     @classmethod
     def post(cls, endpoint: str, json: Optional[Dict] = None, data: Optional[Dict] = None, files: Optional[Dict] = None) -> Dict[str, Any]:
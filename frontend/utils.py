@@ -1,6 +1,9 @@
 # app/frontend/utils.py
 from datetime import datetime
+from typing import Any, Dict
 import humanize
+import streamlit as st
+from frontend.api_client import APIClient
 
 def format_size(size_bytes: int) -> str:
     """Format bytes into human readable size"""
@@ -12,3 +15,40 @@ def format_date(iso_date_str: str) -> str:
         return ""
     dt = datetime.fromisoformat(iso_date_str.replace("Z", "+00:00"))
     return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+def load_document_pages(endpoint: str, params: Dict[str, Any], state_key: str) -> Dict[str, Any]:
+    """Fetch the first keyset page for these filters plus any pages loaded with "Load more".
+
+    Page 1 is fetched on every rerun (an ETag revalidation when nothing
+    changed) so status changes show up; only later pages are kept in
+    session state.
+    """
+    key = (endpoint, tuple(sorted((k, str(v)) for k, v in params.items())))
+    first = APIClient.get(endpoint, params=params)
+
+    state = st.session_state.get(state_key)
+    if not state or state["key"] != key:
+        state = {"key": key, "params": params, "more": [], "more_cursor": None}
+        st.session_state[state_key] = state
+    state["first_cursor"] = first.get("next_cursor")
+
+    seen = {doc["id"] for doc in first["items"]}
+    items = list(first["items"]) + [doc for doc in state["more"] if doc["id"] not in seen]
+    next_cursor = state["more_cursor"] if state["more"] else state["first_cursor"]
+    return {"items": items, "next_cursor": next_cursor}
+
+def load_next_page(endpoint: str, state_key: str) -> None:
+    """Append the next keyset page to the pages kept in session state"""
+    state = st.session_state.get(state_key)
+    if not state:
+        return
+    cursor = state["more_cursor"] if state["more"] else state["first_cursor"]
+    if not cursor:
+        return
+    page = APIClient.get(endpoint, params={**state["params"], "cursor": cursor})
+    state["more"].extend(page["items"])
+    state["more_cursor"] = page.get("next_cursor")
+
+def reset_document_pages(state_key: str) -> None:
+    """Drop the pages loaded with "Load more" so the view starts again from page 1"""
+    st.session_state.pop(state_key, None)
@@ -1,6 +1,6 @@
 # app/frontend/pages/admin_management.py
 import streamlit as st
-from frontend.utils import format_size, format_date
+from frontend.utils import format_size, format_date, load_document_pages, load_next_page, reset_document_pages
 from frontend.api_client import APIClient
 
 def get_status_color(status: str) -> str:
@@ -57,6 +57,7 @@ def show_admin_management():
                             files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
                             response = APIClient.post("documents/upload", files=files, data={"category": category})
                             st.success(f"Document '{uploaded_file.name}' uploaded successfully!")
+                            reset_document_pages("admin_pages")
                             st.rerun()
                     except Exception as e:
                         st.error(f"Upload failed: {str(e)}")
@@ -86,7 +87,10 @@ def show_admin_management():
         if category_filter != "All":
             params["category"] = category_filter
 
-        documents = APIClient.get("documents/list", params=params)
+        if st.button("🔄 Refresh", help="Reload the document list"):
+            reset_document_pages("admin_pages")
+        pages = load_document_pages("documents/list", params, "admin_pages")
+        documents = pages["items"]
 
         if not documents:
             st.info("No documents found in the library.")
@@ -125,6 +129,7 @@ def show_admin_management():
                             try:
                                 APIClient.delete(f"documents/{doc['id']}")
                                 st.success("Document deleted successfully.")
+                                reset_document_pages("admin_pages")
                                 st.rerun()
                             except Exception as e:
                                 st.error(f"Delete failed: {str(e)}")
@@ -138,6 +143,10 @@ def show_admin_management():
                         progress = doc['processed_chunks'] / doc['total_chunks']
                         st.progress(progress, text="Processing Progress")
 
+        if pages["next_cursor"] and st.button("Load more"):
+            load_next_page("documents/list", "admin_pages")
+            st.rerun()
+
     except Exception as e:
         st.error(f"Error loading documents: {str(e)}")
         if st.button("Retry", type="primary"):
@@ -1,3 +1,4 @@
+import time
 import streamlit as st
 from streamlit_pdf_viewer import pdf_viewer
 from frontend.api_client import APIClient
@@ -16,9 +17,19 @@ def show_chat():
     st.write(f"**Document Name:** {doc_name}")
 
     try:
-        # Get document preview URL
-        preview_response = APIClient.get(f"documents/{doc_id}/download_url")
-        presigned_url = preview_response.get("url", "")
+        # Get document preview URL, reusing it across reruns until it nears expiry
+        cached = st.session_state.get("preview_urls", {}).get(doc_id)
+        if not cached or cached.get("expires_at", 0) - 60 < time.time():
+            cached = APIClient.get(f"documents/{doc_id}/download_url")
+            st.session_state.setdefault("preview_urls", {})[doc_id] = cached
+        presigned_url = cached.get("url", "")
+        # Prefer the range-capable proxy so the viewer can show page 1 early
+        stream_url = cached.get("stream_url")
+        if stream_url:
+            presigned_url = stream_url
+        if presigned_url and not presigned_url.startswith("http"):
+            # API-relative links (stream proxy, local storage)
+            presigned_url = f"{APIClient.get_base_url()}/{presigned_url}"
 
         if presigned_url:
             st.subheader("PDF Viewer")
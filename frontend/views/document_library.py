@@ -1,6 +1,7 @@
 # app/frontend/pages/document_library.py
+import html
 import streamlit as st
-from frontend.utils import format_size, format_date
+from frontend.utils import format_size, format_date, load_document_pages, load_next_page, reset_document_pages
 from frontend.api_client import APIClient
 
 def get_status_color(status: str) -> str:
@@ -14,6 +15,13 @@ def get_status_color(status: str) -> str:
     }
     return colors.get(status.lower(), 'default')
 
+SORT_OPTIONS = {
+    "Upload Date (Newest)": ("created_at", "desc"),
+    "Upload Date (Oldest)": ("created_at", "asc"),
+    "Name (A-Z)": ("filename", "asc"),
+    "Name (Z-A)": ("filename", "desc"),
+}
+
 def get_document_thumbnail(file_type: str) -> str:
     """Get document emoji based on file type"""
     icons = {
@@ -24,6 +32,16 @@ def get_document_thumbnail(file_type: str) -> str:
     }
     return icons.get(file_type, '📄')
 
+def format_snippet(snippet: str) -> str:
+    """Escape a search snippet, keeping only the server's <mark> highlights"""
+    escaped = html.escape(snippet)
+    return escaped.replace("&lt;mark&gt;", "<mark>").replace("&lt;/mark&gt;", "</mark>")
+
+@st.cache_data(show_spinner=False, max_entries=2000)
+def fetch_thumbnail(document_id: str, thumbnail_key: str) -> bytes:
+    """Fetch a pre-rendered thumbnail; keyed by its content-addressed key"""
+    return APIClient.get_bytes(f"documents/{document_id}/thumbnail")
+
 def show_document_library():
     """Enhanced document library view"""
     st.title("Document Library")
@@ -39,11 +57,7 @@ def show_document_library():
             ["All", "Honeywell", "Tridium", "Johnson Controls", "General"]
         )
     with col3:
-        sort_option = st.selectbox(
-            "Sort by",
-            ["Upload Date (Newest)", "Upload Date (Oldest)",
-             "Name (A-Z)", "Name (Z-A)"]
-        )
+        sort_option = st.selectbox("Sort by", list(SORT_OPTIONS))
 
     # Upload section in a card
     with st.expander("📤 Upload New Document", expanded=False):
@@ -63,38 +77,34 @@ def show_document_library():
                         files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
                         APIClient.post("documents/upload", files=files, data={"category": category})
                         st.success("Document uploaded successfully!")
+                        reset_document_pages("library_pages")
                         st.rerun()
                 except Exception as e:
                     st.error(f"Upload failed: {str(e)}")
 
     try:
-        # Fetch and filter documents
-        cat = None if category_filter == "All" else category_filter
+        # Fetch documents, sorted and paginated by the server; search
+        # results come back ordered by relevance instead
+        params = {}
+        if category_filter != "All":
+            params["category"] = category_filter
         if search_query:
-            documents = APIClient.get("documents/search", params={
-                "query": search_query,
-                "category": cat
-            })
+            endpoint = "documents/search"
+            params["query"] = search_query
         else:
-            documents = APIClient.get("documents/list", params={
-                "category": cat,
-                "include_deleted": False
-            })
+            endpoint = "documents/list"
+            sort_by, order = SORT_OPTIONS[sort_option]
+            params.update({"sort_by": sort_by, "order": order, "include_deleted": False})
+
+        if st.button("🔄 Refresh", help="Reload the document list"):
+            reset_document_pages("library_pages")
+        pages = load_document_pages(endpoint, params, "library_pages")
+        documents = pages["items"]
 
         if not documents:
             st.info("No documents found.")
             return
 
-        # Apply sorting
-        if sort_option == "Upload Date (Newest)":
-            documents.sort(key=lambda x: x['created_at'], reverse=True)
-        elif sort_option == "Upload Date (Oldest)":
-            documents.sort(key=lambda x: x['created_at'])
-        elif sort_option == "Name (A-Z)":
-            documents.sort(key=lambda x: x['filename'].lower())
-        elif sort_option == "Name (Z-A)":
-            documents.sort(key=lambda x: x['filename'].lower(), reverse=True)
-
         # Display documents in a grid
         cols = st.columns(3)
         for idx, doc in enumerate(documents):
@@ -109,16 +119,29 @@ def show_document_library():
                         margin: 5px;
                         background-color: white;
                     ">
-                        <h3 style="margin: 0; padding-bottom: 10px;">{doc['filename']}</h3>
+                        <h3 style="margin: 0; padding-bottom: 10px;">{html.escape(doc['filename'])}</h3>
                     </div>
                     """, unsafe_allow_html=True)
 
+                    if doc.get('snippet'):
+                        st.markdown(f"<div style='font-size: 0.9em; color: #555;'>{format_snippet(doc['snippet'])}</div>",
+                                  unsafe_allow_html=True)
+
                     # Document icon and details
                     col1, col2 = st.columns([1, 2])
                     with col1:
-                        thumbnail = get_document_thumbnail(doc['file_type'])
-                        st.markdown(f"<div style='text-align: center; font-size: 48px;'>{thumbnail}</div>",
-                                  unsafe_allow_html=True)
+                        image = None
+                        if doc.get('thumbnail_generated') and doc.get('thumbnail_s3_key'):
+                            try:
+                                image = fetch_thumbnail(doc['id'], doc['thumbnail_s3_key'])
+                            except Exception:
+                                image = None
+                        if image:
+                            st.image(image, use_container_width=True)
+                        else:
+                            thumbnail = get_document_thumbnail(doc['file_type'])
+                            st.markdown(f"<div style='text-align: center; font-size: 48px;'>{thumbnail}</div>",
+                                      unsafe_allow_html=True)
                     with col2:
                         st.markdown(f"**Size:** {format_size(doc['file_size'])}")
                         st.markdown(f"**Uploaded:** {format_date(doc['created_at'])}")
@@ -143,5 +166,9 @@ def show_document_library():
                             st.session_state["selected_document_name"] = doc["filename"]
                             st.success(f"Selected '{doc['filename']}' for chat. Switch to 'Chat' page.")
 
+        if pages["next_cursor"] and st.button("Load more"):
+            load_next_page(endpoint, "library_pages")
+            st.rerun()
+
     except Exception as e:
         st.error(f"Error: {str(e)}")
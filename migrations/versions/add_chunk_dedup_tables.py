@@ -0,0 +1,47 @@
+"""add_chunk_dedup_tables
+
+Revision ID: add_chunk_dedup_tables
+Revises: add_document_fulltext_search
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_chunk_dedup_tables'
+down_revision = 'add_document_fulltext_search'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # MinHash signatures of indexed chunks; duplicates point at their canonical chunk
+    op.create_table(
+        'chunk_signatures',
+        sa.Column('chunk_id', sa.String(length=100), primary_key=True),
+        sa.Column('document_id', sa.String(), sa.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.Column('canonical_id', sa.String(length=100), nullable=True),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_chunk_signatures_document_id', 'chunk_signatures', ['document_id'])
+    op.create_index('ix_chunk_signatures_canonical_id', 'chunk_signatures', ['canonical_id'])
+
+    # LSH band buckets of canonical chunks
+    op.create_table(
+        'chunk_lsh_buckets',
+        sa.Column('bucket', sa.String(length=64), primary_key=True),
+        sa.Column(
+            'chunk_id',
+            sa.String(length=100),
+            sa.ForeignKey('chunk_signatures.chunk_id', ondelete='CASCADE'),
+            primary_key=True
+        ),
+    )
+
+def downgrade():
+    op.drop_table('chunk_lsh_buckets')
+    op.drop_index('ix_chunk_signatures_canonical_id', table_name='chunk_signatures')
+    op.drop_index('ix_chunk_signatures_document_id', table_name='chunk_signatures')
+    op.drop_table('chunk_signatures')
@@ -0,0 +1,23 @@
+"""add_document_content_hash
+
+Revision ID: add_document_content_hash
+Revises: update_document_list_indexes
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_document_content_hash'
+down_revision = 'update_document_list_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Filled at upload; existing documents get it from
+    # scripts/backfill_thumbnails.py --all
+    op.add_column('documents', sa.Column('content_sha256', sa.String(64), nullable=True))
+
+def downgrade():
+    op.drop_column('documents', 'content_sha256')
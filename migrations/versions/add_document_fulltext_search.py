@@ -0,0 +1,54 @@
+"""add_document_fulltext_search
+
+Revision ID: add_document_fulltext_search
+Revises: add_document_list_indexes
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'add_document_fulltext_search'
+down_revision = 'add_document_list_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Extracted text lives beside documents so listing queries stay narrow
+    op.create_table(
+        'document_contents',
+        sa.Column('document_id', sa.String(), sa.ForeignKey('documents.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.add_column('document_contents', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.create_index(
+            'ix_document_contents_search_vector',
+            'document_contents',
+            ['search_vector'],
+            postgresql_using='gin'
+        )
+        # Metadata-only entries for existing documents; run
+        # scripts/rebuild_search_index.py to add their extracted text
+        op.execute("""
+            INSERT INTO document_contents (document_id, updated_at)
+            SELECT id, now() FROM documents
+        """)
+        op.execute("""
+            UPDATE document_contents AS c
+            SET search_vector =
+                setweight(to_tsvector('english', coalesce(d.title, '') || ' ' || d.filename), 'A') ||
+                setweight(to_tsvector('english', coalesce(d.tags, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(d.description, '')), 'C')
+            FROM documents AS d
+            WHERE d.id = c.document_id
+        """)
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_document_contents_search_vector', table_name='document_contents')
+    op.drop_table('document_contents')
@@ -0,0 +1,33 @@
+"""add_document_list_indexes
+
+Revision ID: add_document_list_indexes
+Revises: enhance_document_model_v2
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_document_list_indexes'
+down_revision = 'enhance_document_model_v2'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Supports keyset-paginated listing per user, newest first
+    op.create_index(
+        'ix_documents_created_by_status_created_at',
+        'documents',
+        ['created_by', 'status', 'created_at']
+    )
+    # Supports category-filtered listing and search
+    op.create_index(
+        'ix_documents_category_status',
+        'documents',
+        ['category', 'status']
+    )
+
+def downgrade():
+    op.drop_index('ix_documents_category_status', table_name='documents')
+    op.drop_index('ix_documents_created_by_status_created_at', table_name='documents')
@@ -0,0 +1,42 @@
+"""update_document_list_indexes
+
+Revision ID: update_document_list_indexes
+Revises: add_chunk_dedup_tables
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'update_document_list_indexes'
+down_revision = 'add_chunk_dedup_tables'
+branch_labels = None
+depends_on = None
+
+# Listing orders by (sort key, id); each index supplies that order for a
+# user's library (created_by first) or the admin listing
+LIST_INDEXES = [
+    ('ix_documents_created_by_created_at_id', ['created_by', 'created_at', 'id']),
+    ('ix_documents_created_by_filename_id', ['created_by', 'filename', 'id']),
+    ('ix_documents_created_by_category_id', ['created_by', 'category', 'id']),
+    ('ix_documents_created_at_id', ['created_at', 'id']),
+    ('ix_documents_filename_id', ['filename', 'id']),
+    ('ix_documents_category_id', ['category', 'id']),
+]
+
+def upgrade():
+    # The status column sat between the owner and the sort key, so the
+    # `status != deleted` filter kept the index from supplying the order
+    op.drop_index('ix_documents_created_by_status_created_at', table_name='documents')
+    for name, columns in LIST_INDEXES:
+        op.create_index(name, 'documents', columns)
+
+def downgrade():
+    for name, _ in reversed(LIST_INDEXES):
+        op.drop_index(name, table_name='documents')
+    op.create_index(
+        'ix_documents_created_by_status_created_at',
+        'documents',
+        ['created_by', 'status', 'created_at']
+    )
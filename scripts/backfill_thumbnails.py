@@ -0,0 +1,85 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from sqlalchemy import or_
+from dotenv import load_dotenv
+
+from backend.app.database.database import SessionLocal
+from backend.app.database.models import Document, DocumentStatus
+from backend.app.document.thumbnails import get_thumbnail_generator
+
+def backfill(batch_size: int, limit: int = 0, all_documents: bool = False):
+    """Render thumbnails/previews for documents that don't have them yet.
+
+    Documents are walked in primary-key order in batches; each batch is
+    rendered in parallel on the thumbnail process pool and committed
+    before the next one is read. With `all_documents`, documents that
+    already have images are revisited too: after a RENDER_VERSION bump
+    they are rendered again, and documents uploaded before content hashes
+    were stored get theirs.
+    """
+    generator = get_thumbnail_generator()
+    db = SessionLocal()
+    last_id = ""
+    done = failed = 0
+    try:
+        while True:
+            query = db.query(Document).filter(Document.id > last_id, Document.status == DocumentStatus.COMPLETED)
+            if not all_documents:
+                query = query.filter(or_(Document.thumbnail_generated.is_(None), Document.thumbnail_generated.is_(False)))
+            batch = (
+                query
+                .order_by(Document.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            images = generator.generate_batch(
+                [{"id": d.id, "s3_key": d.s3_key, "content_sha256": d.content_sha256} for d in batch]
+            )
+            for doc in batch:
+                result = images.get(doc.id)
+                if not result:
+                    failed += 1
+                    continue
+                doc.thumbnail_s3_key = result["thumbnail_s3_key"]
+                doc.preview_s3_key = result["preview_s3_key"]
+                doc.thumbnail_generated = True
+                doc.content_sha256 = result["content_sha256"]
+                if result["page_count"]:
+                    doc.page_count = result["page_count"]
+                done += 1
+            db.commit()
+            print(f"Processed {done + failed} documents ({done} ok, {failed} failed)")
+
+            if limit and done + failed >= limit:
+                break
+    finally:
+        db.close()
+        generator.shutdown()
+
+    print(f"Backfill complete: {done} thumbnails generated, {failed} failed")
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Backfill document thumbnails and previews")
+    parser.add_argument("--batch-size", type=int, default=20,
+                        help="Documents per batch; remote sources of a batch are downloaded together")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many documents (0 = all)")
+    parser.add_argument("--all", action="store_true",
+                        help="Also revisit documents that have images (after a RENDER_VERSION bump)")
+    args = parser.parse_args()
+
+    backfill(args.batch_size, args.limit, args.all)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import argparse
+import subprocess
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+# Packages that must not be imported until first use or background warm-up
+HEAVY_PACKAGES = ["docling", "transformers", "torch", "langchain", "langchain_community", "pinecone", "boto3", "fitz"]
+
+CHECK_HEAVY = """
+import json, sys
+import backend.app.main
+print(json.dumps(sorted({name.split('.')[0] for name in sys.modules} & set(%r))))
+"""
+
+def parse_importtime(stderr: str):
+    """Parse `-X importtime` output into (cumulative_us, self_us, module) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+    return rows
+
+def run_python(code: str, *flags: str):
+    env = dict(os.environ, PYTHONPATH=str(project_root))
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=project_root, env=env, capture_output=True, text=True
+    )
+
+def time_first_response(port: int, timeout: float):
+    """Start uvicorn and time until / answers"""
+    import urllib.request
+
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--port", str(port)],
+        cwd=project_root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Report where API import time goes")
+    parser.add_argument("--top", type=int, default=25, help="Modules to list by cumulative time")
+    parser.add_argument("--serve", action="store_true", help="Also time the first response from uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    result = run_python("import backend.app.main", "-X", "importtime")
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        sys.exit(1)
+
+    rows = parse_importtime(result.stderr)
+    print(f"Importing backend.app.main: {sum(r[1] for r in rows) / 1e6:.2f}s across {len(rows)} modules")
+    print(f"\nTop {args.top} modules by cumulative import time:")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {module}")
+
+    check = run_python(CHECK_HEAVY % HEAVY_PACKAGES)
+    heavy = check.stdout.strip().splitlines()[-1] if check.returncode == 0 else check.stderr[-500:]
+    print(f"\nHeavy packages loaded by importing the app: {heavy}")
+
+    failed = check.returncode != 0 or heavy != "[]"
+    if args.serve:
+        elapsed = time_first_response(args.port, args.timeout)
+        if elapsed is None:
+            print(f"\nNo response within {args.timeout:.0f}s")
+            failed = True
+        else:
+            print(f"\nFirst response {elapsed:.2f}s after process start")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import sys
+import argparse
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from dotenv import load_dotenv
+
+from backend.app.config import get_settings
+from backend.app.database.database import SessionLocal
+from backend.app.database.models import Document, DocumentStatus
+from backend.app.document.docling_processor import document_scopes, get_docling_processor
+from backend.app.document.namespaces import NAMESPACE_MODES, section_namespace, vector_namespace
+from backend.app.document.sections import section_id
+
+def linked_namespaces(mode: str, vectors, scopes) -> set:
+    """Namespaces of the other documents that share these (canonical) vectors."""
+    linked = {d for v in vectors for d in (v.metadata or {}).get("document_ids") or []}
+    return {vector_namespace(mode, *scopes[d]) for d in linked if d in scopes}
+
+def move(index, ids, source: str, target: str, from_mode: str, to_mode: str,
+         batch_size: int, keep_source: bool, dry_run: bool, linked: bool = False) -> int:
+    """Copy the vectors with these ids from `source` to `target`, then delete the originals.
+
+    With `linked`, a canonical vector shared by documents in other target
+    namespaces (tenant mode) is copied into each of them as well, and
+    copies in other source namespaces are deleted with the original.
+    """
+    moved = 0
+    for start in range(0, len(ids), batch_size):
+        fetched = list(index.fetch(ids=ids[start:start + batch_size], namespace=source).vectors.values())
+        if not fetched:
+            continue
+        moved += len(fetched)
+        if dry_run:
+            continue
+
+        scopes = document_scopes({d for v in fetched for d in (v.metadata or {}).get("document_ids") or []}) if linked else {}
+        records = [{"id": v.id, "values": list(v.values), "metadata": v.metadata or {}} for v in fetched]
+        index.upsert(vectors=records, namespace=target)
+        for v, record in zip(fetched, records):
+            for namespace in linked_namespaces(to_mode, [v], scopes) - {target}:
+                index.upsert(vectors=[record], namespace=namespace)
+
+        if not keep_source:
+            index.delete(ids=[v.id for v in fetched], namespace=source)
+            for namespace in linked_namespaces(from_mode, fetched, scopes) - {source, target}:
+                index.delete(ids=[v.id for v in fetched], namespace=namespace)
+    return moved
+
+def migrate(from_mode: str, to_mode: str, batch_size: int, keep_source: bool, dry_run: bool, limit: int = 0):
+    """Move every indexed document's chunk and section vectors into its namespace under `to_mode`.
+
+    Documents are walked in primary-key order; deleted documents are moved
+    too, since their vectors may still be canonical for other documents'
+    duplicates. Chunk and section ids come from the stored document
+    structure, so it works on indexes that can't list their ids. Safe to
+    re-run: vectors already moved are no longer found in the source.
+    """
+    processor = get_docling_processor()
+    index = processor.index
+    db = SessionLocal()
+    last_id = ""
+    documents = chunks = sections = skipped = 0
+    try:
+        while True:
+            batch = (
+                db.query(Document)
+                .filter(
+                    Document.id > last_id,
+                    Document.status.in_([DocumentStatus.COMPLETED, DocumentStatus.DELETED])
+                )
+                .order_by(Document.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            for doc in batch:
+                try:
+                    source = vector_namespace(from_mode, doc.category, doc.created_by)
+                    target = vector_namespace(to_mode, doc.category, doc.created_by)
+                except ValueError as e:
+                    print(f"Skipping {doc.id}: {str(e)}")
+                    skipped += 1
+                    continue
+                structure = processor.get_document_structure(doc.id)
+                if source == target or not structure:
+                    skipped += 1
+                    continue
+
+                chunk_ids = [f"{doc.id}_chunk_{i}" for i in range(structure["num_chunks"])]
+                chunks += move(index, chunk_ids, source, target, from_mode, to_mode,
+                               batch_size, keep_source, dry_run, linked=True)
+                tree = processor.get_section_tree(doc.id) or []
+                section_ids = [section_id(doc.id, node) for node in range(len(tree))]
+                sections += move(index, section_ids, section_namespace(source), section_namespace(target),
+                                 from_mode, to_mode, batch_size, keep_source, dry_run)
+                documents += 1
+
+            print(f"Processed {documents + skipped} documents ({chunks} chunk and {sections} section vectors)")
+            if limit and documents + skipped >= limit:
+                break
+    finally:
+        db.close()
+
+    verb = "would move" if dry_run else "moved"
+    print(f"Migration complete: {verb} {chunks} chunk and {sections} section vectors "
+          f"from {documents} documents, {skipped} skipped")
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Move vectors between Pinecone namespace layouts")
+    parser.add_argument("--from-mode", choices=NAMESPACE_MODES, default="none",
+                        help="Layout the vectors are in now")
+    parser.add_argument("--to-mode", choices=NAMESPACE_MODES,
+                        help="Layout to move them to (default: VECTOR_NAMESPACE_MODE)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Documents per database batch and vectors per fetch")
+    parser.add_argument("--keep-source", action="store_true",
+                        help="Copy without deleting, so the old layout keeps serving until the setting is switched")
+    parser.add_argument("--dry-run", action="store_true", help="Count the vectors to move without writing")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many documents (0 = all)")
+    args = parser.parse_args()
+
+    to_mode = args.to_mode or get_settings().vector_namespace_mode
+    if to_mode == args.from_mode:
+        parser.error(f"Vectors are already in the '{to_mode}' layout")
+    migrate(args.from_mode, to_mode, args.batch_size, args.keep_source, args.dry_run, args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import sys
+import json
+import argparse
+import asyncio
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from sqlalchemy import select
+from dotenv import load_dotenv
+
+from backend.app.database.database import AsyncSessionLocal
+from backend.app.database.models import Document, DocumentStatus
+from backend.app.document import search_index
+from backend.app.document.docling_processor import chunk_index_key, chunk_blob_key
+from backend.app.document.storage import get_storage
+from backend.app.document.structure_cache import read_shards
+
+def load_text(storage, document_id: str):
+    """Rebuild a document's extracted text from its stored chunk shards"""
+    response = storage.get_object(chunk_index_key(document_id))
+    if not response or not response["body"]:
+        return None
+    offsets = json.loads(response["body"])["offsets"]
+    records = read_shards(storage, chunk_blob_key(document_id), offsets, list(range(len(offsets))))
+    return "\n\n".join(records[i]["text"] for i in sorted(records))
+
+async def rebuild(batch_size: int):
+    """Re-index every non-deleted document in primary-key order"""
+    await search_index.ensure_fulltext_schema()
+    storage = get_storage()
+    last_id = ""
+    indexed = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            batch = (await db.execute(
+                select(Document)
+                .where(Document.id > last_id, Document.status != DocumentStatus.DELETED)
+                .order_by(Document.id)
+                .limit(batch_size)
+            )).scalars().all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            for doc in batch:
+                text = await asyncio.to_thread(load_text, storage, doc.id)
+                await search_index.index_document(db, doc, text)
+                indexed += 1
+            await db.commit()
+        print(f"Indexed {indexed} documents")
+
+    print(f"Search index rebuilt for {indexed} documents")
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Rebuild the document full-text search index")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(rebuild(args.batch_size))
+
+if __name__ == "__main__":
+    main()